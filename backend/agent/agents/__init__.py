@@ -1,13 +1,9 @@
-from .attorney_agent import AttorneyAgent
-from .click_to_talk_agent import ClickToTalkAgent
-from .arabic_agent import ArabicAgent
-from .arabic_click_to_talk_agent import ArabicClickToTalkAgent
+from .base import ProfileAgent, build_agent
+from .plugins import build_plugin, register_plugin_factory
 
 __all__ = [
-    "AttorneyAgent",
-    "ClickToTalkAgent",
-    "ArabicAgent",
-    "ArabicClickToTalkAgent",
+    "ProfileAgent",
+    "build_agent",
+    "build_plugin",
+    "register_plugin_factory",
 ]
-
-
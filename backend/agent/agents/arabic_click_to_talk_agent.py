@@ -1,224 +0,0 @@
-import logging
-import base64
-import json
-import re
-from livekit.agents import Agent
-from livekit.plugins import groq
-from livekit.plugins.azure import TTS as AzureTTS
-from livekit.plugins.azure import STT as AzureSTT
-
-
-class ArabicClickToTalkAgent(Agent):
-    """Arabic Click-to-Talk agent: manual turn detection with Arabic STT/TTS"""
-
-    def __init__(self) -> None:
-        super().__init__(
-            instructions=(
-                "اسمُك حَكيم، مساعد قانوني ذكي من Binfin8. "
-                "تتكلم دائمًا بلهجة المتحدث إن تعرّفت عليها من كلامه. إن لم تتعرّف على لهجته فاختر لهجة خليجية طبيعية وواضحة (سعودية/قطرية) بدل العربية الفصحى. "
-                "خلّ ردّك موجز وواضح لأن هذا نمط اضغط لتتحدث؛ انتظر حتى ينتهي المستخدم ثم قدّم إجابة مركّزة بخطوات عملية. "
-                "عند تحليل الملفات أو الأسئلة، قدّم ملخصًا قصيرًا ثم نقاطًا قانونية مباشرة."
-            ),
-            stt=AzureSTT(language="ar-SA"),
-            llm=groq.LLM(model="allam-2-7b"),
-            tts=AzureTTS(voice="ar-OM-AbdullahNeural", language="ar-OM"),
-        )
-
-    async def on_enter(self):
-        await self.session.generate_reply(
-            instructions="هلا! أنا حَكيم. اضغط تكلّم وبعدين اضغط إرسال. وش موضوعك؟",
-            allow_interruptions=True,
-        )
-
-    # async def on_final_transcription(self, text: str) -> str:
-    #     """Filter transcription to keep only Arabic text and remove English words"""
-    #     logger = logging.getLogger("multi-agent-ptt")
-    #     logger.info(f"🔍 [ARABIC CTT FILTER] Input: '{text}'")
-        
-    #     filtered_text = self._filter_arabic_only(text)
-        
-    #     logger.info(f"🔍 [ARABIC CTT FILTER] Output: '{filtered_text}'")
-    #     logger.info(f"🔍 [ARABIC CTT FILTER] Filtered out: {len(text.split()) - len(filtered_text.split())} words")
-        
-    #     return filtered_text
-
-    # async def on_user_speech_committed(self, user_input):
-    #     """Override user speech committed to filter Arabic only"""
-    #     logger = logging.getLogger("multi-agent-ptt")
-        
-    #     # Get the transcription text
-    #     if hasattr(user_input, 'transcript') and user_input.transcript:
-    #         original_text = user_input.transcript
-    #         logger.info(f"🔍 [ARABIC CTT SPEECH FILTER] Input: '{original_text}'")
-            
-    #         filtered_text = self._filter_arabic_only(original_text)
-    #         logger.info(f"🔍 [ARABIC CTT SPEECH FILTER] Output: '{filtered_text}'")
-            
-    #         # If no Arabic content, skip processing
-    #         if not filtered_text.strip():
-    #             logger.info("🔍 [ARABIC CTT SPEECH FILTER] No Arabic content - skipping")
-    #             return
-            
-    #         # Modify the transcript
-    #         user_input.transcript = filtered_text
-        
-    #     # Call parent implementation
-    #     await super().on_user_speech_committed(user_input)
-
-    # def _filter_arabic_only(self, text: str) -> str:
-    #     """Remove English words and keep only Arabic text"""
-    #     import re
-        
-    #     # Split text into words
-    #     words = text.split()
-    #     filtered_words = []
-        
-    #     for word in words:
-    #         # Remove punctuation for analysis
-    #         clean_word = re.sub(r'[^\w\s]', '', word)
-            
-    #         # Skip empty words
-    #         if not clean_word.strip():
-    #             continue
-                
-    #         # Check if word contains Arabic characters
-    #         if self._contains_arabic(clean_word):
-    #             filtered_words.append(word)
-    #         else:
-    #             # Skip English words - don't add them
-    #             continue
-        
-    #     # Return filtered text
-    #     result = ' '.join(filtered_words)
-        
-    #     # If no Arabic words found, return empty string to avoid processing
-    #     return result.strip()
-    
-    # def _contains_arabic(self, text: str) -> bool:
-    #     """Check if text contains Arabic characters"""
-    #     arabic_pattern = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]'
-    #     return bool(re.search(arabic_pattern, text))
-
-    async def _file_received(self, reader, participant_identity):
-        logger = logging.getLogger("multi-agent-ptt")
-        stream_info = reader.info
-        logger.info("📄 [Arabic CTT] received byte stream: %s (%s)", stream_info.name, stream_info.mime_type)
-        file_bytes = bytearray()
-        async for chunk in reader:
-            file_bytes.extend(chunk)
-        await self._file_received_fallback(bytes(file_bytes), stream_info, participant_identity)
-
-    async def _process_file(self, file_bytes, stream_info):
-        logger = logging.getLogger("multi-agent-ptt")
-        mime_type = stream_info.mime_type
-        file_name = stream_info.name
-
-        try:
-            if mime_type == "text/plain":
-                try:
-                    content = file_bytes.decode("utf-8")
-                    return content
-                except UnicodeDecodeError:
-                    for enc in ["latin-1", "cp1252", "iso-8859-1"]:
-                        try:
-                            content = file_bytes.decode(enc)
-                            return content
-                        except UnicodeDecodeError:
-                            continue
-                    return None
-            elif mime_type == "application/pdf":
-                try:
-                    import io
-                    import PyPDF2
-                    pdf_stream = io.BytesIO(file_bytes)
-                    pdf_reader = PyPDF2.PdfReader(pdf_stream)
-                    extracted_text = ""
-                    for page_num, page in enumerate(pdf_reader.pages):
-                        page_text = page.extract_text()
-                        extracted_text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                    if extracted_text.strip():
-                        full_content = f"مستند PDF: {file_name}\nالمحتوى:\n{extracted_text}"
-                        return full_content
-                    return (
-                        f"PDF document '{file_name}' received but appears to contain no extractable text (may be image-based or encrypted)."
-                    )
-                except Exception as e:
-                    return f"PDF document '{file_name}' received but encountered error during processing: {str(e)}"
-            elif mime_type.startswith("image/"):
-                image_b64 = base64.b64encode(file_bytes).decode("utf-8")
-                return (
-                    f"صورة '{file_name}' تم استلامها ({mime_type}, {len(file_bytes)} بايت). "
-                    f"بيانات Base64 جاهزة للتحليل البصري: {image_b64[:100]}...[مقتطف]"
-                )
-            elif mime_type in [
-                "application/msword",
-                "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            ]:
-                try:
-                    import io
-                    from docx import Document
-                    doc_stream = io.BytesIO(file_bytes)
-                    doc = Document(doc_stream)
-                    extracted_text = ""
-                    for paragraph in doc.paragraphs:
-                        if paragraph.text.strip():
-                            extracted_text += paragraph.text + "\n"
-                    for table in doc.tables:
-                        for row in table.rows:
-                            for cell in row.cells:
-                                if cell.text.strip():
-                                    extracted_text += cell.text + " "
-                            extracted_text += "\n"
-                    if extracted_text.strip():
-                        full_content = f"مستند Word: {file_name}\nالمحتوى:\n{extracted_text}"
-                        return full_content
-                    return f"Word document '{file_name}' received but appears to contain no text content."
-                except Exception as e:
-                    return f"Word document '{file_name}' received but encountered error during processing: {str(e)}"
-            elif mime_type == "application/json":
-                try:
-                    content = json.loads(file_bytes.decode("utf-8"))
-                    json_content = f"ملف JSON '{file_name}'\nالمحتوى:\n{json.dumps(content, indent=2, ensure_ascii=False)}"
-                    return json_content
-                except Exception:
-                    return None
-            else:
-                return (
-                    f"استلمت ملف '{file_name}' بنوع غير مدعوم '{mime_type}'. الأنواع المدعومة: نصوص، PDF، صور، وملفات Word."
-                )
-        except Exception as e:
-            logger.error("❌ [Arabic CTT] processing error: %s", e, exc_info=True)
-            return None
-
-    async def _file_received_fallback(self, file_bytes, stream_info, participant_identity):
-        logger = logging.getLogger("multi-agent-ptt")
-        logger.info("📄 [Arabic CTT] fallback upload: %s (%s)", stream_info.name, stream_info.mime_type)
-        try:
-            file_content = await self._process_file(file_bytes, stream_info)
-            if file_content:
-                chat_ctx = self.chat_ctx.copy()
-                analysis_prompt = (
-                    f"استلمت ملف '{stream_info.name}' ({stream_info.mime_type}) من {participant_identity}. "
-                    f"هذا ملخص المحتوى:\n\n{file_content}\n\n"
-                    f"حلّل المستند وقدّم نقاط قانونية مختصرة ومباشرة."
-                )
-                chat_ctx.add_message(role="user", content=analysis_prompt)
-                await self.update_chat_ctx(chat_ctx)
-                await self.session.generate_reply(
-                    instructions=(
-                        f"تم استلام الملف '{stream_info.name}' ومعالجته. "
-                        f"اعطِ ملخصًا واضحًا ثم نقاط قانونية عملية قابلة للتنفيذ."
-                    ),
-                    allow_interruptions=True,
-                )
-            else:
-                await self.session.generate_reply(
-                    instructions=(
-                        f"استلمت الملف '{stream_info.name}' لكن نوعه ({stream_info.mime_type}) غير مدعوم. "
-                        f"أقدر أعالج PDF والنصوص والصور. جرّب ترفع ملف مدعوم."
-                    ),
-                    allow_interruptions=True,
-                )
-        except Exception as e:
-            logger.error("❌ [Arabic CTT] error in fallback handling: %s", e, exc_info=True)
-
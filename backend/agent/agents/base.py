@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import time
+
+from livekit.agents import Agent, RunContext, function_tool
+
+from ..documents import DocumentLibrary, SessionIndex, extract_document, finish_ocr
+from ..documents.ocr import OCR_EARLY_PAGES, document_id
+from ..registry import AgentProfile, get_profile
+from ..routing import HEDGING_ENABLED, get_router
+from ..session_store import DocumentRef
+from ..speech_text import SPEECH_SHAPING_ENABLED, SpeechTextShaper
+from .plugins import build_route, build_stt
+from .transcripts import TranscriptNormalizingMixin
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Prompts used when an uploaded file is handed to the LLM, per agent language
+FILE_PROMPTS = {
+    "en": {
+        "analysis": (
+            "I've received a file '{name}' ({mime_type}) from {identity}. Here's the content:\n\n{content}\n\n"
+            "Please analyze this document and provide legal insights or answer any questions about it."
+        ),
+        "analyzed": (
+            "You have received and analyzed the file '{name}' via upload. "
+            "Provide a helpful summary and legal analysis of the document content. "
+            "Be thorough and professional in your response."
+        ),
+        "unsupported": (
+            "I received the file '{name}', but I wasn't able to process "
+            "this file type ({mime_type}). I can help analyze PDF documents, "
+            "text files, and images. Please try uploading a supported file format."
+        ),
+        "error": (
+            "I encountered an error while processing your uploaded file. Please try uploading "
+            "the file again or contact support if the issue persists."
+        ),
+        "already_analyzed": (
+            "The file '{name}' is identical to a document already analyzed earlier in this session "
+            "(see the earlier document list). Do not analyze it again; briefly remind the client what it "
+            "covers and ask what they would like to know about it."
+        ),
+        "retrieval": "Passages from the client's uploaded documents that may be relevant to their next message:\n{passages}",
+    },
+    "ar": {
+        "analysis": (
+            "استلمت ملف '{name}' ({mime_type}) من {identity}. "
+            "هذا ملخص المحتوى:\n\n{content}\n\n"
+            "حلّل المستند وقدّم نقاط قانونية مختصرة ومباشرة."
+        ),
+        "analyzed": (
+            "تم استلام الملف '{name}' ومعالجته. "
+            "اعطِ ملخصًا واضحًا ثم نقاط قانونية عملية قابلة للتنفيذ."
+        ),
+        "unsupported": (
+            "استلمت الملف '{name}' لكن نوعه ({mime_type}) غير مدعوم. "
+            "أقدر أعالج PDF والنصوص والصور. جرّب ترفع ملف مدعوم."
+        ),
+        "error": (
+            "صار خطأ أثناء معالجة الملف. جرّب ترفعه مرة ثانية أو تواصل مع الدعم إذا استمرت المشكلة."
+        ),
+        "already_analyzed": (
+            "الملف '{name}' مطابق لمستند تم تحليله سابقًا في هذه الجلسة. لا تعِد تحليله؛ "
+            "ذكّر العميل باختصار بمحتواه واسأله وش يحب يعرف عنه."
+        ),
+        "retrieval": "مقاطع من مستندات العميل المرفوعة قد تكون لها علاقة برسالته التالية:\n{passages}",
+    },
+}
+
+
+async def _labelled(label: str, stream):
+    """(label, chunk) for each chunk of a synthesis, so the caller knows which voice won a hedge"""
+    try:
+        async for chunk in stream:
+            yield label, chunk
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class ProfileAgent(TranscriptNormalizingMixin, Agent):
+    """Agent built from an AgentProfile; shared by every agent type"""
+
+    def __init__(self, profile: AgentProfile) -> None:
+        self.profile = profile
+        self.transcript_language = profile.language
+        # Uploaded PDFs stay open so later page ranges can be read on demand; the
+        # room runtime swaps in its own library and index so they survive switches
+        self.documents = DocumentLibrary()
+        self.search_index = SessionIndex()
+        self.session_store = None
+        # Set by the room runtime for continuous profiles; None streams all audio to STT
+        self.stt_gate = None
+        # Primary plus fallback models and voices; llm_node/tts_node route over them
+        self.llm_route = build_route("llm", profile.llm, profile.llm_fallbacks)
+        self.tts_route = build_route("tts", profile.tts, profile.tts_fallbacks)
+        super().__init__(
+            instructions=profile.instructions,
+            stt=build_stt(profile.stt, profile.stt_fallbacks),
+            llm=next(iter(self.llm_route.values())),
+            tts=next(iter(self.tts_route.values())),
+        )
+
+    def __repr__(self) -> str:
+        return f"ProfileAgent({self.profile.name})"
+
+    async def on_enter(self):
+        await self.session.generate_reply(
+            instructions=self.profile.greeting,
+            allow_interruptions=True,
+        )
+
+    async def stt_node(self, audio, model_settings):
+        if self.stt_gate is not None:
+            audio = self.stt_gate.gate(audio)
+        async for event in super().stt_node(audio, model_settings):
+            yield event
+
+    async def llm_node(self, chat_ctx, tools, model_settings):
+        # The first model to start answering wins; a slow or failing one is hedged or skipped
+        options = {"chat_ctx": chat_ctx, "tools": tools}
+        tool_choice = getattr(model_settings, "tool_choice", None)
+        if tool_choice is not None:
+            options["tool_choice"] = tool_choice
+        candidates = {
+            label: (lambda plugin=plugin: plugin.chat(**options)) for label, plugin in self.llm_route.items()
+        }
+        async for chunk in get_router("llm").stream(candidates):
+            yield chunk
+
+    async def tts_node(self, text, model_settings):
+        # Markdown, citations and symbols never reach the voice; each sentence goes to TTS once complete
+        if not SPEECH_SHAPING_ENABLED:
+            async for frame in super().tts_node(text, model_settings):
+                yield frame
+            return
+        sentences = SpeechTextShaper(self.profile.language).shape(text)
+        if len(self.tts_route) == 1 and not HEDGING_ENABLED:
+            async for frame in super().tts_node(sentences, model_settings):
+                yield frame
+            return
+        # Each sentence is routed on its own, so a stalled synthesis is hedged without redoing the reply.
+        # The voice that answers the first sentence is pinned for the rest, so one reply has one voice.
+        router = get_router("tts")
+        pinned = None
+        async for sentence in sentences:
+            routes = [{pinned: self.tts_route[pinned]}, self.tts_route] if pinned else [self.tts_route]
+            for route in routes:
+                started = False
+                candidates = {
+                    label: (lambda label=label, plugin=plugin: _labelled(label, plugin.synthesize(sentence)))
+                    for label, plugin in route.items()
+                }
+                try:
+                    async for label, audio in router.stream(candidates):
+                        pinned, started = label, True
+                        yield audio.frame
+                    break
+                except Exception as e:
+                    if started or route is self.tts_route:
+                        raise
+                    # Changing voice mid-reply beats dropping the rest of it
+                    logger.warning(f"⚠️ TTS voice {pinned} failed mid-reply ({e}), switching voice")
+                    pinned = None
+
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        # Retrieval: add only the uploaded passages that match what the user just said
+        query = getattr(new_message, "text_content", None) or ""
+        if not query or not len(self.search_index):
+            return
+        started = time.perf_counter()
+        passages = self.search_index.search(query)
+        if not passages:
+            return
+        prompts = FILE_PROMPTS.get(self.profile.language, FILE_PROMPTS["en"])
+        turn_ctx.add_message(
+            role="assistant",
+            content=prompts["retrieval"].format(
+                passages="\n\n".join(f"[{p.document}, p. {p.page}] {p.text}" for p in passages)
+            ),
+        )
+        logger.info(
+            "📚 [%s] retrieved %d passages in %.1fms",
+            self.profile.log_tag, len(passages), (time.perf_counter() - started) * 1000,
+        )
+
+    async def _index_pages(self, name, pages, participant_identity=None, replace=False):
+        """Add extracted pages to the session index and persist it for the uploader"""
+        def index():
+            if replace:
+                self.search_index.remove_document(name)
+            added = self.search_index.add_pages(name, pages, owner=participant_identity)
+            if participant_identity:
+                self.search_index.save_user(participant_identity)
+            return added
+        added = await asyncio.to_thread(index)
+        if added:
+            logger.info("📚 Indexed %d passages of %s", added, name)
+
+    async def _file_received(self, reader, participant_identity):
+        stream_info = reader.info
+        logger.info(
+            "📄 [%s] received byte stream: %s (%s)",
+            self.profile.log_tag, stream_info.name, stream_info.mime_type,
+        )
+        file_bytes = bytearray()
+        async for chunk in reader:
+            file_bytes.extend(chunk)
+        logger.info("📄 Complete file received: %d bytes", len(file_bytes))
+        await self._file_received_fallback(bytes(file_bytes), stream_info, participant_identity)
+
+    async def _process_file(self, file_bytes, stream_info):
+        # Parsing is blocking; keep it off the event loop shared with the audio pipeline
+        return await asyncio.to_thread(
+            extract_document, file_bytes, stream_info.name, stream_info.mime_type, self.profile.language
+        )
+
+    async def _attach_remaining_ocr(self, pending, stream_info):
+        """Add the scanned pages that were still being OCR'd when the agent replied"""
+        try:
+            more = await asyncio.to_thread(finish_ocr, pending, stream_info.name, self.profile.language)
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        await self._index_pages(
+            stream_info.name, [(index + 1, text) for index, text in pending.results(start=OCR_EARLY_PAGES)]
+        )
+        if more:
+            chat_ctx = self.chat_ctx.copy()
+            chat_ctx.add_message(role="user", content=more)
+            await self.update_chat_ctx(chat_ctx)
+            logger.info("📄 Remaining OCR pages of %s added to chat context", stream_info.name)
+
+    @function_tool()
+    async def read_document_pages(self, context: RunContext, document: str, first_page: int, last_page: int) -> str:
+        """Read pages of an uploaded PDF that were not included when it was received.
+
+        Args:
+            document: File name of the uploaded PDF
+            first_page: First page to read, starting at 1
+            last_page: Last page to read; at most 20 pages are returned per call
+        """
+        pdf = self.documents.get(document)
+        if pdf is None:
+            return f"No uploaded PDF named '{document}'. Available: {', '.join(self.documents.names()) or 'none'}"
+        logger.info("📄 [%s] reading pages %d-%d of %s", self.profile.log_tag, first_page, last_page, pdf.name)
+        text = await asyncio.to_thread(pdf.read, first_page, last_page)
+        await self._index_pages(pdf.name, pdf.extracted_pages())
+        return text
+
+    async def _file_received_fallback(self, file_bytes, stream_info, participant_identity):
+        prompts = FILE_PROMPTS.get(self.profile.language, FILE_PROMPTS["en"])
+        logger.info(
+            "📄 [%s] processing upload from %s: %s (%s)",
+            self.profile.log_tag, participant_identity, stream_info.name, stream_info.mime_type,
+        )
+        try:
+            # An identical re-upload (e.g. after a switch or reconnect) is not parsed or analyzed again
+            doc_id = await asyncio.to_thread(document_id, file_bytes)
+            known = self.session_store.find_document(doc_id) if self.session_store else None
+            if known is not None and known.name in self.search_index.documents():
+                logger.info("📄 [%s] %s already analyzed this session, skipping re-parse", self.profile.log_tag, known.name)
+                await self.session.generate_reply(
+                    instructions=prompts["already_analyzed"].format(name=stream_info.name),
+                    allow_interruptions=True,
+                )
+                return
+
+            document = await self._process_file(file_bytes, stream_info)
+            file_content = document.text
+            if file_content and self.session_store is not None:
+                self.session_store.add_document(DocumentRef(
+                    name=stream_info.name,
+                    doc_id=doc_id,
+                    mime_type=stream_info.mime_type,
+                    size=len(file_bytes),
+                    pages=document.document.page_count if document.document is not None else 0,
+                    excerpt=file_content,
+                    owner=participant_identity or "",
+                ))
+                await asyncio.to_thread(self.session_store.save)
+            if document.document is not None:
+                self.documents.add(document.document)
+                await self._index_pages(
+                    stream_info.name, document.document.extracted_pages(), participant_identity, replace=True
+                )
+            elif file_content:
+                await self._index_pages(stream_info.name, [(1, file_content)], participant_identity, replace=True)
+
+            if file_content:
+                chat_ctx = self.chat_ctx.copy()
+                chat_ctx.add_message(
+                    role="user",
+                    content=prompts["analysis"].format(
+                        name=stream_info.name,
+                        mime_type=stream_info.mime_type,
+                        identity=participant_identity,
+                        content=file_content,
+                    ),
+                )
+                await self.update_chat_ctx(chat_ctx)
+                logger.info("📄 File processed and added to chat context")
+
+                await self.session.generate_reply(
+                    instructions=prompts["analyzed"].format(name=stream_info.name),
+                    allow_interruptions=True,
+                )
+                if document.pending is not None:
+                    await self._attach_remaining_ocr(document.pending, stream_info)
+            else:
+                await self.session.generate_reply(
+                    instructions=prompts["unsupported"].format(
+                        name=stream_info.name, mime_type=stream_info.mime_type
+                    ),
+                    allow_interruptions=True,
+                )
+        except Exception as e:
+            logger.error("❌ [%s] error processing file upload: %s", self.profile.log_tag, e, exc_info=True)
+            await self.session.generate_reply(
+                instructions=prompts["error"],
+                allow_interruptions=True,
+            )
+
+
+def build_agent(agent_type: str) -> ProfileAgent:
+    """Create a fresh agent instance for a registered agent type"""
+    return ProfileAgent(get_profile(agent_type))
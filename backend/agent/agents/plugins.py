@@ -0,0 +1,59 @@
+from livekit.agents import stt
+from livekit.plugins import azure, deepgram, groq
+
+from ..registry import PluginSpec
+
+
+# Constructors per plugin kind and provider name used in PluginSpec
+PLUGIN_FACTORIES = {
+    "stt": {
+        "deepgram": deepgram.STT,
+        "azure": azure.STT,
+    },
+    "llm": {
+        "groq": groq.LLM,
+    },
+    "tts": {
+        "azure": azure.TTS,
+    },
+}
+
+
+def register_plugin_factory(kind: str, provider: str, factory) -> None:
+    PLUGIN_FACTORIES.setdefault(kind, {})[provider] = factory
+
+
+def build_plugin(kind: str, spec: PluginSpec):
+    """Instantiate the STT/LLM/TTS plugin described by a spec"""
+    try:
+        factory = PLUGIN_FACTORIES[kind][spec.provider]
+    except KeyError:
+        raise ValueError(f"No {kind} plugin registered for provider '{spec.provider}'") from None
+    return factory(**spec.options)
+
+
+def plugin_label(spec: PluginSpec) -> str:
+    """Provider name plus model or voice, the key routing stats are kept under"""
+    options = spec.options
+    detail = options.get("model") or options.get("voice") or options.get("language") or ""
+    return f"{spec.provider}:{detail}" if detail else spec.provider
+
+
+def build_route(kind: str, primary: PluginSpec, fallbacks=()) -> dict:
+    """{label: plugin} for a primary spec and its fallbacks, in order of preference"""
+    route = {}
+    for spec in (primary, *fallbacks):
+        route.setdefault(plugin_label(spec), build_plugin(kind, spec))
+    return route
+
+
+def build_stt(primary: PluginSpec, fallbacks=()):
+    """STT plugin that fails over to the fallbacks when the primary errors.
+
+    Streaming STT is not hedged: a duplicate stream would double the cost of
+    every turn, and a stalled stream is caught by the adapter's timeouts.
+    """
+    route = build_route("stt", primary, fallbacks)
+    if len(route) == 1:
+        return next(iter(route.values()))
+    return stt.FallbackAdapter(list(route.values()))
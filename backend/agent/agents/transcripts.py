@@ -0,0 +1,28 @@
+from livekit.agents import Agent, stt
+
+from ..normalization import StreamingNormalizer, get_normalizer, normalize_transcript
+
+
+class TranscriptNormalizingMixin:
+    """Normalizes interim and final user transcripts before they reach the client or LLM"""
+
+    transcript_language = "en"
+
+    async def stt_node(self, audio, model_settings):
+        # Interim hypotheses arrive cumulatively per segment; the streaming
+        # normalizer only re-examines the changed tail of each one.
+        streaming = StreamingNormalizer(get_normalizer(self.transcript_language))
+        async for event in Agent.default.stt_node(self, audio, model_settings):
+            if isinstance(event, stt.SpeechEvent) and event.alternatives:
+                if event.type == stt.SpeechEventType.INTERIM_TRANSCRIPT:
+                    alternative = event.alternatives[0]
+                    alternative.text = streaming.update(alternative.text)
+                elif event.type == stt.SpeechEventType.FINAL_TRANSCRIPT:
+                    for alternative in event.alternatives:
+                        alternative.text = normalize_transcript(alternative.text, self.transcript_language)
+                    streaming.reset()
+            yield event
+
+    async def on_final_transcription(self, text: str) -> str:
+        # Normalize brand name variants in the agent's transcript language
+        return normalize_transcript(text, self.transcript_language)
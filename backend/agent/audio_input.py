@@ -0,0 +1,286 @@
+import functools
+import logging
+import math
+import os
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # numpy comes with livekit; the offline benchmarks run without it
+    np = None
+
+try:
+    from livekit.agents import io as _agent_io
+    _AudioInputBase = _agent_io.AudioInput
+except ImportError:
+    _AudioInputBase = object
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Noise suppression needs LiveKit Cloud; set to 0 on self-hosted servers
+NOISE_CANCELLATION_ENABLED = os.getenv("NOISE_CANCELLATION", "1") != "0"
+# Frames quieter than max(ENERGY_GATE_DBFS, noise floor + ENERGY_GATE_MARGIN_DB) reach the VAD as silence
+ENERGY_GATE_DBFS = float(os.getenv("ENERGY_GATE_DBFS", "-50"))
+ENERGY_GATE_MARGIN_DB = float(os.getenv("ENERGY_GATE_MARGIN_DB", "12"))
+ENERGY_GATE_ATTACK_MS = 80  # loudness needed this long to open; rejects clicks, taps and knocks
+ENERGY_GATE_HANGOVER_MS = 300  # stay open this long after the last loud frame, across word gaps
+# Frames this far below the near talker's level are background speech (TV, people across the room)
+ENERGY_GATE_TALKER_RANGE_DB = float(os.getenv("ENERGY_GATE_TALKER_RANGE_DB", "15"))
+NOISE_FLOOR_RISE_DB_PER_S = 2.0
+TALKER_LEVEL_DECAY_DB_PER_S = 0.5  # so a quieter speaker is not locked out after a loud one
+SILENCE_DBFS = -96.0
+
+# Streaming STT only receives audio around VAD speech; set STT_GATING=0 to stream everything
+STT_GATING_ENABLED = os.getenv("STT_GATING", "1") != "0"
+STT_PRE_ROLL_MS = int(os.getenv("STT_PRE_ROLL_MS", "500"))  # replayed on open so onsets reach STT
+STT_TAIL_MS = int(os.getenv("STT_TAIL_MS", "1000"))  # kept streaming after speech so STT can finalize
+
+
+def frame_dbfs(data) -> float:
+    """RMS level of 16-bit PCM samples in dB relative to full scale"""
+    if np is not None:
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        mean_square = float(np.dot(samples, samples)) / max(len(samples), 1)
+    else:
+        samples = array("h", bytes(data))
+        mean_square = math.fsum(s * s for s in samples) / max(len(samples), 1)
+    if mean_square <= 0:
+        return SILENCE_DBFS
+    return max(10 * math.log10(mean_square / (32768.0 * 32768.0)), SILENCE_DBFS)
+
+
+class EnergyGate:
+    """Pre-VAD energy gate with an adaptive noise floor.
+
+    The floor follows the quietest recent frames: it drops quickly and rises
+    by at most NOISE_FLOOR_RISE_DB_PER_S, so steady fan or street noise is
+    learned while speech is not. The near talker's level is learned from the
+    frames that open the gate; voiced background more than talker_range_db
+    below it, such as a TV or people across the room, stays gated even though
+    a VAD would take it for speech. The gate opens once frames stay above the
+    threshold for the attack time and closes after the hangover. Gated frames
+    are passed on as silence rather than dropped so VAD timing is unchanged.
+    """
+
+    def __init__(
+        self,
+        threshold_dbfs: float = ENERGY_GATE_DBFS,
+        margin_db: float = ENERGY_GATE_MARGIN_DB,
+        attack_ms: float = ENERGY_GATE_ATTACK_MS,
+        hangover_ms: float = ENERGY_GATE_HANGOVER_MS,
+        talker_range_db: float = ENERGY_GATE_TALKER_RANGE_DB,
+    ) -> None:
+        self.threshold_dbfs = threshold_dbfs
+        self.margin_db = margin_db
+        self.attack = attack_ms / 1000.0
+        self.hangover = hangover_ms / 1000.0
+        self.talker_range_db = talker_range_db
+        self.talker_level = None
+        self.noise_floor = -70.0
+        self.is_open = False
+        self._loud_for = 0.0
+        self._quiet_for = 0.0
+        self.frames = 0
+        self.frames_gated = 0
+        self.seconds = 0.0
+        self.seconds_gated = 0.0
+        self.openings = 0
+
+    @property
+    def threshold(self) -> float:
+        threshold = max(self.threshold_dbfs, self.noise_floor + self.margin_db)
+        if self.talker_level is not None:
+            threshold = max(threshold, self.talker_level - self.talker_range_db)
+        return threshold
+
+    def process(self, level_dbfs: float, duration: float) -> bool:
+        """Feed one frame's level; True if the frame should reach the VAD"""
+        loud = level_dbfs >= self.threshold
+        if level_dbfs < self.noise_floor:
+            self.noise_floor += 0.3 * (level_dbfs - self.noise_floor)
+        else:
+            self.noise_floor += min(NOISE_FLOOR_RISE_DB_PER_S * duration, level_dbfs - self.noise_floor)
+
+        if loud:
+            self._loud_for += duration
+            self._quiet_for = 0.0
+            if not self.is_open and self._loud_for >= self.attack:
+                self.is_open = True
+                self.openings += 1
+        else:
+            self._loud_for = 0.0
+            self._quiet_for += duration
+            if self.is_open and self._quiet_for >= self.hangover:
+                self.is_open = False
+
+        if self.is_open and loud:
+            # Rises quickly to the talker's loud syllables, falls slowly across quieter ones
+            if self.talker_level is None:
+                self.talker_level = level_dbfs
+            else:
+                self.talker_level += (0.3 if level_dbfs > self.talker_level else 0.01) * (level_dbfs - self.talker_level)
+        elif self.talker_level is not None and not self.is_open:
+            # Never below the point where the floor rule alone decides
+            self.talker_level = max(
+                self.talker_level - TALKER_LEVEL_DECAY_DB_PER_S * duration,
+                self.noise_floor + self.margin_db + self.talker_range_db,
+            )
+
+        self.frames += 1
+        self.seconds += duration
+        if not self.is_open:
+            self.frames_gated += 1
+            self.seconds_gated += duration
+        return self.is_open
+
+    def process_frame(self, frame) -> bool:
+        """Same as process() for an rtc.AudioFrame"""
+        duration = frame.samples_per_channel / float(frame.sample_rate or 1)
+        return self.process(frame_dbfs(frame.data), duration)
+
+    def metrics(self) -> dict:
+        return {
+            "frames": self.frames,
+            "frames_gated": self.frames_gated,
+            "gated_ratio": round(self.frames_gated / self.frames, 3) if self.frames else 0.0,
+            "seconds_gated": round(self.seconds_gated, 1),
+            "openings": self.openings,
+            "noise_floor_dbfs": round(self.noise_floor, 1),
+            "talker_level_dbfs": round(self.talker_level, 1) if self.talker_level is not None else None,
+        }
+
+
+class GatedAudioInput(_AudioInputBase):
+    """Session audio input that passes the room's audio through an EnergyGate"""
+
+    def __init__(self, source, gate: EnergyGate) -> None:
+        if _AudioInputBase is not object:
+            super().__init__(label="EnergyGate", source=source)
+        self.upstream = source
+        self.gate = gate
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self.upstream.__anext__()
+        if self.gate.process_frame(frame):
+            return frame
+        return type(frame)(
+            bytes(len(frame.data) * 2), frame.sample_rate, frame.num_channels, frame.samples_per_channel
+        )
+
+
+class SpeechGate:
+    """Feeds streaming STT only while the VAD reports speech.
+
+    Audio outside speech goes into a ring buffer of STT_PRE_ROLL_MS, which is
+    sent ahead of the first speech frame so the onset the VAD needed to
+    detect speech is not lost. Audio keeps flowing for STT_TAIL_MS after
+    speech ends so the provider's own endpointing can finalize the
+    transcript. The STT connection stays open between turns.
+    """
+
+    def __init__(self, pre_roll_ms: float = STT_PRE_ROLL_MS, tail_ms: float = STT_TAIL_MS) -> None:
+        self.pre_roll = pre_roll_ms / 1000.0
+        self.tail = tail_ms / 1000.0
+        self.speaking = False
+        self._buffer = deque()
+        self._buffered = 0.0
+        self._tail_left = 0.0
+        self.seconds = 0.0
+        self.seconds_sent = 0.0
+        self.openings = 0
+
+    def attach(self, session) -> None:
+        """Follow a session's VAD through its user_state_changed events"""
+        self.reset()
+
+        def on_user_state(event):
+            self.set_speaking(getattr(event, "new_state", "") == "speaking")
+
+        session.on("user_state_changed", on_user_state)
+
+    def reset(self) -> None:
+        self.speaking = False
+        self._buffer.clear()
+        self._buffered = 0.0
+        self._tail_left = 0.0
+
+    def set_speaking(self, speaking: bool) -> None:
+        if speaking and not self.speaking:
+            self.openings += 1
+        self.speaking = speaking
+        if not speaking:
+            self._tail_left = self.tail
+
+    def push(self, frame, duration: float):
+        """Frames to forward to STT now, in order"""
+        self.seconds += duration
+        if self.speaking or self._tail_left > 0:
+            if not self.speaking:
+                self._tail_left -= duration
+            frames = [buffered for buffered, _ in self._buffer] + [frame]
+            self.seconds_sent += self._buffered + duration
+            self._buffer.clear()
+            self._buffered = 0.0
+            return frames
+        self._buffer.append((frame, duration))
+        self._buffered += duration
+        while self._buffer and self._buffered - self._buffer[0][1] >= self.pre_roll:
+            self._buffered -= self._buffer.popleft()[1]
+        return []
+
+    async def gate(self, audio):
+        """Wrap an stt_node audio stream"""
+        async for frame in audio:
+            for forwarded in self.push(frame, frame.samples_per_channel / float(frame.sample_rate or 1)):
+                yield forwarded
+
+    def metrics(self) -> dict:
+        return {
+            "audio_seconds": round(self.seconds, 1),
+            "stt_seconds": round(self.seconds_sent, 1),
+            "stt_seconds_saved": round(self.seconds - self.seconds_sent, 1),
+            "openings": self.openings,
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def _noise_cancellation_plugin():
+    try:
+        from livekit.plugins import noise_cancellation
+        return noise_cancellation
+    except ImportError:
+        logger.warning("⚠️ livekit-plugins-noise-cancellation not installed, noise suppression disabled")
+        return None
+
+
+def build_noise_cancellation(name: str):
+    """LiveKit noise-cancellation filter for a profile's `noise_cancellation` option"""
+    if not name or not NOISE_CANCELLATION_ENABLED:
+        return None
+    noise_cancellation = _noise_cancellation_plugin()
+    if noise_cancellation is None:
+        return None
+    factories = {
+        "nc": noise_cancellation.NC,
+        "bvc": noise_cancellation.BVC,
+        "bvc_telephony": getattr(noise_cancellation, "BVCTelephony", noise_cancellation.BVC),
+    }
+    if name not in factories:
+        logger.warning(f"⚠️ Unknown noise cancellation '{name}', expected one of {', '.join(factories)}")
+        return None
+    return factories[name]()
+
+
+def gate_session_input(session, gate: EnergyGate) -> bool:
+    """Put the energy gate between RoomIO's audio input and the session's VAD/STT"""
+    session_input = getattr(session, "input", None)
+    source = getattr(session_input, "audio", None)
+    if source is None or isinstance(source, GatedAudioInput):
+        return False
+    session_input.audio = GatedAudioInput(source, gate)
+    return True
@@ -0,0 +1,131 @@
+"""Fuzzed turn and switch command spam against one replay room, with and without the command sequencer.
+
+Each of --bursts rounds sends a seeded random burst, as a flaky client
+does. A round is 1–5 rapid switch_to_* commands, each 0–250ms apart,
+mixed with click-to-talk start/end/cancel presses. Every command goes
+out 1–3 times over RPC, as a data packet or both, with or without an
+id, and 0–60ms apart. After --settle seconds the room must be on the
+last agent the client asked for. Each intended press must have run at
+most once. "sequenced" uses RoomRuntime's CommandSequencer. "direct"
+applies every copy as it arrives, as the runtime did before, where a
+switch during a switch is ignored. The report gives rooms left on the
+wrong agent, switches and turn presses that actually ran, and the
+sequencer's dropped/coalesced counts. Times are in stub seconds. Run
+from the backend directory:
+    python3 -m agent.benchmarks.bench_commands --bursts 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+from collections import Counter
+
+from ..commands import SWITCH_PREFIX
+from ..registry import AGENT_PROFILES
+from ..replay.harness import RoomRecorder, build_runtime
+from ..replay.room import FakeRoom
+from ..replay.stubs import StubPlugins
+
+
+def fuzz_burst(rng: random.Random, burst: int):
+    """[(delay, command, transport, id)] to send for one round, the agent type it should end on and the presses intended"""
+    names = []
+    targets = [rng.choice(sorted(AGENT_PROFILES)) for _ in range(rng.randint(1, 5))]
+    for target in targets:
+        names.append((rng.uniform(0.0, 0.25), f"{SWITCH_PREFIX}{target}"))
+        if rng.random() < 0.5:
+            names.append((rng.uniform(0.0, 0.2), "start_turn"))
+            names.append((rng.uniform(0.0, 0.4), rng.choice(("end_turn", "end_turn", "cancel_turn"))))
+    sends = []
+    for number, (delay, name) in enumerate(names):
+        command_id = f"{burst}-{number}" if rng.random() < 0.5 else ""
+        copies = [rng.choice(("rpc", "data")) for _ in range(rng.randint(1, 3))]
+        for copy, transport in enumerate(copies):
+            sends.append((delay if copy == 0 else rng.uniform(0.0, 0.06), name, transport, command_id))
+    return sends, targets[-1], Counter(name for _, name in names)
+
+
+async def send(room, name: str, transport: str, command_id: str) -> None:
+    # Switches only exist as data packets
+    if transport == "rpc" and not name.startswith(SWITCH_PREFIX):
+        await room.local_participant.perform_rpc_from("user", name, json.dumps({"id": command_id}) if command_id else "")
+    else:
+        room.send_data(f"{name}#{command_id}" if command_id else name)
+
+
+def count_calls(runtime, ran: Counter) -> None:
+    """Count the switches and turn presses that reach the runtime"""
+    for method in ("switch_agent", "start_turn", "end_turn", "cancel_turn"):
+        original = getattr(runtime, method)
+
+        def counted(*args, _original=original, _method=method):
+            ran[_method] += 1
+            return _original(*args)
+        setattr(runtime, method, counted)
+
+
+async def run(mode: str, args) -> dict:
+    plugins = StubPlugins(speed=args.speed, seed=args.seed)
+    room = FakeRoom(f"commands-{mode}")
+    runtime = build_runtime(room, plugins, RoomRecorder())
+    ran = Counter()
+    count_calls(runtime, ran)
+    if mode == "direct":
+        # Every copy runs at once on the data tasks, like the old RPC and data-packet handlers
+        runtime.commands.submit = lambda command: runtime.tasks.spawn("data", runtime._apply_command(command))
+    await runtime.run()
+
+    rng = random.Random(args.seed)
+    clock = plugins.clock
+    intended = Counter()
+    wrong = 0
+    for burst in range(args.bursts):
+        sends, target, presses = fuzz_burst(rng, burst)
+        intended.update(presses)
+        for delay, name, transport, command_id in sends:
+            await clock.sleep(delay)
+            await send(room, name, transport, command_id)
+        await clock.sleep(args.settle)
+        while runtime.is_switching or runtime.commands.pending:
+            await clock.sleep(0.05)
+        wrong += runtime.current_agent_type != target
+
+    metrics = runtime.commands.metrics()
+    await runtime.aclose()
+    intended_switches = sum(count for name, count in intended.items() if name.startswith(SWITCH_PREFIX))
+    report = {
+        "wrong_agent": f"{wrong}/{args.bursts}",
+        "switches_ran": f"{ran['switch_agent']} of {intended_switches} asked",
+        "turn_presses_ran": {
+            name: f"{ran[name]} of {intended[name]} pressed" for name in ("start_turn", "end_turn", "cancel_turn")
+        },
+    }
+    if mode == "sequenced":
+        report.update(dropped=metrics["dropped"], coalesced=metrics["coalesced"], wait_p95_ms=round(metrics["wait_p95_ms"] * args.speed))
+    return report, wrong, all(ran[name] <= intended[name] for name in ("start_turn", "end_turn", "cancel_turn"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bursts", type=int, default=200)
+    parser.add_argument("--settle", type=float, default=2.0, help="stub seconds after a burst before the agent is checked")
+    parser.add_argument("--speed", type=float, default=20.0, help="divide stub delays by this")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results = {}
+    for mode in ("sequenced", "direct"):
+        report, wrong, once = asyncio.run(run(mode, args))
+        results[mode] = (wrong, once)
+        print(f"{mode:>9}: {report}")
+
+    wrong, once = results["sequenced"]
+    if wrong or not once:
+        raise SystemExit(f"❌ sequenced room ended on the wrong agent {wrong} times or ran a press twice")
+    print(f"✅ every burst of {args.bursts} ended on the last agent asked for, no press ran twice")
+
+
+if __name__ == "__main__":
+    main()
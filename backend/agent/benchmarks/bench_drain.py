@@ -0,0 +1,164 @@
+"""Drain time and resume latency of rooms moved between two workers on the replay stubs.
+
+Worker A runs --rooms rooms. In each, the caller talks, uploads a lease
+and, in every other room, switches to the Arabic agent. A turn is then
+started in every room, and A drains while the agent is still answering:
+it finishes the turn, snapshots the room into a shared directory, asks
+for the agent to be dispatched to the room again and ends the job.
+FakeDispatcher stands in for LiveKit's agent dispatch: A is draining
+and rejects the job, so each dispatch goes to worker B. B starts only
+the rooms dispatched to it. The report gives A's drain time per
+room and in total. It gives the rooms B picked up and B's resume
+latency, from job start to the first audio of the resumed agent. It
+also shows whether B's rooms carried on with the same agent, chat
+context and indexed documents. "cold" runs B without the snapshots, as
+a restart did before. "no-dispatch" drains without asking for a
+dispatch, leaving B nothing to pick up. Times are in stub seconds (wall
+time x --speed). Run from the backend directory:
+    python3 -m agent.benchmarks.bench_drain --rooms 4
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+
+from ..drain import WorkerDrain, chat_items
+from ..replay.harness import LEASE_TEXT, RoomRecorder, build_runtime
+from ..replay.room import FakeRoom
+from ..replay.stubs import StubPlugins
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+def start_room(name: str, plugins: StubPlugins, directory: str, snapshot_dir: str, recorder: RoomRecorder = None):
+    runtime = build_runtime(FakeRoom(name), plugins, recorder or RoomRecorder())
+    runtime.session_store.directory = directory
+    runtime.snapshot_dir = snapshot_dir
+    return runtime
+
+
+async def _until(condition, clock, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout / clock.speed
+    while not condition() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.001)
+
+
+class FakeDispatcher:
+    """LiveKit's agent dispatch: each job goes to the first worker that does not reject it"""
+
+    def __init__(self, workers: dict) -> None:
+        self.workers = workers   # name -> WorkerDrain, in the order LiveKit offers the job
+        self.jobs = {name: [] for name in workers}
+
+    async def create_dispatch(self, room: str) -> bool:
+        for name, drain in self.workers.items():
+            # handle_request rejects jobs while its worker drains
+            if not drain.draining:
+                self.jobs[name].append(room)
+                return True
+        return False
+
+
+async def worker_a(names, plugins: StubPlugins, directory: str, drain: WorkerDrain, args) -> dict:
+    runtimes = []
+    for index, name in enumerate(names):
+        runtime = start_room(name, plugins, directory, directory)
+        await runtime.run()
+        drain.register(runtime, shutdown=runtime.aclose)
+        runtimes.append(runtime)
+
+    clock = plugins.clock
+    for index, runtime in enumerate(runtimes):
+        await runtime.session.user_speech(2.0, "my landlord kept the whole deposit")
+        runtime.room.send_file("lease.txt", "text/plain", LEASE_TEXT.encode("utf-8"))
+        await clock.sleep(1.0)
+        if index % 2:
+            await runtime.switch_agent("arabic")
+    await clock.sleep(args.settle)
+
+    # Every room is mid-turn when the drain starts
+    speaking = [asyncio.ensure_future(runtime.session.user_speech(2.0, "can they do that")) for runtime in runtimes]
+    await _until(lambda: all(r.session.agent_state in ("thinking", "speaking") for r in runtimes), clock)
+    expected = {
+        runtime.room.name: (runtime.current_agent_type, {text for _, text in chat_items(runtime.current_agent.chat_ctx)})
+        for runtime in runtimes
+    }
+    started = time.perf_counter()
+    await asyncio.gather(*(asyncio.wrap_future(future) for future in drain.begin(timeout=args.drain_timeout)))
+    total = time.perf_counter() - started
+    for task in speaking:
+        task.cancel()
+    return {
+        "expected": expected,
+        "drain_p50_s": round(_percentile(drain.drain_seconds, 0.5) * clock.speed, 2),
+        "drain_max_s": round(max(drain.drain_seconds, default=0.0) * clock.speed, 2),
+        "drain_total_s": round(total * clock.speed, 2),
+    }
+
+
+async def worker_b(names, plugins: StubPlugins, directory: str, snapshot_dir: str, expected: dict, dispatched) -> dict:
+    latencies = []
+    kept = {"agent_type": 0, "chat": 0, "documents": 0}
+    # B only joins the rooms LiveKit dispatched to it
+    for name in dispatched:
+        recorder = RoomRecorder()
+        runtime = start_room(name, plugins, directory, snapshot_dir, recorder)
+        # The resumed agent's greeting is timed like a switch: no user turn precedes it
+        recorder.switch_requested()
+        await runtime.run()
+        await _until(lambda: recorder.switch_latencies, plugins.clock)
+        latencies.extend(recorder.switch_latencies)
+        agent_type, chat = expected[name]
+        kept["agent_type"] += runtime.current_agent_type == agent_type
+        # Everything A's agent had in context, including the analyzed lease, without re-uploading it
+        kept["chat"] += chat <= {text for _, text in chat_items(runtime.current_agent.chat_ctx)}
+        kept["documents"] += bool(runtime.search_index.search("notice terminating lease"))
+        await runtime.aclose()
+    latencies = [latency * plugins.clock.speed for latency in latencies]
+    return {
+        "rooms_picked_up": f"{len(dispatched)}/{len(names)}",
+        "resume_p50_ms": round(_percentile(latencies, 0.5) * 1000),
+        "resume_p95_ms": round(_percentile(latencies, 0.95) * 1000),
+        "rooms_kept": {what: f"{count}/{len(names)}" for what, count in kept.items()},
+    }
+
+
+async def run(mode: str, args) -> dict:
+    names = [f"{mode}-{index}" for index in range(args.rooms)]
+    drain_a, drain_b = WorkerDrain(), WorkerDrain()
+    dispatcher = FakeDispatcher({"A": drain_a, "B": drain_b})
+    drain_a.dispatch = dispatcher.create_dispatch if mode != "no-dispatch" else None
+    with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryDirectory() as empty:
+        drained = await worker_a(names, StubPlugins(speed=args.speed, seed=args.seed), directory, drain_a, args)
+        # Both runs share A's session store; only the snapshot run sees A's snapshots
+        resumed = await worker_b(
+            names,
+            StubPlugins(speed=args.speed, seed=args.seed + 1),
+            directory,
+            directory if mode != "cold" else empty,
+            drained.pop("expected"),
+            dispatcher.jobs["B"],
+        )
+    return {**drained, **resumed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--speed", type=float, default=4.0, help="divide stub delays by this")
+    parser.add_argument("--settle", type=float, default=6.0, help="stub seconds before the last turn starts")
+    parser.add_argument("--drain-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    for mode in ("snapshot", "cold", "no-dispatch"):
+        print(f"{mode:>11}: {asyncio.run(run(mode, args))}")
+
+
+if __name__ == "__main__":
+    main()
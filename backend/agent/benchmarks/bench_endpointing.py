@@ -0,0 +1,80 @@
+"""Offline replay of VAD traces: fixed vs adaptive endpointing.
+
+A trace is a JSON list of turns, each a list of [start, end] speech segments
+in seconds. Without --trace, synthetic quick and hesitant speakers are used:
+    python3 -m agent.benchmarks.bench_endpointing
+    python3 -m agent.benchmarks.bench_endpointing --trace recorded_vad.json
+"""
+import argparse
+import json
+import random
+
+from ..endpointing import AdaptiveEndpointing
+
+
+def synthetic_trace(turns: int, pause_range, seed: int):
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(turns):
+        t = 0.0
+        segments = []
+        for _ in range(rng.randint(1, 5)):
+            start = t
+            t += rng.uniform(0.8, 4.0)
+            segments.append([start, t])
+            t += rng.uniform(*pause_range)
+        trace.append(segments)
+    return trace
+
+
+def replay(trace, controller: AdaptiveEndpointing, adaptive: bool):
+    """Simulate endpointing turn by turn; returns (mean response latency, false cutoff rate)"""
+    latencies = []
+    cutoffs = 0
+    for segments in trace:
+        min_delay, _ = controller.delays()
+        gaps = [segments[i + 1][0] - segments[i][1] for i in range(len(segments) - 1)]
+        cut_gap = next((gap for gap in gaps if gap > min_delay), None)
+        if cut_gap is not None:
+            # Agent answered mid-turn; the user resumed after cut_gap seconds
+            cutoffs += 1
+            if adaptive:
+                for gap in gaps[: gaps.index(cut_gap)]:
+                    controller.observe_pause(gap)
+                controller.observe_false_cutoff(cut_gap)
+            continue
+        latencies.append(min_delay)
+        if adaptive:
+            for gap in gaps:
+                controller.observe_pause(gap)
+            controller.observe_turn_end()
+    mean_latency = sum(latencies) / len(latencies) if latencies else 0.0
+    return mean_latency, cutoffs / len(trace)
+
+
+def report(label: str, trace) -> None:
+    fixed = replay(trace, AdaptiveEndpointing(min_samples=10**9), adaptive=False)
+    adaptive = replay(trace, AdaptiveEndpointing(), adaptive=True)
+    print(
+        f"{label:<10} fixed: latency {fixed[0]:.2f}s, false cutoffs {fixed[1]:.1%} | "
+        f"adaptive: latency {adaptive[0]:.2f}s, false cutoffs {adaptive[1]:.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", help="JSON file with recorded VAD segments per turn")
+    parser.add_argument("--turns", type=int, default=400)
+    args = parser.parse_args()
+
+    if args.trace:
+        with open(args.trace, encoding="utf-8") as fh:
+            report("recorded", json.load(fh))
+        return
+    report("quick", synthetic_trace(args.turns, (0.15, 0.7), seed=1))
+    report("average", synthetic_trace(args.turns, (0.3, 1.6), seed=2))
+    report("hesitant", synthetic_trace(args.turns, (0.8, 3.8), seed=3))
+
+
+if __name__ == "__main__":
+    main()
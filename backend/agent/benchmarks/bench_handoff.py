@@ -0,0 +1,78 @@
+"""Hand-off prompt size and build time for English -> Arabic agent switches.
+
+Compares replaying the stored English conversation verbatim with the
+language-neutral hand-off the Arabic agent receives instead. It also
+checks that the hand-off carries facts outside the concept vocabulary, the
+document excerpts and the question the agent left unanswered. Run from
+the backend directory:
+    python3 -m agent.benchmarks.bench_handoff --turns 30
+"""
+import argparse
+import random
+import time
+
+from ..session_store import DocumentRef, SessionStore
+
+
+USER_LINES = [
+    "My landlord kept my $1,500 deposit after I gave 30 days notice.",
+    "The lease says I need to give sixty days notice, is that enforceable?",
+    "He also wants 2 months of rent as damages for the early termination.",
+    "Can I take him to court over the deposit?",
+    "I moved out on 01/03/2024 and returned the keys the same day.",
+]
+AGENT_LINES = [
+    "Under most tenancy laws the landlord must return the deposit or itemize deductions within a set period.",
+    "A notice clause is generally enforceable if it was part of the signed agreement and is reasonable.",
+    "Claims for lost rent usually require the landlord to try to re-let the property.",
+]
+
+
+def build_store(turns: int, documents: int, seed: int = 5) -> SessionStore:
+    rng = random.Random(seed)
+    store = SessionStore("bench", directory="")
+    for _ in range(turns):
+        store.add_message("user", rng.choice(USER_LINES), "attorney", "en")
+        store.add_message("assistant", " ".join(rng.sample(AGENT_LINES, 2)), "attorney", "en")
+    for number in range(documents):
+        store.add_document(DocumentRef(
+            f"exhibit-{number}.pdf", f"doc{number}", "application/pdf", 120_000, rng.randint(2, 40),
+            "Lease agreement between landlord and tenant with termination and deposit clauses. " * 10,
+        ))
+    return store
+
+
+# Outside the concept vocabulary: only verbatim turns, digest and document excerpts carry these
+LATE_FACT = "The building manager, Mr. Salem, changed the locks while I was travelling."
+LATE_QUESTION = "Who pays for the locksmith?"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--documents", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    store = build_store(args.turns, args.documents)
+    store.add_message("user", f"{LATE_FACT} {LATE_QUESTION}", "attorney", "en")
+    store.add_message("assistant", "Let us first look at the deposit deductions.", "attorney", "en")
+    verbatim = sum(len(content) for _, content in store.context_messages("en"))
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        items = store.context_messages("ar")
+    build_ms = (time.perf_counter() - start) * 1000 / args.repeat
+    handoff = sum(len(content) for _, content in items)
+
+    print(f"verbatim English context: {verbatim:6d} chars (~{verbatim // 4} tokens)")
+    print(f"Arabic hand-off:          {handoff:6d} chars (~{handoff // 4} tokens), built in {build_ms:.2f}ms")
+    content = items[0][1]
+    print(
+        f"carried over: fact={'Salem' in content} document_excerpts={'termination and deposit clauses' in content} "
+        f"open_question={LATE_QUESTION in content}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""False turns and frames gated by the pre-VAD energy gate on noisy audio.
+
+Runs a recording through a VAD with and without the EnergyGate and reports
+frames gated, false turns (VAD turns with no labelled speech in them), the
+false-turn rate, missed speech turns and the seconds of noise the VAD held
+turns open for, which is audio STT transcribes for nothing. Pass a 16-bit
+mono WAV with a JSON list of [start, end] speech intervals, or omit it to
+use a synthesized consultation over fan noise, keyboard clicks, door knocks
+and a TV playing in the room:
+    python3 -m agent.benchmarks.bench_input_gate
+    python3 -m agent.benchmarks.bench_input_gate room.wav --labels room.json --vad silero
+
+--vad silero runs the worker's own Silero model (livekit-plugins-silero) and
+is the measurement that counts; use it on a recording from a real room. The
+default "voicing" VAD runs without it. It marks frames that are voiced (low
+zero-crossing rate) at any level, and uses Silero's default timings: 50ms
+minimum speech and 550ms minimum silence. Like Silero, it fires on the TV's
+voices but not on the fan, keyboard or knocks. LiveKit noise suppression is
+not run here.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import struct
+import wave
+
+from ..audio_input import EnergyGate, frame_dbfs
+
+
+SAMPLE_RATE = 16000
+FRAME_MS = 10
+
+
+def _tone_burst(rng, seconds, level):
+    """Voiced, syllable-modulated harmonic signal standing in for speech"""
+    pitch = rng.uniform(110, 220)
+    amplitude = 32767 * 10 ** (level / 20)
+    rate = rng.uniform(3.5, 5.5)
+    samples = []
+    for n in range(int(seconds * SAMPLE_RATE)):
+        t = n / SAMPLE_RATE
+        envelope = 0.55 + 0.45 * math.sin(2 * math.pi * rate * t)
+        voiced = sum(math.sin(2 * math.pi * pitch * k * t) / k for k in (1, 2, 3, 4))
+        samples.append(amplitude * envelope * voiced / 2.1)
+    return samples
+
+
+def synthesize(seconds: float = 90.0, seed: int = 7):
+    """Speech turns over background noise; returns (samples, speech intervals, TV intervals)"""
+    rng = random.Random(seed)
+    total = int(seconds * SAMPLE_RATE)
+    fan = 32767 * 10 ** (-52 / 20)
+    audio = [rng.gauss(0, fan) for _ in range(total)]
+    # Slow swell so the noise floor has to be tracked, not assumed
+    for n in range(total):
+        audio[n] *= 1.0 + 0.8 * math.sin(2 * math.pi * n / (total / 2))
+
+    def mix(start, signal):
+        offset = int(start * SAMPLE_RATE)
+        for i, value in enumerate(signal[: max(total - offset, 0)]):
+            audio[offset + i] += value
+
+    speech = []
+    at = 3.0
+    while at < seconds - 6:
+        length = rng.uniform(1.5, 4.0)
+        mix(at, _tone_burst(rng, length, rng.uniform(-26, -20)))
+        speech.append([at, at + length])
+        at += length + rng.uniform(5.0, 9.0)
+
+    # Keyboard: 8ms clicks in bursts of typing
+    for _ in range(12):
+        start = rng.uniform(0, seconds - 3)
+        for _ in range(rng.randint(6, 14)):
+            start += rng.uniform(0.08, 0.25)
+            level = 32767 * 10 ** (rng.uniform(-40, -32) / 20)
+            mix(start, [rng.gauss(0, level) * math.exp(-i / 40) for i in range(int(0.008 * SAMPLE_RATE))])
+    # Door knocks: loud but short
+    for _ in range(3):
+        start = rng.uniform(0, seconds - 2)
+        for knock in range(3):
+            mix(start + knock * 0.18, [rng.gauss(0, 9000) * math.exp(-i / 160) for i in range(int(0.04 * SAMPLE_RATE))])
+    # TV across the room in the pauses: voiced chatter, from barely audible to clearly heard
+    tv = []
+    for (_, gap_start), (gap_end, _) in zip(speech, speech[1:]):
+        length = min(rng.uniform(2.0, 4.0), gap_end - gap_start - 1.5)
+        start = gap_start + 0.75 + rng.uniform(0.0, gap_end - gap_start - 1.5 - length)
+        mix(start, _tone_burst(rng, length, rng.uniform(-48, -34)))
+        tv.append([start, start + length])
+    return [max(-32768, min(32767, int(v))) for v in audio], speech, tv
+
+
+def read_wav(path: str):
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise SystemExit("expected 16-bit mono WAV")
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    return list(struct.unpack(f"<{len(raw) // 2}h", raw)), rate
+
+
+def zero_crossing_rate(frame) -> float:
+    return sum((frame[i - 1] < 0) != (frame[i] < 0) for i in range(1, len(frame))) / max(len(frame), 1)
+
+
+def vad_turns(frames, frame_seconds, max_zcr=0.25, min_dbfs=-70.0, min_speech=0.05, min_silence=0.55):
+    """Voicing VAD with Silero's default timings over [(level, zcr)] frames; returns [(start, end)]"""
+    turns = []
+    speaking_for = silent_for = 0.0
+    start = None
+    for index, (level, zcr) in enumerate(frames):
+        now = index * frame_seconds
+        if level >= min_dbfs and zcr <= max_zcr:
+            speaking_for += frame_seconds
+            silent_for = 0.0
+            if start is None and speaking_for >= min_speech:
+                start = now - speaking_for + frame_seconds
+        else:
+            speaking_for = 0.0
+            silent_for += frame_seconds
+            if start is not None and silent_for >= min_silence:
+                turns.append((start, now - silent_for + frame_seconds))
+                start = None
+    if start is not None:
+        turns.append((start, len(frames) * frame_seconds))
+    return turns
+
+
+async def silero_turns(samples, rate: int, step: int):
+    """Turns the worker's Silero VAD finds in 16-bit samples; returns [(start, end)]"""
+    from livekit import rtc
+    from livekit.plugins import silero
+
+    stream = silero.VAD.load().stream()
+    for index in range(0, len(samples) - step + 1, step):
+        stream.push_frame(rtc.AudioFrame(struct.pack(f"<{step}h", *samples[index:index + step]), rate, 1, step))
+    stream.end_input()
+    turns = []
+    start = None
+    async for event in stream:
+        kind = getattr(event.type, "value", event.type)
+        now = event.samples_index / rate
+        if kind == "start_of_speech":
+            start = now - event.speech_duration
+        elif kind == "end_of_speech" and start is not None:
+            turns.append((start, now - event.silence_duration))
+            start = None
+    await stream.aclose()
+    return turns
+
+
+def _overlap(turn, intervals) -> float:
+    return sum(max(0.0, min(turn[1], end) - max(turn[0], start)) for start, end in intervals)
+
+
+def score(turns, speech):
+    false_turns = [t for t in turns if not _overlap(t, speech)]
+    missed = [s for s in speech if not _overlap(s, turns)]
+    # Noise the VAD held a turn open for is audio STT transcribes and endpointing waits out
+    noise_seconds = sum((end - start) - _overlap((start, end), speech) for start, end in turns)
+    return {
+        "turns": len(turns),
+        "false_turns": len(false_turns),
+        "noise_stt_seconds": round(noise_seconds, 1),
+        "missed_speech": len(missed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wav", nargs="?", help="16-bit mono WAV (defaults to synthesized noisy audio)")
+    parser.add_argument("--labels", help="JSON list of [start, end] speech intervals in the WAV")
+    parser.add_argument("--seconds", type=float, default=90.0, help="length of the synthesized audio")
+    parser.add_argument("--seed", type=int, default=7, help="seed of the synthesized audio")
+    parser.add_argument("--vad", choices=("voicing", "silero"), default="voicing")
+    args = parser.parse_args()
+
+    if args.wav:
+        samples, rate = read_wav(args.wav)
+        speech = []
+        if args.labels:
+            with open(args.labels, encoding="utf-8") as fh:
+                speech = json.load(fh)
+    else:
+        samples, speech, _ = synthesize(args.seconds, args.seed)
+        rate = SAMPLE_RATE
+    step = rate * FRAME_MS // 1000
+    frame_seconds = step / rate
+    starts = range(0, len(samples) - step + 1, step)
+    levels = [frame_dbfs(struct.pack(f"<{step}h", *samples[i:i + step])) for i in starts]
+    minutes = len(levels) * frame_seconds / 60
+
+    gate = EnergyGate()
+    passed = [gate.process(level, frame_seconds) for level in levels]
+    # Gated frames reach the VAD as silence
+    gated_samples = list(samples)
+    for index, start in enumerate(starts):
+        if not passed[index]:
+            gated_samples[start:start + step] = [0] * step
+
+    print(f"{len(levels) * frame_seconds:.0f}s of audio, {len(speech)} labelled speech turns, {args.vad} VAD")
+    print(f"energy gate: {gate.metrics()}")
+    for label, series in (("raw", samples), ("gated", gated_samples)):
+        if args.vad == "silero":
+            turns = asyncio.run(silero_turns(series, rate, step))
+        else:
+            frames = [
+                (frame_dbfs(struct.pack(f"<{step}h", *series[i:i + step])), zero_crossing_rate(series[i:i + step]))
+                for i in starts
+            ]
+            turns = vad_turns(frames, frame_seconds)
+        result = score(turns, speech)
+        result["false_turns_per_min"] = round(result["false_turns"] / minutes, 2) if minutes else 0.0
+        print(f"{label:>6}: {json.dumps(result)}")
+
+
+if __name__ == "__main__":
+    main()
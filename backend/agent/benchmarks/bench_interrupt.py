@@ -0,0 +1,108 @@
+"""Time to silence after an interrupt: the old triple interrupt vs interrupt_and_wait.
+
+Starts a reply on a replay StubSession and interrupts it at a random point
+while it is speaking. The stub's audio output keeps AUDIO_QUEUE seconds of
+synthesized audio ahead of playout that only clear_buffer() drops, as
+RoomIO's audio output does. "legacy" is the interrupt_agent code this
+replaced: three interrupt() calls 50ms apart plus output.clear() and
+_audio_pipeline.clear(), which AgentSession does not have. "primitive" is
+agent.interrupt.interrupt_and_wait. Reports time to silence (the agent
+leaving the speaking state) and how long the call took, and exits non-zero
+if the primitive's p95 misses the target. Run from the backend directory:
+    python3 -m agent.benchmarks.bench_interrupt --trials 50
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from ..interrupt import TIME_TO_SILENCE_TARGET_MS, interrupt_and_wait
+from ..replay.harness import RoomRecorder
+from ..replay.stubs import Latency, StubPlugins, StubSession
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+async def legacy_interrupt(session, clock) -> None:
+    for i in range(3):
+        session.interrupt()
+        if i < 2:
+            await clock.sleep(0.05)
+    if hasattr(session, "output") and hasattr(session.output, "clear"):
+        session.output.clear()
+    if hasattr(session, "_audio_pipeline"):
+        session._audio_pipeline.clear()
+
+
+async def one(method: str, plugins: StubPlugins, rng: random.Random, speed: float):
+    session = StubSession(plugins, RoomRecorder())
+    speaking = asyncio.Event()
+    silent_at = []
+
+    def on_agent_state(event):
+        if event.new_state == "speaking":
+            speaking.set()
+        elif speaking.is_set() and not silent_at:
+            silent_at.append(time.perf_counter())
+
+    session.on("agent_state_changed", on_agent_state)
+    session.generate_reply(user_input="How do I get my deposit back?")
+    await speaking.wait()
+    await plugins.clock.sleep(rng.uniform(0.0, 1.5))
+
+    started = time.perf_counter()
+    if method == "legacy":
+        await legacy_interrupt(session, plugins.clock)
+    else:
+        await interrupt_and_wait(session, timeout=2.0 / speed)
+    returned = time.perf_counter()
+    while not silent_at:
+        await asyncio.sleep(0.001)
+    return (silent_at[0] - started) * speed, (returned - started) * speed
+
+
+async def run(method: str, args) -> dict:
+    plugins = StubPlugins(
+        llm_first_token=Latency(0.35, 0.1),
+        llm_per_token=0.05,
+        tts_latency=Latency(0.15, 0.05),
+        speed=args.speed,
+        seed=args.seed,
+    )
+    rng = random.Random(args.seed)
+    silences, calls = [], []
+    for _ in range(args.trials):
+        silence, call = await one(method, plugins, rng, args.speed)
+        silences.append(silence)
+        calls.append(call)
+    return {
+        "time_to_silence_p50_ms": round(_percentile(silences, 0.5) * 1000),
+        "time_to_silence_p95_ms": round(_percentile(silences, 0.95) * 1000),
+        "call_p95_ms": round(_percentile(calls, 0.95) * 1000),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--speed", type=float, default=4.0, help="divide stub delays by this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target-ms", type=int, default=TIME_TO_SILENCE_TARGET_MS)
+    args = parser.parse_args()
+
+    results = {}
+    for method in ("legacy", "primitive"):
+        results[method] = asyncio.run(run(method, args))
+        print(f"{method:>9}: {results[method]}")
+
+    p95 = results["primitive"]["time_to_silence_p95_ms"]
+    if p95 > args.target_ms:
+        raise SystemExit(f"❌ time to silence p95 {p95}ms misses the {args.target_ms}ms target")
+    print(f"✅ time to silence p95 {p95}ms within the {args.target_ms}ms target")
+
+
+if __name__ == "__main__":
+    main()
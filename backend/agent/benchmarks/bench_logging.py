@@ -0,0 +1,157 @@
+"""Logging cost per data packet on the event-loop thread.
+
+Replays the logging done for one data packet: the six INFO lines the old
+handle_data_packet wrote (raw packet dump, decoded message and four state
+lines) or the single sampled log_event that replaced them, plus two
+livekit.agents records through the transcription warning filter. Records
+go to a file through a timestamped formatter, written inline ("sync") or by
+agent.logging_setup's queue listener ("queued"); --sink-us makes each write
+block like a console or log pipe that is slow to drain. Reports
+microseconds spent on the calling thread per packet, and the filter's cost
+per record. Run from the backend directory:
+    python3 -m agent.benchmarks.bench_logging --packets 20000 --sink-us 20
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from .. import logging_setup
+from ..logging_setup import TranscriptionWarningFilter, install_queue_logging, log_event
+
+
+logger = logging.getLogger("multi-agent-ptt")
+livekit_logger = logging.getLogger("livekit.agents")
+
+
+class LegacyTranscriptionWarningFilter(logging.Filter):
+    """The filter agent.py used to install"""
+
+    def filter(self, record):
+        if record.levelname == 'WARNING' and 'failed to publish transcription' in record.getMessage():
+            return False
+        if 'room closed' in record.getMessage().lower() and 'transcription' in record.getMessage().lower():
+            return False
+        if 'channel closed' in record.getMessage().lower() and 'transcription' in record.getMessage().lower():
+            return False
+        if 'engine is closed' in record.getMessage().lower():
+            return False
+        return True
+
+
+class Participant:
+    identity = "user-7f3a"
+
+
+class Packet:
+    def __init__(self, payload: bytes) -> None:
+        self.data = payload
+        self.participant = Participant()
+        self.topic = None
+
+    def __repr__(self) -> str:
+        return f"DataPacket(data={self.data!r}, kind=1, participant={self.participant.identity}, topic={self.topic})"
+
+
+def legacy_logs(data, message: str) -> None:
+    logger.info(f"📩 RAW DATA RECEIVED: {data}")
+    logger.info(f"📩 Decoded message from {data.participant.identity}: '{message}'")
+    logger.info(f"🎯 Processing with current_agent_type: {'attorney'}")
+    logger.info(f"🎯 Current agent instance: {'<AttorneyAgent object at 0x7f3a>'}")
+    logger.info(f"🎯 Session exists: {True}")
+    logger.info(f"🎯 Is switching: {False}")
+
+
+def sampled_logs(data, message: str) -> None:
+    logger.debug("📩 RAW DATA RECEIVED: %s", data)
+    log_event(
+        "data_packet", "📩 '%s' from %s", message, data.participant.identity,
+        agent="attorney", session=True, switching=False,
+    )
+
+
+class SlowFileHandler(logging.FileHandler):
+    """A file sink that blocks for a while per record, like a console or pipe that is being read slowly"""
+
+    def __init__(self, path: str, block_us: float) -> None:
+        super().__init__(path, encoding="utf-8")
+        self.block = block_us / 1e6
+
+    def emit(self, record):
+        super().emit(record)
+        if self.block:
+            time.sleep(self.block)
+
+
+def run(scenario: str, path: str, args) -> dict:
+    root = logging.getLogger()
+    handler = SlowFileHandler(path, args.sink_us)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-5s %(name)s - %(message)s"))
+    root.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    livekit_logger.setLevel(logging.INFO)
+    legacy = scenario.startswith("legacy")
+    log_filter = LegacyTranscriptionWarningFilter() if legacy else TranscriptionWarningFilter()
+    livekit_logger.addFilter(log_filter)
+    listener = install_queue_logging(root) if scenario.endswith("queued") else None
+    log_packet = legacy_logs if legacy else sampled_logs
+
+    packets = [Packet(f"chat:question number {index}".encode()) for index in range(args.packets)]
+    started = time.perf_counter()
+    for packet in packets:
+        log_packet(packet, packet.data.decode("utf-8"))
+        livekit_logger.info("received user transcript")
+        livekit_logger.warning("failed to publish transcription: room closed")
+    on_loop = time.perf_counter() - started
+    if listener is not None:
+        listener.stop()
+    drained = time.perf_counter() - started
+
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    handler.close()
+    livekit_logger.removeFilter(log_filter)
+    with open(path, encoding="utf-8") as fh:
+        lines = sum(1 for _ in fh)
+    os.remove(path)
+    return {
+        "loop_us_per_packet": round(on_loop / args.packets * 1e6, 1),
+        "drained_s": round(drained, 2),
+        "lines_written": lines,
+    }
+
+
+def filter_cost(log_filter, records, rounds: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for record in records:
+            log_filter.filter(record)
+    return (time.perf_counter() - started) / (rounds * len(records)) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packets", type=int, default=20000)
+    parser.add_argument("--sample", type=int, default=10, help="keep 1 in N data_packet records")
+    parser.add_argument("--sink-us", type=float, default=0.0, help="microseconds each write blocks for")
+    args = parser.parse_args()
+    logging_setup.SAMPLER.rates["data_packet"] = args.sample
+
+    for scenario in ("legacy sync", "legacy queued", "sampled sync", "sampled queued"):
+        fd, path = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        print(f"{scenario:>15}: {run(scenario, path, args)}")
+
+    messages = [
+        "received user transcript", "failed to publish transcription: room closed",
+        "speech done", "engine is closed", "process memory usage is high", "Channel closed while sending transcription",
+    ]
+    records = [logging.LogRecord("livekit.agents", logging.WARNING, __file__, 0, m, None, None) for m in messages]
+    legacy_ns = filter_cost(LegacyTranscriptionWarningFilter(), records)
+    new_ns = filter_cost(TranscriptionWarningFilter(), records)
+    print(f"transcription filter: {legacy_ns:.0f}ns -> {new_ns:.0f}ns per record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""CPU per additional participant in a multi-party room on the replay stubs.
+
+Runs a room in multi-party mode with 0..N remote participants. Each one
+streams 20ms frames and says a scripted utterance every --interval
+seconds, staggered, through its own VAD-gated STT front-end. One shared
+session answers them through the turn scheduler. The stub VAD burns
+--vad-cpu-ms of CPU per second of audio on every frame, as the shared
+silero model does. The report gives process CPU per second of room time,
+the marginal CPU each added participant costs, and what the scheduler
+did with the turns. Stub delays are divided by --speed; CPU is measured
+per simulated second. Run from the backend directory:
+    python3 -m agent.benchmarks.bench_multiparty --participants 0 1 2 4 6
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from ..replay.harness import RoomRecorder, build_runtime
+from ..replay.room import FakeRoom
+from ..replay.stubs import StubAudioFrame, StubPlugins, StubVAD
+
+
+def participant_audio(clock, index: int, count: int, args):
+    """A participant's microphone: silence, then an utterance every --interval seconds"""
+    async def frames():
+        offset = args.interval * index / max(count, 1)
+        elapsed = 0.0
+        spoken = 0
+        while True:
+            position = (elapsed - offset) % args.interval if elapsed >= offset else -1.0
+            speech = 0.0 <= position < args.utterance
+            ends = speech and position + args.frame >= args.utterance
+            text = f"participant {index} question {spoken}" if ends else ""
+            spoken += bool(text)
+            yield StubAudioFrame(args.frame, speech, text)
+            await clock.sleep(args.frame)
+            elapsed += args.frame
+    return frames()
+
+
+async def run(count: int, args) -> dict:
+    plugins = StubPlugins(speed=args.speed, seed=args.seed, vad=StubVAD(cpu_ms_per_second=args.vad_cpu_ms))
+    plugins.llm.reply_words = args.reply_words
+    identities = [f"participant-{index}" for index in range(count)]
+    room = FakeRoom(f"multiparty-{count}")
+    runtime = build_runtime(
+        room,
+        plugins,
+        RoomRecorder(),
+        vad=plugins.vad,
+        multiparty=True,
+        participant_audio_factory=lambda _room, participant: participant_audio(
+            plugins.clock, identities.index(participant.identity), count, args
+        ),
+    )
+    runtime.multiparty.scheduler.gap /= args.speed
+    await runtime.run()
+    for identity in identities:
+        room.connect(identity)
+
+    started = time.process_time()
+    await plugins.clock.sleep(args.seconds)
+    cpu = time.process_time() - started
+    metrics = runtime.multiparty.metrics()
+    await runtime.aclose()
+
+    speakers = metrics["speakers"].values()
+    return {
+        "cpu_ms_per_s": round(cpu * 1000 / args.seconds, 1),
+        "audio_seconds": round(sum(speaker["audio_seconds"] for speaker in speakers), 1),
+        "stt_seconds": round(sum(speaker["stt_seconds"] for speaker in speakers), 1),
+        "replies": sum(metrics["turns"].values()),
+        "merged": metrics["merged"],
+        "queue_wait_p95_ms": round(metrics["queue_wait_p95_ms"] * args.speed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--participants", type=int, nargs="+", default=[0, 1, 2, 4, 6])
+    parser.add_argument("--seconds", type=float, default=60.0, help="simulated room time per run")
+    parser.add_argument("--interval", type=float, default=15.0, help="seconds between one participant's utterances")
+    parser.add_argument("--utterance", type=float, default=2.5)
+    parser.add_argument("--frame", type=float, default=0.02)
+    parser.add_argument("--reply-words", type=int, default=10, help="words per agent reply (10 is about 4s of speech)")
+    parser.add_argument("--vad-cpu-ms", type=float, default=10.0, help="VAD CPU per second of audio")
+    parser.add_argument("--speed", type=float, default=4.0, help="divide stub delays by this")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    previous = None
+    for count in args.participants:
+        result = asyncio.run(run(count, args))
+        if previous is not None and count > previous[0]:
+            result["marginal_cpu_ms_per_s"] = round((result["cpu_ms_per_s"] - previous[1]) / (count - previous[0]), 1)
+        previous = (count, result["cpu_ms_per_s"])
+        print(f"{count:>2} participants: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Throughput benchmark for transcript normalization.
+
+Run from the backend directory:
+    python3 -m agent.benchmarks.bench_normalization --transcripts 20000
+"""
+import argparse
+import random
+import re
+import time
+
+from ..normalization import StreamingNormalizer, get_normalizer
+
+
+FILLER_EN = (
+    "the contract says that my landlord must return the deposit within thirty days "
+    "can you review the clause about termination and notice period please"
+).split()
+FILLER_AR = "العقد ينص على أن المالك يجب أن يعيد التأمين خلال ثلاثين يوم".split()
+VARIANTS_EN = ["hakim", "h a a k e e m", "Haakeem", "hakem", "akim", "bin fin eight", "binfinate"]
+VARIANTS_AR = ["هاكيم", "حاكيم", "بن فن ايت", "بينفين ٨", "hakeem"]
+
+
+def legacy_normalize(text: str) -> str:
+    """Previous per-call implementation, kept here as the baseline"""
+    pattern = re.compile(r"(?i)(h\s*a\s*a\s*k\s*(?:i|e)?\s*e\s*e\s*m|ha+\s*k[iy]e?m|hakim|hakeem|haakeem|hakem|akim)")
+    return pattern.sub("HAAKEEM", text)
+
+
+def build_corpus(count: int, words: int, filler, variants, seed: int = 7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        tokens = [rng.choice(filler) for _ in range(words)]
+        for _ in range(rng.randint(0, 3)):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(variants))
+        corpus.append(" ".join(tokens))
+    return corpus
+
+
+def run(label: str, fn, corpus) -> None:
+    total_chars = sum(len(t) for t in corpus)
+    start = time.perf_counter()
+    for text in corpus:
+        fn(text)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<22} {len(corpus) / elapsed:>12.0f} transcripts/s "
+        f"{total_chars / elapsed / 1e6:>8.2f} MB/s  ({elapsed * 1000:.1f} ms)"
+    )
+
+
+def run_streaming(transcript: str, chunk: int) -> None:
+    """Compare full re-normalization of each interim hypothesis with the streaming normalizer"""
+    normalizer = get_normalizer("en")
+    hypotheses = [transcript[:end] for end in range(chunk, len(transcript) + chunk, chunk)]
+
+    start = time.perf_counter()
+    for hypothesis in hypotheses:
+        normalizer.normalize(hypothesis)
+    full = time.perf_counter() - start
+
+    streaming = StreamingNormalizer(normalizer)
+    start = time.perf_counter()
+    for hypothesis in hypotheses:
+        streaming.update(hypothesis)
+    incremental = time.perf_counter() - start
+
+    print(
+        f"interim x{len(hypotheses)} ({len(transcript)} chars): "
+        f"full {full / len(hypotheses) * 1e6:.1f} us/update, "
+        f"streaming {incremental / len(hypotheses) * 1e6:.1f} us/update"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transcripts", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=40)
+    args = parser.parse_args()
+
+    corpus_en = build_corpus(args.transcripts, args.words, FILLER_EN, VARIANTS_EN)
+    corpus_ar = build_corpus(args.transcripts, args.words, FILLER_AR, VARIANTS_AR)
+
+    print(f"corpus: {args.transcripts} transcripts x ~{args.words} words")
+    run("legacy (en)", legacy_normalize, corpus_en)
+    run("shared (en)", get_normalizer("en").normalize, corpus_en)
+    run("shared (ar)", get_normalizer("ar").normalize, corpus_ar)
+    run_streaming(" ".join(corpus_en[:200]), chunk=12)
+
+
+if __name__ == "__main__":
+    main()
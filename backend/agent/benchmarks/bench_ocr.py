@@ -0,0 +1,96 @@
+"""Throughput benchmark for OCR of scanned PDFs.
+
+Renders a synthetic multi-page scan (or uses --pdf) and reports time to the
+first reply-ready text, time to the full document and pages per second for
+each worker count, plus a warm page-cache rerun. Needs Pillow, PyPDF2,
+pytesseract and the tesseract binary. Run from the backend directory:
+    python3 -m agent.benchmarks.bench_ocr --pages 20 --workers 1,2,4
+"""
+import argparse
+import concurrent.futures
+import io
+import sys
+import time
+
+from ..documents import extract_document, finish_ocr
+from ..documents import ocr
+
+
+LINES = [
+    "IN THE COURT OF FIRST INSTANCE",
+    "Case No. 2024/1187 - Civil Division",
+    "The plaintiff seeks the return of the security deposit",
+    "withheld by the defendant landlord after termination",
+    "of the lease agreement dated 1 March 2023.",
+]
+
+
+def render_scan(pages: int) -> bytes:
+    """A PDF whose pages are images of text, like a scanner produces"""
+    from PIL import Image, ImageDraw
+
+    images = []
+    for number in range(pages):
+        image = Image.new("L", (1240, 1754), 255)
+        draw = ImageDraw.Draw(image)
+        y = 120
+        for repeat in range(8):
+            for line in LINES:
+                draw.text((100, y), f"{line} ({number + 1}.{repeat + 1})", fill=0)
+                y += 34
+        images.append(image.convert("RGB"))
+    buffer = io.BytesIO()
+    images[0].save(buffer, "PDF", resolution=150, save_all=True, append_images=images[1:])
+    return buffer.getvalue()
+
+
+def run(pdf: bytes, workers: int, language: str) -> None:
+    ocr.PAGE_CACHE.clear()
+    ocr._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr")
+
+    start = time.perf_counter()
+    document = extract_document(pdf, "scan.pdf", "application/pdf", language)
+    first = time.perf_counter() - start
+    if document.pending is not None:
+        finish_ocr(document.pending, "scan.pdf", language)
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    document = extract_document(pdf, "scan.pdf", "application/pdf", language)
+    if document.pending is not None:
+        finish_ocr(document.pending, "scan.pdf", language)
+    cached = time.perf_counter() - start
+
+    pages = len(ocr.PAGE_CACHE._pages)
+    print(
+        f"workers={workers:<3} first reply text {first * 1000:8.0f}ms  "
+        f"full document {full * 1000:8.0f}ms  {pages / full:6.2f} pages/s  "
+        f"cached rerun {cached * 1000:6.0f}ms"
+    )
+    ocr._executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated pool sizes")
+    parser.add_argument("--language", default="en", choices=["en", "ar"])
+    parser.add_argument("--pdf", help="benchmark an existing scanned PDF instead")
+    args = parser.parse_args()
+
+    if not ocr.ocr_available():
+        sys.exit("OCR unavailable: install Pillow, pytesseract and the tesseract binary")
+
+    if args.pdf:
+        with open(args.pdf, "rb") as fh:
+            pdf = fh.read()
+    else:
+        pdf = render_scan(args.pages)
+    print(f"{len(pdf) / 1024:.0f} KiB scan, tesseract lang={ocr.ocr_languages(args.language)}, "
+          f"{ocr.OCR_EARLY_PAGES} pages before first reply")
+    for workers in (int(value) for value in args.workers.split(",")):
+        run(pdf, workers, args.language)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Time-to-first-text benchmark for large PDF bundles.
+
+Builds text PDFs of increasing page counts (or uses --pdf) and compares
+extracting every page up front with the lazy path that reads the page
+count, outline and first pages only, then one on-demand range read.
+It also reports the memory a room's DocumentLibrary holds once --library
+copies of the largest bundle are open; their bytes live in temp files.
+Run from the backend directory:
+    python3 -m agent.benchmarks.bench_pdf_lazy --pages 100,500,1000
+"""
+import argparse
+import time
+import tracemalloc
+
+from ..documents import extract_document
+from ..documents.pdf import DocumentLibrary, PdfDocument
+
+
+PARAGRAPH = (
+    "The lessee shall maintain the premises in good repair and shall not sublet "
+    "without written consent of the lessor. Clause {page}.{line} applies."
+)
+
+
+def build_pdf(pages: int, lines: int = 40) -> bytes:
+    """Minimal text PDF with Helvetica content streams, no external writer needed"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        body = ["BT /F1 9 Tf 40 800 Td 11 TL"]
+        for line in range(lines):
+            body.append(f"({PARAGRAPH.format(page=page + 1, line=line + 1)}) '")
+        body.append("ET")
+        stream = "\n".join(body).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def eager(pdf: bytes) -> int:
+    """Previous behaviour: every page's text before the first reply"""
+    document = PdfDocument(pdf, "bundle.pdf")
+    return sum(len(text) for _, text in document.text_layer(0, document.page_count))
+
+
+def run(label: str, pdf: bytes) -> None:
+    start = time.perf_counter()
+    eager(pdf)
+    eager_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = extract_document(pdf, "bundle.pdf", "application/pdf")
+    lazy_s = time.perf_counter() - start
+
+    document = result.document
+    middle = document.page_count // 2 if document else 0
+    start = time.perf_counter()
+    if document:
+        document.read(middle, middle + 4)
+    range_s = time.perf_counter() - start
+    start = time.perf_counter()
+    if document:
+        document.read(middle, middle + 4)
+    cached_s = time.perf_counter() - start
+
+    print(
+        f"{label:<12} eager {eager_s * 1000:9.1f}ms  lazy first text {lazy_s * 1000:8.1f}ms  "
+        f"5-page read {range_s * 1000:6.1f}ms  cached {cached_s * 1000:5.2f}ms"
+    )
+
+
+def library_memory(pdf: bytes, copies: int) -> None:
+    """Traced memory held by a library of `copies` open bundles, with a few pages read from each"""
+    tracemalloc.start()
+    library = DocumentLibrary()
+    for copy in range(copies):
+        document = PdfDocument(pdf, f"bundle-{copy}.pdf")
+        document.read(1, 5)
+        library.add(document)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"library      {len(library)} open x {len(pdf) / 1e6:.1f}MB PDFs: {held / 1e6:.1f}MB held in memory, "
+        f"{library.size / 1e6:.1f}MB spilled to temp files"
+    )
+    library.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default="100,500,1000", help="comma-separated page counts")
+    parser.add_argument("--pdf", help="benchmark an existing PDF instead")
+    parser.add_argument("--library", type=int, default=8, help="bundles open at once for the memory report")
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as fh:
+            pdf = fh.read()
+        run(args.pdf, pdf)
+        library_memory(pdf, args.library)
+        return
+    for pages in (int(value) for value in args.pages.split(",")):
+        pdf = build_pdf(pages)
+        run(f"{pages} pages", pdf)
+    library_memory(pdf, args.library)
+
+
+if __name__ == "__main__":
+    main()
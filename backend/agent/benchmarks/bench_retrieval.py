@@ -0,0 +1,118 @@
+"""Query latency benchmark for the session document index.
+
+Indexes a synthetic mix of English and Arabic documents and reports build
+time and query latency percentiles. It then indexes Arabic pages written
+with harakat and tatweel, as contracts often are. It queries them in plain
+spelling and reports how often the right page ranks first. Run from the
+backend directory:
+    python3 -m agent.benchmarks.bench_retrieval --documents 300 --pages 10
+"""
+import argparse
+import random
+import time
+
+from ..documents.index import SessionIndex
+
+
+VOCAB_EN = (
+    "lease tenant landlord deposit notice termination clause contract court judgment appeal "
+    "plaintiff defendant damages breach payment rent property evidence witness hearing filing "
+    "agreement obligation liability indemnity arbitration jurisdiction statute penalty interest"
+).split()
+VOCAB_AR = (
+    "عقد الإيجار المستأجر المالك التأمين إشعار الإنهاء بند المحكمة الحكم الاستئناف المدعي "
+    "المدعى عليه التعويض الإخلال الدفع الأجرة العقار البينة الشاهد الجلسة الالتزام المسؤولية"
+).split()
+
+
+def _pseudo_words(rng: random.Random, alphabet: str, count: int):
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(4, 9))) for _ in range(count)]
+
+
+def build_corpus(documents: int, pages: int, words: int, seed: int = 3):
+    """Legal terms mixed with a long tail of rarer words, roughly Zipf-distributed"""
+    rng = random.Random(seed)
+    tail_en = _pseudo_words(rng, "abcdefghijklmnopqrstuvwxyz", 5000)
+    tail_ar = _pseudo_words(rng, "ابتثجحخدذرزسشصضطظعغفقكلمنهوي", 3000)
+    corpus = []
+    for number in range(documents):
+        vocab, tail = (VOCAB_AR, tail_ar) if number % 3 == 0 else (VOCAB_EN, tail_en)
+        weights = [1.0 / (rank + 1) for rank in range(len(tail))]
+        pages_text = []
+        for page in range(pages):
+            common = rng.choices(vocab, k=words // 3)
+            rare = rng.choices(tail, weights=weights, k=words - len(common))
+            tokens = common + rare
+            rng.shuffle(tokens)
+            pages_text.append((page + 1, " ".join(tokens)))
+        corpus.append((f"doc-{number}.pdf", pages_text))
+    return corpus
+
+
+HARAKAT = "\u064e\u064f\u0650\u0651\u0652\u064b\u064c\u064d"
+TATWEEL = "\u0640"
+
+
+def diacritize(word: str, rng: random.Random) -> str:
+    """`word` with a haraka after most letters and the odd tatweel"""
+    out = []
+    for letter in word:
+        out.append(letter)
+        if rng.random() < 0.1:
+            out.append(TATWEEL)
+        if rng.random() < 0.7:
+            out.append(rng.choice(HARAKAT))
+    return "".join(out)
+
+
+def arabic_recall(pages: int, seed: int = 5) -> float:
+    """Share of plain-spelling queries whose diacritized page ranks first"""
+    rng = random.Random(seed)
+    tail = _pseudo_words(rng, "ابتثجحخدذرزسشصضطظعغفقكلمنهوي", 2000)
+    index = SessionIndex()
+    queries = []
+    for page in range(pages):
+        words = rng.sample(VOCAB_AR, 6) + rng.sample(tail, 30)
+        index.add_pages("diacritized.pdf", [(page + 1, " ".join(diacritize(word, rng) for word in words))])
+        queries.append((page + 1, " ".join(words[:2] + rng.sample(words[6:], 3))))
+    hits = 0
+    for page, query in queries:
+        found = index.search(query, k=1)
+        hits += bool(found) and found[0].page == page
+    return hits / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=300)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--words", type=int, default=350, help="words per page")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.documents, args.pages, args.words)
+    index = SessionIndex()
+    start = time.perf_counter()
+    for name, pages in corpus:
+        index.add_pages(name, pages)
+    build = time.perf_counter() - start
+    print(f"indexed {args.documents} documents / {len(index)} passages in {build * 1000:.0f}ms")
+
+    rng = random.Random(11)
+    latencies = []
+    for _ in range(args.queries):
+        _, pages = rng.choice(corpus)
+        words = rng.choice(pages)[1].split()
+        query = " ".join(rng.sample(words, rng.randint(3, 12)))
+        start = time.perf_counter()
+        index.search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"query latency p50={p50:.2f}ms p95={p95:.2f}ms max={latencies[-1]:.2f}ms")
+    print(f"diacritized Arabic: top-1 recall {arabic_recall(args.pages * 20):.0%} for plain-spelling queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Time to first response with and without hedging and failover, on fake providers.
+
+Two scenarios run against replay.stubs.FakeProvider instances with injected
+latency. "tail": the primary answers in ~300ms but stalls for seconds on a
+few requests. "outage": the primary fails every request in the middle third
+of the run. Each scenario runs with the primary alone and with the
+ProviderRouter (hedging plus a secondary provider). Delays are divided by
+--speed. Run from the backend directory:
+    python3 -m agent.benchmarks.bench_routing --requests 300
+"""
+import argparse
+import asyncio
+import time
+
+from ..replay.stubs import FakeProvider, Latency, ScaledClock
+from ..routing import ProviderRouter
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+async def _first_item(router, providers, routed: bool):
+    started = time.perf_counter()
+    if routed:
+        stream = router.stream({provider.name: provider.stream for provider in providers})
+    else:
+        stream = providers[0].stream()
+    try:
+        await stream.__anext__()
+    finally:
+        await stream.aclose()
+    return time.perf_counter() - started
+
+
+async def run(scenario: str, routed: bool, args) -> dict:
+    clock = ScaledClock(args.speed)
+    primary = FakeProvider("primary", Latency(0.3, 0.1), stall_rate=args.stall_rate, stall=4.0, seed=1, clock=clock)
+    secondary = FakeProvider("secondary", Latency(0.45, 0.1), seed=2, clock=clock)
+    router = ProviderRouter("llm", hedge_min=0.4 / args.speed, hedge_max=2.5 / args.speed)
+    if scenario == "outage":
+        primary.stall_rate = 0.0
+    latencies, failures = [], 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            try:
+                latencies.append(await _first_item(router, [primary, secondary], routed) * args.speed)
+            except Exception:
+                failures += 1
+
+    # The outage covers the middle third of the run
+    phases = (0.0, 1.0, 0.0) if scenario == "outage" else (0.0, 0.0, 0.0)
+    for error_rate in phases:
+        primary.error_rate = error_rate
+        await asyncio.gather(*(one() for _ in range(args.requests // len(phases))))
+    calls = primary.calls + secondary.calls
+    return {
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000),
+        "failed": failures,
+        "extra_requests": f"{(calls - args.requests) / args.requests:.0%}",
+        "breaker_trips": router.stats("primary").breaker.trips,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--stall-rate", type=float, default=0.05)
+    parser.add_argument("--speed", type=float, default=10.0)
+    args = parser.parse_args()
+
+    for scenario in ("tail", "outage"):
+        for routed in (False, True):
+            result = asyncio.run(run(scenario, routed, args))
+            print(f"{scenario:>6} {'routed' if routed else 'direct':>6}: {result}")
+
+
+if __name__ == "__main__":
+    main()
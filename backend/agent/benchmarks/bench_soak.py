@@ -0,0 +1,93 @@
+"""Memory and object lifetimes over thousands of agent switches in one room.
+
+Drives RoomRuntime.switch_agent round the registry's agent types against
+the replay stubs. Each stub RoomIO subscribes to the room's events the way
+RoomIO does. Traced memory and the lifecycle auditor's live session /
+agent / RoomIO counts are sampled every --checkpoint switches, after a
+full collection. The "leaky" run starts a RoomIO per session whose
+aclose() does nothing, as before switches closed it, to show what the
+auditor reports.
+Exits non-zero if the normal run grows by more than --max-growth-kib
+after warm-up or leaves anything alive after teardown. Run from the
+backend directory:
+    python3 -m agent.benchmarks.bench_soak --switches 3000
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import logging
+import tracemalloc
+
+from ..lifecycle import AUDITOR
+from ..registry import AGENT_PROFILES, DEFAULT_AGENT_TYPE
+from ..replay.harness import RoomRecorder, build_runtime
+from ..replay.room import FakeRoom
+from ..replay.stubs import StubPlugins, StubRoomIO
+
+
+class LeakyRoomIO(StubRoomIO):
+    async def aclose(self) -> None:
+        pass
+
+
+async def soak(name: str, leaky: bool, args) -> dict:
+    room = FakeRoom(name)
+    runtime = build_runtime(room, StubPlugins(speed=args.speed, seed=args.seed), RoomRecorder())
+    if leaky:
+        runtime.room_io_factory = LeakyRoomIO
+        runtime.media.reuse = False
+    await runtime.start_agent_session(DEFAULT_AGENT_TYPE)
+
+    agent_types = itertools.cycle(list(AGENT_PROFILES))
+    checkpoints = []
+    for switch in range(1, args.switches + 1):
+        await runtime.switch_agent(next(agent_types))
+        if switch % args.checkpoint == 0:
+            # Let cancelled tasks of the closed session unwind, as the auditor's grace period does
+            await asyncio.sleep(0.01)
+            # FakeRoom records every active_agent broadcast for the replay report; not runtime state
+            room.local_participant.published.clear()
+            gc.collect()
+            live = AUDITOR.live(name)
+            checkpoints.append((switch, tracemalloc.get_traced_memory()[0], live["session"]))
+
+    await runtime.aclose()
+    del runtime
+    await asyncio.sleep(0.01)
+    warm = checkpoints[min(1, len(checkpoints) - 1)][1]
+    return {
+        "kib": [round(memory / 1024) for _, memory, _ in checkpoints],
+        "live_sessions": [sessions for _, _, sessions in checkpoints],
+        "growth_kib": round((checkpoints[-1][1] - warm) / 1024, 1),
+        "survivors": len([s for s in AUDITOR.survivors(grace=0) if s["room"] == name]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switches", type=int, default=3000)
+    parser.add_argument("--checkpoint", type=int, default=500)
+    parser.add_argument("--speed", type=float, default=1000.0, help="divide stub delays by this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-growth-kib", type=float, default=256.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    tracemalloc.start()
+    results = {}
+    for name, leaky in (("soak-closed", False), ("soak-leaky", True)):
+        results[name] = asyncio.run(soak(name, leaky, args))
+        print(f"{name:>12}: {results[name]}")
+    tracemalloc.stop()
+
+    clean = results["soak-closed"]
+    if clean["growth_kib"] > args.max_growth_kib or clean["survivors"]:
+        raise SystemExit(
+            f"❌ memory grew {clean['growth_kib']} KiB over {args.switches} switches, {clean['survivors']} survivors"
+        )
+    print(f"✅ memory flat within {args.max_growth_kib} KiB over {args.switches} switches, nothing survived teardown")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Switch latency (switch request to the new agent's first greeting audio) on the replay stubs.
+
+Switches a replay room round the registry's agent types while the outgoing
+agent is mid-reply, and times each switch up to the first audio of the new
+agent's greeting. "fresh RoomIO" starts a RoomIO per session, as before
+RoomIO was kept for the room; "reused RoomIO" re-binds the room's one
+RoomIO; both tear the old session down before building the next.
+"overlapped" re-binds too, but builds the next session while the old one
+goes quiet and closes it while the new one starts. Stub delays are divided by --speed and latencies scaled back, so
+the figures are in real seconds. Run from the backend directory:
+    python3 -m agent.benchmarks.bench_switch --switches 30
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+
+from ..registry import AGENT_PROFILES, DEFAULT_AGENT_TYPE
+from ..replay.harness import RoomRecorder, build_runtime
+from ..replay.room import FakeRoom
+from ..replay.stubs import StubPlugins
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+def configure(runtime, mode: str) -> None:
+    runtime.media.reuse = mode != "fresh RoomIO"
+    runtime.overlap_switches = mode == "overlapped"
+
+
+async def run(mode: str, args) -> dict:
+    recorder = RoomRecorder()
+    runtime = build_runtime(FakeRoom(f"switch-{mode}"), StubPlugins(speed=args.speed, seed=args.seed), recorder)
+    configure(runtime, mode)
+    await runtime.start_agent_session(DEFAULT_AGENT_TYPE)
+    agent_types = itertools.cycle([agent_type for agent_type in AGENT_PROFILES if agent_type != DEFAULT_AGENT_TYPE] + [DEFAULT_AGENT_TYPE])
+
+    for _ in range(args.switches):
+        # Let the current agent get into its greeting so there is speech to stop
+        await asyncio.sleep(args.settle / args.speed)
+        recorder.switch_requested()
+        await runtime.switch_agent(next(agent_types))
+        while recorder._switch_started is not None:
+            await asyncio.sleep(0.001)
+    await runtime.aclose()
+
+    latencies = [latency * args.speed for latency in recorder.switch_latencies]
+    return {
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000),
+        "room_io": runtime.media.metrics(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switches", type=int, default=30)
+    parser.add_argument("--speed", type=float, default=4.0, help="divide stub delays by this")
+    parser.add_argument("--settle", type=float, default=0.8, help="seconds into the greeting before switching")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    for mode in ("fresh RoomIO", "reused RoomIO", "overlapped"):
+        print(f"{mode:>14}: {asyncio.run(run(mode, args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Time to first audio for long answers: raw sentence splitting vs SpeechTextShaper.
+
+Streams a long markdown answer of the kind the click-to-talk agents give
+through a stub LLM (time to first token plus per-token delay) into a stub
+TTS (first-byte latency plus per-character synthesis, one request at a
+time) and plays the audio at speaking rate. The "buffered" pipeline sends
+the whole answer once the LLM is done. The "raw" pipeline splits on
+sentence punctuation only, as the default TTS stream adapter does, so list
+items without full stops pile up into one long request and markdown is
+spoken. The "shaped" pipeline uses agent.speech_text. Run from the backend
+directory:
+    python3 -m agent.benchmarks.bench_tts_pipeline --per-token 0.02
+"""
+import argparse
+import re
+import time
+
+from ..speech_text import SpeechTextShaper
+
+
+ANSWER_EN = """## Getting your deposit back
+
+Thanks for the detail, that helps. Based on what you described, here is a thorough breakdown of where you stand and what to do next.
+
+**Your rights under the lease**
+- The landlord must return the deposit or send an itemized list of deductions within 30 days of move-out [1]
+- Normal wear & tear (faded paint, minor scuffs) cannot be deducted
+- Cleaning fees are only allowed if the lease says so *and* the unit was left dirty
+- Late return can entitle you to up to 2x the deposit in some jurisdictions
+
+**What to do now**
+1. Write a demand letter citing Section § 12/3 of the lease (see [2]) and the 30-day rule, e.g. "Please return my $1,500 deposit by June 1"
+2. Send it by registered mail and keep the receipt / tracking number
+3. Gather evidence: move-out photos, the signed checklist, texts with the landlord
+4. If there is no answer within 14 days, file in small claims court (see https://courts.example.gov/small-claims)
+
+| Step | Cost | Time |
+|---|---|---|
+| Demand letter | free | 1 day |
+| Small claims filing | ~$75 | 4-8 weeks |
+
+> This is general guidance, not legal advice; local rules may differ.
+
+Would you like me to draft the demand letter for you?
+"""
+
+ANSWER_AR = """### ملخص الوضع
+
+شكرًا على التفاصيل. هذا تحليل مفصل لوضعك والخطوات العملية اللي تقدر تسويها.
+
+**حقوقك حسب العقد**
+- المؤجر ملزم يرد التأمين أو يرسل كشف بالخصومات خلال ٣٠ يوم من الإخلاء [1]
+- الاستهلاك العادي (دهان باهت، خدوش بسيطة) ما يجوز خصمه
+- رسوم التنظيف مسموحة فقط إذا نص عليها العقد *و* كانت الشقة متسخة
+
+**الخطوات**
+1. اكتب إنذار رسمي/مكتوب تذكر فيه البند ١٢ من العقد
+2. أرسله بالبريد المسجل واحتفظ بالإيصال
+3. اجمع الأدلة: صور الإخلاء، قائمة الاستلام، والرسائل مع المالك
+4. إذا ما رد خلال ١٤ يوم، ارفع دعوى في المحكمة المختصة
+
+هل تبيني أكتب لك نص الإنذار؟
+"""
+
+# Markup, and what stripping it can leave behind: "(see )", "Section section 12"
+SPOKEN_MARKUP = re.compile(r"[*#|\[\]_`>]|https?://|\(\s*(?:see|cf\.?)?\s*\)|\bsection\s+section\b", re.IGNORECASE)
+_RAW_BOUNDARY = re.compile(r"[.!?؟]+(?=\s)")
+
+
+def tokens_of(text: str):
+    """LLM-like tokens: about four characters each, whitespace attached to the next one"""
+    return re.findall(r"\s*\S{1,4}|\s+", text)
+
+
+def raw_chunks(tokens, min_chars: int = 20):
+    """(token index, text) when a punctuation-delimited sentence completes"""
+    buffer = ""
+    for index, token in enumerate(tokens):
+        buffer += token
+        while True:
+            match = next((m for m in _RAW_BOUNDARY.finditer(buffer) if m.end() >= min_chars), None)
+            if match is None:
+                break
+            yield index, buffer[: match.end()].strip()
+            buffer = buffer[match.end():]
+    if buffer.strip():
+        yield len(tokens) - 1, buffer.strip()
+
+
+def shaped_chunks(tokens, language: str):
+    shaper = SpeechTextShaper(language)
+    for index, token in enumerate(tokens):
+        for sentence in shaper.push(token):
+            yield index, sentence
+    rest = shaper.flush()
+    if rest:
+        yield len(tokens) - 1, rest
+
+
+def simulate(chunks, args) -> dict:
+    """Timeline of TTS requests and playout for (token index, text) chunks"""
+    synth_free = 0.0
+    play_end = None
+    first_audio = None
+    stalls = 0.0
+    spoken_chars = 0
+    markup = 0
+    for index, text in chunks:
+        ready = args.llm_first_token + index * args.per_token
+        synthesized = max(ready, synth_free) + args.tts_first_byte + args.tts_per_char * len(text)
+        synth_free = synthesized
+        start = synthesized if play_end is None else max(synthesized, play_end)
+        if play_end is not None:
+            stalls += max(0.0, synthesized - play_end)
+        if first_audio is None:
+            first_audio = start
+        play_end = start + len(text) / args.chars_per_second
+        spoken_chars += len(text)
+        markup += len(SPOKEN_MARKUP.findall(text))
+    return {
+        "first_audio_s": round(first_audio or 0.0, 2),
+        "done_s": round(play_end or 0.0, 2),
+        "stall_s": round(stalls, 2),
+        "tts_chars": spoken_chars,
+        "markup_spoken": markup,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-first-token", type=float, default=0.35)
+    parser.add_argument("--per-token", type=float, default=0.02, help="seconds per LLM token")
+    parser.add_argument("--tts-first-byte", type=float, default=0.2)
+    parser.add_argument("--tts-per-char", type=float, default=0.004, help="synthesis seconds per character")
+    parser.add_argument("--chars-per-second", type=float, default=15.0, help="speaking rate")
+    args = parser.parse_args()
+
+    for language, answer in (("en", ANSWER_EN), ("ar", ANSWER_AR)):
+        tokens = tokens_of(answer)
+        print(f"[{language}] {len(tokens)} tokens, {len(answer)} chars")
+        print(f"   buffered: {simulate([(len(tokens) - 1, answer)], args)}")
+        print(f"   raw:      {simulate(raw_chunks(tokens), args)}")
+        print(f"   shaped:   {simulate(shaped_chunks(tokens, language), args)}")
+
+        started = time.perf_counter()
+        for _ in range(50):
+            list(shaped_chunks(tokens, language))
+        per_token_us = (time.perf_counter() - started) / (50 * len(tokens)) * 1e6
+        print(f"   shaper cost: {per_token_us:.1f}us per token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+
+from .logging_setup import log_event
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# The same command from the same caller again within this many seconds is a resend (RPC and data packet, double taps)
+COMMAND_DEDUPE_WINDOW = float(os.getenv("COMMAND_DEDUPE_WINDOW", "0.5"))
+# Commands waiting behind a switch past this many are dropped
+COMMAND_MAX_PENDING = int(os.getenv("COMMAND_MAX_PENDING", "32"))
+# How many command ids are remembered for de-duplication
+COMMAND_ID_MEMORY = 256
+COMMAND_LATENCY_WINDOW = 200
+
+TURN_COMMANDS = ("start_turn", "end_turn", "cancel_turn")
+SWITCH_PREFIX = "switch_to_"
+# Data packets carry an optional id after the command: "start_turn#17", "switch_to_arabic#18"
+ID_SEPARATOR = "#"
+
+
+@dataclass
+class Command:
+    """A turn or switch command from one participant, over RPC or a data packet"""
+    kind: str                 # start_turn / end_turn / cancel_turn / switch
+    identity: str = None
+    target: str = None        # agent type of a switch
+    id: str = None
+    source: str = "data"      # "rpc" or "data"
+    received: float = 0.0
+
+
+def parse_command(message: str, identity: str = None, agent_types=(), source: str = "data"):
+    """The Command in a data packet's text, or None if it is not a turn or switch command"""
+    name, _, command_id = message.partition(ID_SEPARATOR)
+    if name in TURN_COMMANDS:
+        return Command(name, identity, id=command_id or None, source=source)
+    if name.startswith(SWITCH_PREFIX) and name[len(SWITCH_PREFIX):] in agent_types:
+        return Command("switch", identity, target=name[len(SWITCH_PREFIX):], id=command_id or None, source=source)
+    return None
+
+
+def rpc_command_id(payload: str):
+    """The id of an RPC payload such as '{"id": "17"}'; any other payload carries none"""
+    if not payload:
+        return None
+    try:
+        parsed = json.loads(payload)
+    except ValueError:
+        return None
+    if isinstance(parsed, dict) and parsed.get("id") not in (None, ""):
+        return str(parsed["id"])
+    return None
+
+
+def _quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class CommandSequencer:
+    """Applies a room's turn and switch commands one at a time, in arrival order.
+
+    Flaky clients send the same command over RPC and as a data packet, or
+    several times. A command whose id the same caller already used is
+    dropped, and so is one without an id that repeats the caller's
+    previous command within COMMAND_DEDUPE_WINDOW. Commands that arrive while a switch runs wait
+    behind it instead of reaching the outgoing session. Of a burst of
+    switches only the latest target is kept: a new switch replaces the one
+    still waiting, and one to the agent being switched to is dropped. A
+    cancel_turn replaces the caller's waiting start/end. `apply(command)` is
+    awaited for each command that is left.
+    """
+
+    def __init__(self, apply, window: float = COMMAND_DEDUPE_WINDOW, max_pending: int = COMMAND_MAX_PENDING, clock=time.monotonic) -> None:
+        self.apply = apply
+        self.window = window
+        self.max_pending = max_pending
+        self.clock = clock
+        self._queue = deque()
+        self._wake = asyncio.Event()
+        self._task = None
+        self._seen_ids = OrderedDict()
+        self._last = {}
+        self.applying = None
+        self.closed = False
+        self.received = Counter()
+        self.applied = Counter()
+        self.dropped = Counter()
+        self.coalesced = Counter()
+        self.latencies = deque(maxlen=COMMAND_LATENCY_WINDOW)
+
+    @property
+    def pending(self) -> int:
+        """Commands waiting or being applied"""
+        return len(self._queue) + (self.applying is not None)
+
+    def submit_message(self, message: str, identity: str = None, agent_types=(), source: str = "data") -> bool:
+        """Sequence a data packet's command; False if the message is not one"""
+        command = parse_command(message, identity, agent_types, source)
+        if command is None:
+            return False
+        self.submit(command)
+        return True
+
+    def submit(self, command: Command) -> bool:
+        """Queue `command`; False if it was dropped as a duplicate or for lack of room"""
+        command.received = self.clock()
+        self.received[command.source] += 1
+        if self.closed:
+            return self._drop(command, "closed")
+        if self._duplicate(command):
+            return self._drop(command, "duplicate")
+
+        if command.kind == "switch":
+            self._replace(lambda waiting: waiting.kind == "switch")
+            if self.applying is not None and self.applying.kind == "switch" and self.applying.target == command.target:
+                # The room is already on its way there
+                self.coalesced["switch"] += 1
+                return True
+        elif command.kind == "cancel_turn":
+            self._replace(lambda waiting: waiting.kind in ("start_turn", "end_turn") and waiting.identity == command.identity)
+
+        if len(self._queue) >= self.max_pending:
+            return self._drop(command, "overflow")
+        self._queue.append(command)
+        self._wake.set()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return True
+
+    def _duplicate(self, command: Command) -> bool:
+        now = command.received
+        if command.id is not None:
+            # Ids are per caller: each client counts from its own start, and again after a reconnect
+            seen = (command.identity, command.id)
+            if seen in self._seen_ids:
+                return True
+            self._seen_ids[seen] = now
+            if len(self._seen_ids) > COMMAND_ID_MEMORY:
+                self._seen_ids.popitem(last=False)
+        key = (command.kind, command.target)
+        previous = self._last.get(command.identity)
+        self._last[command.identity] = (key, now)
+        # Commands with distinct ids are distinct even when they repeat quickly
+        if command.id is not None or previous is None:
+            return False
+        return previous[0] == key and now - previous[1] < self.window
+
+    def forget(self, identity: str) -> None:
+        """Drop a caller's ids, e.g. when they leave: a reconnecting client counts from 1 again"""
+        for seen in [seen for seen in self._seen_ids if seen[0] == identity]:
+            del self._seen_ids[seen]
+        self._last.pop(identity, None)
+
+    def _replace(self, matches) -> None:
+        replaced = [waiting for waiting in self._queue if matches(waiting)]
+        for waiting in replaced:
+            self._queue.remove(waiting)
+            self.coalesced[waiting.kind] += 1
+        if replaced:
+            log_event("command", "🔀 Coalesced %d waiting %s", len(replaced), replaced[0].kind)
+
+    def _drop(self, command: Command, reason: str) -> bool:
+        self.dropped[reason] += 1
+        log_event("command", "🗑️ Dropped %s from %s: %s", command.kind, command.identity, reason, source=command.source)
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            command = self.applying = self._queue.popleft()
+            self.latencies.append(self.clock() - command.received)
+            try:
+                await self.apply(command)
+                self.applied[command.kind] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Failed to apply {command.kind} from {command.identity}: {e}")
+            finally:
+                self.applying = None
+
+    async def aclose(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def metrics(self) -> dict:
+        return {
+            "received": dict(self.received),
+            "applied": dict(self.applied),
+            "dropped": dict(self.dropped),
+            "coalesced": dict(self.coalesced),
+            "pending": self.pending,
+            "wait_p50_ms": round(_quantile(self.latencies, 0.5) * 1000),
+            "wait_p95_ms": round(_quantile(self.latencies, 0.95) * 1000),
+        }
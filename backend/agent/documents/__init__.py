@@ -0,0 +1,14 @@
+from .extract import ExtractedDocument, extract_document, extract_text, finish_ocr
+from .index import Passage, SessionIndex
+from .pdf import DocumentLibrary, PdfDocument
+
+__all__ = [
+    "DocumentLibrary",
+    "ExtractedDocument",
+    "Passage",
+    "PdfDocument",
+    "SessionIndex",
+    "extract_document",
+    "extract_text",
+    "finish_ocr",
+]
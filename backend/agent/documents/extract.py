@@ -0,0 +1,270 @@
+import base64
+import io
+import json
+import logging
+from dataclasses import dataclass
+
+from .ocr import OCR_EARLY_PAGES, OcrJob, ocr_available, ocr_image
+from .pdf import LAZY_FIRST_PAGES, PdfDocument
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+WORD_MIME_TYPES = (
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+)
+
+# User-facing wording of extracted content, per agent language
+LABELS = {
+    "en": {
+        "pdf": "PDF Document: {name}\nContent:\n{text}",
+        "pdf_empty": (
+            "PDF document '{name}' received but appears to contain no extractable "
+            "text (may be image-based or encrypted)."
+        ),
+        "pdf_error": "PDF document '{name}' received but encountered error during processing: {error}",
+        "pdf_lazy": (
+            "PDF Document: {name} ({pages} pages). Only pages 1-{shown} are included below; "
+            "use the read_document_pages tool to read any other pages you need.\n"
+            "Outline:\n{outline}\nContent:\n{text}"
+        ),
+        "image": (
+            "Image file '{name}' received ({mime_type}, {size} bytes). "
+            "Base64 data available for vision analysis: {preview}...[truncated]"
+        ),
+        "image_ocr": "Image file '{name}' ({mime_type}, {size} bytes). Text recognized by OCR:\n{text}",
+        "ocr_pending": "[scanned page - text recognition still in progress]",
+        "pdf_ocr_more": "Text recognized by OCR on the remaining scanned pages of '{name}':\n{text}",
+        "word": "Word Document: {name}\nContent:\n{text}",
+        "word_empty": "Word document '{name}' received but appears to contain no text content.",
+        "word_error": "Word document '{name}' received but encountered error during processing: {error}",
+        "missing_library": (
+            "{kind} document '{name}' received ({size} bytes) but {library} "
+            "library is not available for text extraction."
+        ),
+        "json": "JSON file '{name}' content:\n{text}",
+        "unsupported": (
+            "Received file '{name}' with unsupported type '{mime_type}'. Supported types include: "
+            "text/plain, application/pdf, images, and Word documents."
+        ),
+    },
+    "ar": {
+        "pdf": "مستند PDF: {name}\nالمحتوى:\n{text}",
+        "pdf_empty": "استلمت مستند PDF '{name}' لكن ما قدرت أستخرج نص واضح (يمكن يكون صور أو مشفّر).",
+        "pdf_error": "في مشكلة أثناء معالجة ملف PDF '{name}': {error}",
+        "pdf_lazy": (
+            "مستند PDF: {name} ({pages} صفحة). مرفق هنا الصفحات 1-{shown} فقط؛ "
+            "استخدم أداة read_document_pages لقراءة أي صفحات ثانية تحتاجها.\n"
+            "الفهرس:\n{outline}\nالمحتوى:\n{text}"
+        ),
+        "image": (
+            "صورة '{name}' تم استلامها ({mime_type}, {size} بايت). "
+            "بيانات Base64 جاهزة للتحليل البصري: {preview}...[مقتطف]"
+        ),
+        "image_ocr": "صورة '{name}' ({mime_type}, {size} بايت). النص المستخرج بالتعرف الضوئي:\n{text}",
+        "ocr_pending": "[صفحة ممسوحة - استخراج النص ما زال جارٍ]",
+        "pdf_ocr_more": "النص المستخرج بالتعرف الضوئي من باقي الصفحات الممسوحة في '{name}':\n{text}",
+        "word": "مستند Word: {name}\nالمحتوى:\n{text}",
+        "word_empty": "استلمت مستند Word '{name}' لكنه بدون نص واضح.",
+        "word_error": "صار خطأ أثناء معالجة مستند Word '{name}': {error}",
+        "missing_library": "استلمت مستند {kind} '{name}' ({size} بايت) لكن مكتبة {library} غير متوفرة لاستخراج النص.",
+        "json": "ملف JSON '{name}'\nالمحتوى:\n{text}",
+        "unsupported": (
+            "استلمت ملف '{name}' بنوع غير مدعوم '{mime_type}'. الأنواع المدعومة: نصوص، PDF، صور، وملفات Word."
+        ),
+    },
+}
+
+
+def _decode_text(file_bytes: bytes):
+    try:
+        return file_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        for encoding in ["latin-1", "cp1252", "iso-8859-1"]:
+            try:
+                content = file_bytes.decode(encoding)
+                logger.info(f"📄 Decoded text file using {encoding}")
+                return content
+            except UnicodeDecodeError:
+                continue
+        logger.warning("📄 Could not decode text file with any encoding")
+        return None
+
+
+@dataclass
+class ExtractedDocument:
+    """Prompt-ready text, plus OCR still running on later scanned pages and the
+    open PDF for on-demand page reads"""
+    text: str = None
+    pending: OcrJob = None
+    document: PdfDocument = None
+
+
+def _format_pages(page_texts) -> str:
+    return "".join(f"\n--- Page {index + 1} ---\n{text}\n" for index, text in page_texts)
+
+
+def _format_outline(outline) -> str:
+    return "\n".join(
+        f"{'  ' * depth}- {title}" + (f" (p. {page})" if page else "") for depth, title, page in outline
+    )
+
+
+def _extract_pdf(file_bytes: bytes, name: str, labels: dict, language: str = "en") -> ExtractedDocument:
+    try:
+        import PyPDF2  # noqa: F401
+    except ImportError:
+        logger.error("📄 PyPDF2 not installed - cannot process PDF files")
+        return ExtractedDocument(
+            labels["missing_library"].format(kind="PDF", name=name, size=len(file_bytes), library="PyPDF2")
+        )
+
+    try:
+        document = PdfDocument(file_bytes, name, language)
+
+        # Large bundles: outline and first pages now, other ranges when the conversation asks
+        if document.lazy:
+            first_pages = document.pages(0, LAZY_FIRST_PAGES)
+            logger.info(f"📄 Lazily opened {document.page_count}-page PDF, read {len(first_pages)} pages up front")
+            return ExtractedDocument(labels["pdf_lazy"].format(
+                name=name,
+                pages=document.page_count,
+                shown=len(first_pages),
+                outline=_format_outline(document.outline()) or "-",
+                text=_format_pages(first_pages),
+            ), document=document)
+
+        page_texts = [text for _, text in document.text_layer(0, document.page_count)]
+
+        # Pages without a text layer are scans: OCR the first few now, the rest in the background
+        pending = None
+        scanned = [index for index, text in enumerate(page_texts) if not text.strip()]
+        if scanned and ocr_available():
+            job = OcrJob(file_bytes, scanned, language)
+            early = job.results(stop=OCR_EARLY_PAGES)
+            for index, text in early:
+                page_texts[index] = text
+            document.remember(early)
+            for index, _ in job.pages[OCR_EARLY_PAGES:]:
+                page_texts[index] = labels["ocr_pending"]
+            if len(scanned) > OCR_EARLY_PAGES:
+                pending = job
+            logger.info(f"📄 OCR'd {min(len(scanned), OCR_EARLY_PAGES)} of {len(scanned)} scanned pages up front")
+
+        extracted_text = _format_pages(enumerate(page_texts))
+        if any(text.strip() and text != labels["ocr_pending"] for text in page_texts):
+            logger.info(f"📄 Successfully extracted {len(extracted_text)} characters from PDF")
+            return ExtractedDocument(labels["pdf"].format(name=name, text=extracted_text), pending, document)
+        if pending:
+            pending.cancel()
+        logger.warning("📄 PDF appears to be empty or contains only images")
+        return ExtractedDocument(labels["pdf_empty"].format(name=name))
+    except Exception as e:
+        logger.error(f"📄 Error processing PDF: {e}")
+        return ExtractedDocument(labels["pdf_error"].format(name=name, error=str(e)))
+
+
+def finish_ocr(pending: OcrJob, name: str, language: str = "en"):
+    """Block until the background OCR pages are done and return them as one prompt block"""
+    labels = LABELS.get(language, LABELS["en"])
+    page_texts = [(index, text) for index, text in pending.results(start=OCR_EARLY_PAGES) if text]
+    if not page_texts:
+        return None
+    return labels["pdf_ocr_more"].format(name=name, text=_format_pages(page_texts))
+
+
+def _extract_image(file_bytes: bytes, name: str, mime_type: str, labels: dict, language: str = "en"):
+    if ocr_available():
+        try:
+            text = ocr_image(file_bytes, language)
+            if text:
+                logger.info(f"📄 OCR recognized {len(text)} characters in image")
+                return labels["image_ocr"].format(name=name, mime_type=mime_type, size=len(file_bytes), text=text)
+        except Exception as e:
+            logger.warning(f"📄 Image OCR failed: {e}")
+    image_b64 = base64.b64encode(file_bytes[:75]).decode("utf-8")
+    return labels["image"].format(name=name, mime_type=mime_type, size=len(file_bytes), preview=image_b64[:100])
+
+
+def _extract_word(file_bytes: bytes, name: str, labels: dict):
+    try:
+        from docx import Document
+    except ImportError:
+        logger.error("📄 python-docx not installed - cannot process Word documents")
+        return labels["missing_library"].format(kind="Word", name=name, size=len(file_bytes), library="python-docx")
+
+    try:
+        doc = Document(io.BytesIO(file_bytes))
+        parts = []
+        for paragraph in doc.paragraphs:
+            if paragraph.text.strip():
+                parts.append(paragraph.text + "\n")
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    if cell.text.strip():
+                        parts.append(cell.text + " ")
+                parts.append("\n")
+        extracted_text = "".join(parts)
+
+        if extracted_text.strip():
+            logger.info(f"📄 Successfully extracted {len(extracted_text)} characters from Word document")
+            return labels["word"].format(name=name, text=extracted_text)
+        logger.warning("📄 Word document appears to be empty")
+        return labels["word_empty"].format(name=name)
+    except Exception as e:
+        logger.error(f"📄 Error processing Word document: {e}")
+        return labels["word_error"].format(name=name, error=str(e))
+
+
+def extract_document(file_bytes: bytes, name: str, mime_type: str, language: str = "en") -> ExtractedDocument:
+    """Extract prompt-ready text from an uploaded file; text is None if it cannot be read.
+
+    This is CPU-bound and blocking; agents call it through a worker thread.
+    Scanned PDFs come back with their first pages OCR'd and `pending` set
+    for the rest, which `finish_ocr` collects.
+    """
+    labels = LABELS.get(language, LABELS["en"])
+    try:
+        logger.info("📄 Processing file: %s (%s)", name, mime_type)
+
+        if mime_type == "text/plain":
+            return ExtractedDocument(_decode_text(file_bytes))
+
+        if mime_type == "application/pdf":
+            return _extract_pdf(file_bytes, name, labels, language)
+
+        if mime_type.startswith("image/"):
+            return ExtractedDocument(_extract_image(file_bytes, name, mime_type, labels, language))
+
+        if mime_type in WORD_MIME_TYPES:
+            return ExtractedDocument(_extract_word(file_bytes, name, labels))
+
+        if mime_type == "application/json":
+            try:
+                content = json.loads(file_bytes.decode("utf-8"))
+                return ExtractedDocument(labels["json"].format(
+                    name=name, text=json.dumps(content, indent=2, ensure_ascii=(language != "ar"))
+                ))
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                logger.warning(f"📄 Failed to parse JSON: {e}")
+                return ExtractedDocument()
+
+        logger.warning("📄 Unsupported file type: %s", mime_type)
+        return ExtractedDocument(labels["unsupported"].format(name=name, mime_type=mime_type))
+    except Exception as e:
+        logger.error("❌ Error processing file content: %s", e, exc_info=True)
+        return ExtractedDocument()
+
+
+def extract_text(file_bytes: bytes, name: str, mime_type: str, language: str = "en"):
+    """Extract prompt-ready text from an uploaded file, or None if it cannot be read.
+
+    Background OCR of later scanned pages is waited for and appended.
+    """
+    document = extract_document(file_bytes, name, mime_type, language)
+    if document.pending is None or document.text is None:
+        return document.text
+    more = finish_ocr(document.pending, name, language)
+    return document.text + ("\n\n" + more if more else "")
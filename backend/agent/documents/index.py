@@ -0,0 +1,252 @@
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Directory for per-user indexes; unset keeps indexes in memory for the session only
+DOCUMENT_INDEX_DIR = os.getenv("DOCUMENT_INDEX_DIR")
+PASSAGE_WORDS = 120
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_ARABIC_DIACRITICS = re.compile("[\u064B-\u0652\u0670\u0640]")  # harakat, dagger alef, tatweel
+_ARABIC_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ة": "ه", "ؤ": "و", "ئ": "ي",
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+})
+# Definite article with attached conjunctions/prepositions, longest first
+_ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "i you he she we they my your our their me him her them do does did not no can could would should "
+    "في من على الى عن مع هذا هذه ذلك التي الذي او ان ما لا هو هي كان".split()
+)
+
+
+def _fold_arabic(token: str) -> str:
+    token = token.translate(_ARABIC_FOLD)
+    for prefix in _ARABIC_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text: str):
+    """Lowercased word tokens; Arabic is folded (alef/ya/ta marbuta, no diacritics, no 'al-')"""
+    tokens = []
+    # Harakat and tatweel are not \w; left in, they would split a word into letters
+    for token in _TOKEN.findall(_ARABIC_DIACRITICS.sub("", text.lower())):
+        if "\u0600" <= token[0] <= "\u06FF":
+            token = _fold_arabic(token)
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+@dataclass
+class Passage:
+    document: str
+    page: int
+    text: str
+    score: float = 0.0
+
+
+def split_passages(text: str, words: int = PASSAGE_WORDS):
+    """Split page text into passages of about `words` words"""
+    parts = text.split()
+    for start in range(0, len(parts), words):
+        yield " ".join(parts[start:start + words])
+
+
+class SessionIndex:
+    """In-memory BM25 index over the passages of every document uploaded in a session.
+
+    Postings map each term to (passage id, term frequency) pairs, so a query
+    only touches the passages that share a term with it.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._passages = []         # passage id -> (document, page, text, length); None once removed
+        self._postings = defaultdict(list)
+        self._documents = defaultdict(set)  # document name -> indexed page numbers
+        self._owners = {}                   # document name -> uploader identity
+        self._total_length = 0
+        self._live = 0
+        self._loaded_users = set()
+        self._norms = []
+        self._norms_version = None
+        # Uploads index from worker threads while the event loop searches
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._live
+
+    def documents(self):
+        return list(self._documents)
+
+    def has_page(self, document: str, page: int) -> bool:
+        return page in self._documents.get(document, ())
+
+    def add_pages(self, document: str, pages, owner: str = None) -> int:
+        """Index [(page number, text)] of a document; pages already indexed are skipped"""
+        with self._lock:
+            if owner:
+                self._owners[document] = owner
+            return self._add_pages(document, pages)
+
+    def _add_pages(self, document: str, pages) -> int:
+        added = 0
+        for page, text in pages:
+            if not text or page in self._documents[document]:
+                continue
+            self._documents[document].add(page)
+            for passage in split_passages(text):
+                counts = Counter(tokenize(passage))
+                if not counts:
+                    continue
+                passage_id = len(self._passages)
+                length = sum(counts.values())
+                self._passages.append((document, page, passage, length))
+                for term, tf in counts.items():
+                    self._postings[term].append((passage_id, tf))
+                self._total_length += length
+                self._live += 1
+                added += 1
+        return added
+
+    def remove_document(self, document: str) -> None:
+        """Forget a document, e.g. before indexing a re-upload under the same name"""
+        with self._lock:
+            self._remove_document(document)
+
+    def _remove_document(self, document: str) -> None:
+        if document not in self._documents:
+            return
+        removed = set()
+        for passage_id, entry in enumerate(self._passages):
+            if entry is not None and entry[0] == document:
+                removed.add(passage_id)
+                self._total_length -= entry[3]
+                self._passages[passage_id] = None
+        for term in list(self._postings):
+            postings = [p for p in self._postings[term] if p[0] not in removed]
+            if postings:
+                self._postings[term] = postings
+            else:
+                del self._postings[term]
+        self._live -= len(removed)
+        del self._documents[document]
+        self._owners.pop(document, None)
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K):
+        """Top-k passages for `query` by BM25"""
+        with self._lock:
+            return self._search(query, k)
+
+    def _length_norms(self):
+        """Per-passage BM25 length normalization, recomputed only when the index changed"""
+        if self._norms_version != (self._live, self._total_length):
+            average_length = self._total_length / self._live
+            k1, b = self.k1, self.b
+            self._norms = [
+                k1 * (1 - b + b * entry[3] / average_length) if entry is not None else 0.0
+                for entry in self._passages
+            ]
+            self._norms_version = (self._live, self._total_length)
+        return self._norms
+
+    def _search(self, query: str, k: int):
+        if not self._live:
+            return []
+        norms = self._length_norms()
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (self._live - len(postings) + 0.5) / (len(postings) + 0.5))
+            weight = idf * (self.k1 + 1)
+            for passage_id, tf in postings:
+                scores[passage_id] += weight * tf / (tf + norms[passage_id])
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            Passage(self._passages[pid][0], self._passages[pid][1], self._passages[pid][2], round(score, 3))
+            for pid, score in best
+        ]
+
+    # ---- Per-user persistence ------------------------------------------------
+
+    @staticmethod
+    def _user_path(identity: str, directory: str):
+        # Keyed by the exact identity: squashing it to safe characters let "a@b" and "a_b" share a file
+        digest = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+        return os.path.join(directory, f"{digest}.json.gz")
+
+    def export_pages(self, owner: str = None) -> dict:
+        """{document: {page: text}} of the indexed documents, or only those `owner` uploaded"""
+        pages = defaultdict(lambda: defaultdict(list))
+        with self._lock:
+            for entry in self._passages:
+                if entry is not None and (owner is None or self._owners.get(entry[0]) == owner):
+                    pages[entry[0]][entry[1]].append(entry[2])
+        return {
+            document: {str(page): " ".join(parts) for page, parts in by_page.items()}
+            for document, by_page in pages.items()
+        }
+
+    def owner(self, document: str):
+        return self._owners.get(document)
+
+    def load_user(self, identity: str, directory: str = None) -> int:
+        """Merge a user's persisted documents into this index, once per identity"""
+        directory = directory or DOCUMENT_INDEX_DIR
+        if not directory or not identity or identity in self._loaded_users:
+            return 0
+        self._loaded_users.add(identity)
+        path = self._user_path(identity, directory)
+        if not os.path.exists(path):
+            return 0
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                saved = json.load(fh)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load document index for {identity}: {e}")
+            return 0
+        if saved.get("identity", identity) != identity:
+            logger.warning(f"⚠️ Document index at {path} belongs to another user, not loading it for {identity}")
+            return 0
+        added = 0
+        for document, pages in saved.get("documents", {}).items():
+            added += self.add_pages(document, [(int(page), text) for page, text in pages.items()], owner=identity)
+        logger.info(f"📚 Loaded {len(saved.get('documents', {}))} documents ({added} passages) for {identity}")
+        return added
+
+    def save_user(self, identity: str, directory: str = None) -> None:
+        """Persist the documents `identity` uploaded (page text only; postings are rebuilt on load)"""
+        directory = directory or DOCUMENT_INDEX_DIR
+        if not directory or not identity:
+            return
+        saved = {"identity": identity, "documents": self.export_pages(identity)}
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = self._user_path(identity, directory)
+            with gzip.open(path + ".tmp", "wt", encoding="utf-8") as fh:
+                json.dump(saved, fh, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save document index for {identity}: {e}")
@@ -0,0 +1,185 @@
+import concurrent.futures
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Tesseract language packs per agent language; Arabic filings often quote English
+OCR_LANGUAGES = {
+    "en": "eng",
+    "ar": "ara+eng",
+}
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages OCR'd before the first reply; the rest finish while the agent is answering
+OCR_EARLY_PAGES = int(os.getenv("OCR_EARLY_PAGES", "3"))
+OCR_CACHE_PAGES = int(os.getenv("OCR_CACHE_PAGES", "512"))
+
+
+@lru_cache(maxsize=1)
+def _available_languages():
+    """Installed tesseract language packs, or None when OCR cannot run here"""
+    try:
+        import pytesseract
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        logger.warning("📄 pytesseract/Pillow not installed - OCR disabled")
+        return None
+    try:
+        return frozenset(pytesseract.get_languages(config=""))
+    except Exception as e:
+        logger.warning(f"📄 Tesseract binary not available - OCR disabled: {e}")
+        return None
+
+
+def ocr_available() -> bool:
+    return _available_languages() is not None
+
+
+def ocr_languages(language: str) -> str:
+    """Tesseract `lang` argument for an agent language, limited to installed packs"""
+    wanted = OCR_LANGUAGES.get(language, OCR_LANGUAGES["en"]).split("+")
+    installed = _available_languages() or frozenset()
+    usable = [lang for lang in wanted if lang in installed]
+    return "+".join(usable or ["eng"])
+
+
+class PageCache:
+    """LRU of OCR'd page text keyed by (document hash, page, languages)"""
+
+    def __init__(self, max_pages: int = OCR_CACHE_PAGES) -> None:
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            text = self._pages.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text: str) -> None:
+        with self._lock:
+            self._pages[key] = text
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+
+PAGE_CACHE = PageCache()
+
+_executor = None
+_executor_lock = threading.Lock()
+_readers = threading.local()
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    # pytesseract runs tesseract as a subprocess, so threads give real parallelism
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, OCR_WORKERS), thread_name_prefix="ocr"
+            )
+        return _executor
+
+
+def document_id(file_bytes: bytes) -> str:
+    return hashlib.sha1(file_bytes).hexdigest()
+
+
+def _ocr_image(image_bytes: bytes, lang: str) -> str:
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # Grayscale is enough for tesseract and halves the pixels it has to read
+        return pytesseract.image_to_string(image.convert("L"), lang=lang).strip()
+
+
+def _pdf_reader(doc_id: str, file_bytes: bytes):
+    """One PdfReader per worker thread and document; readers are not thread-safe"""
+    import PyPDF2
+
+    cached = getattr(_readers, "entry", None)
+    if cached is None or cached[0] != doc_id:
+        cached = (doc_id, PyPDF2.PdfReader(io.BytesIO(file_bytes)))
+        _readers.entry = cached
+    return cached[1]
+
+
+def _ocr_pdf_page(doc_id: str, file_bytes: bytes, page_index: int, lang: str) -> str:
+    key = (doc_id, page_index, lang)
+    text = PAGE_CACHE.get(key)
+    if text is not None:
+        return text
+
+    page = _pdf_reader(doc_id, file_bytes).pages[page_index]
+    parts = []
+    try:
+        images = list(page.images)
+    except Exception as e:
+        logger.warning(f"📄 Could not read images on page {page_index + 1}: {e}")
+        images = []
+    for image in images:
+        try:
+            parts.append(_ocr_image(image.data, lang))
+        except Exception as e:
+            logger.warning(f"📄 OCR failed for an image on page {page_index + 1}: {e}")
+    text = "\n".join(part for part in parts if part)
+    PAGE_CACHE.put(key, text)
+    return text
+
+
+class OcrJob:
+    """OCR of a set of PDF pages running on the shared pool, in page order.
+
+    Pages are submitted lowest first, so the first pages finish first and can be
+    used before the whole document is done.
+    """
+
+    def __init__(self, file_bytes: bytes, page_indices, language: str) -> None:
+        self.doc_id = document_id(file_bytes)
+        self.lang = ocr_languages(language)
+        executor = _get_executor()
+        self.pages = [
+            (index, executor.submit(_ocr_pdf_page, self.doc_id, file_bytes, index, self.lang))
+            for index in sorted(page_indices)
+        ]
+
+    def results(self, start: int = 0, stop: int = None, timeout: float = None):
+        """Wait for pages[start:stop] and return [(page_index, text)]"""
+        return [(index, future.result(timeout=timeout)) for index, future in self.pages[start:stop]]
+
+    def done(self) -> bool:
+        return all(future.done() for _, future in self.pages)
+
+    def cancel(self) -> None:
+        for _, future in self.pages:
+            future.cancel()
+
+
+def ocr_image(file_bytes: bytes, language: str = "en") -> str:
+    """OCR an uploaded image on the shared pool, with the page cache"""
+    lang = ocr_languages(language)
+    key = (document_id(file_bytes), 0, lang)
+    text = PAGE_CACHE.get(key)
+    if text is None:
+        text = _get_executor().submit(_ocr_image, file_bytes, lang).result()
+        PAGE_CACHE.put(key, text)
+    return text
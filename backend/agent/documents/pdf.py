@@ -0,0 +1,190 @@
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .ocr import OcrJob, document_id, ocr_available
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# PDFs longer than this are read lazily: page count, outline and the first pages only
+LAZY_PDF_PAGES = int(os.getenv("LAZY_PDF_PAGES", "30"))
+LAZY_FIRST_PAGES = int(os.getenv("LAZY_FIRST_PAGES", "5"))
+# Largest range one read_document_pages call may pull into the conversation
+MAX_PAGES_PER_READ = int(os.getenv("MAX_PAGES_PER_READ", "20"))
+MAX_DOCUMENTS = int(os.getenv("MAX_DOCUMENTS", "8"))
+# Total size of the PDFs one room keeps open; the oldest are closed past this
+MAX_LIBRARY_BYTES = int(os.getenv("MAX_LIBRARY_MB", "200")) * 1024 * 1024
+
+
+class PdfDocument:
+    """An uploaded PDF whose pages are extracted on demand and cached.
+
+    Opening one only parses the cross-reference table and page tree; page
+    text is decoded the first time a range asks for it. Pages without a
+    text layer are OCR'd when OCR is available. The file itself is spilled
+    to an anonymous temp file, so a large bundle does not stay in memory
+    for the rest of the room.
+    """
+
+    def __init__(self, file_bytes: bytes, name: str, language: str = "en") -> None:
+        import PyPDF2
+
+        self.name = name
+        self.language = language
+        self.size = len(file_bytes)
+        self.doc_id = document_id(file_bytes)
+        self._file = tempfile.TemporaryFile(prefix="pdf-")
+        self._file.write(file_bytes)
+        self._file.seek(0)
+        self._reader = PyPDF2.PdfReader(self._file)
+        self.page_count = len(self._reader.pages)
+        self._texts = {}
+        # PdfReader shares one stream, so page decoding is serialized
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"PdfDocument({self.name!r}, {self.page_count} pages, {len(self._texts)} cached)"
+
+    @property
+    def lazy(self) -> bool:
+        return self.page_count > LAZY_PDF_PAGES
+
+    def outline(self, limit: int = 40):
+        """[(depth, title, page number)] from the PDF bookmarks, best effort"""
+        entries = []
+
+        def walk(items, depth):
+            for item in items:
+                if len(entries) >= limit:
+                    return
+                if isinstance(item, list):
+                    walk(item, depth + 1)
+                    continue
+                try:
+                    page = self._reader.get_destination_page_number(item) + 1
+                except Exception:
+                    page = None
+                entries.append((depth, getattr(item, "title", str(item)), page))
+
+        try:
+            with self._lock:
+                walk(self._reader.outline, 0)
+        except Exception as e:
+            logger.warning(f"📄 Could not read outline of {self.name}: {e}")
+        return entries
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def close(self) -> None:
+        """Drop the spilled file; pages decoded so far stay readable"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _file_bytes(self) -> bytes:
+        with self._lock:
+            if self._file is None:
+                return b""
+            self._file.seek(0)
+            return self._file.read()
+
+    def text_layer(self, start: int, stop: int):
+        """[(page_index, text)] for pages[start:stop] from the PDF text layer only"""
+        stop = min(stop, self.page_count)
+        with self._lock:
+            for index in range(max(start, 0), stop):
+                if index not in self._texts:
+                    if self._file is None:
+                        self._texts[index] = ""
+                        continue
+                    self._texts[index] = self._reader.pages[index].extract_text() or ""
+            return [(index, self._texts[index]) for index in range(max(start, 0), stop)]
+
+    def pages(self, start: int, stop: int):
+        """[(page_index, text)] for pages[start:stop], OCR'ing scanned pages"""
+        page_texts = self.text_layer(start, stop)
+        scanned = [index for index, text in page_texts if not text.strip()]
+        if scanned and ocr_available() and not self.closed:
+            results = dict(OcrJob(self._file_bytes(), scanned, self.language).results())
+            with self._lock:
+                self._texts.update(results)
+            page_texts = [(index, results.get(index, text)) for index, text in page_texts]
+        return page_texts
+
+    def remember(self, page_texts) -> None:
+        """Cache page text produced elsewhere, e.g. OCR run on the whole upload"""
+        with self._lock:
+            self._texts.update((index, text) for index, text in page_texts if text)
+
+    def extracted_pages(self):
+        """[(page number, text)] of every page decoded so far"""
+        with self._lock:
+            return [(index + 1, text) for index, text in sorted(self._texts.items())]
+
+    def read(self, first_page: int, last_page: int) -> str:
+        """Text of 1-based pages first_page..last_page, capped at MAX_PAGES_PER_READ"""
+        first_page = max(first_page, 1)
+        last_page = min(last_page, self.page_count, first_page + MAX_PAGES_PER_READ - 1)
+        if first_page > last_page:
+            return f"'{self.name}' has {self.page_count} pages."
+        page_texts = self.pages(first_page - 1, last_page)
+        return "".join(f"\n--- Page {index + 1} ---\n{text}\n" for index, text in page_texts)
+
+
+class DocumentLibrary:
+    """Recently uploaded PDFs kept open for on-demand page reads, oldest evicted first.
+
+    Bounded by count and by the total size of the open files; the newest
+    document is always kept.
+    """
+
+    def __init__(self, max_documents: int = MAX_DOCUMENTS, max_bytes: int = MAX_LIBRARY_BYTES) -> None:
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._documents = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def size(self) -> int:
+        return sum(getattr(document, "size", 0) for document in self._documents.values())
+
+    def add(self, document: PdfDocument) -> None:
+        previous = self._documents.pop(document.name, None)
+        if previous is not None and previous is not document:
+            previous.close()
+        self._documents[document.name] = document
+        while len(self._documents) > 1 and (len(self._documents) > self.max_documents or self.size > self.max_bytes):
+            evicted_name, evicted = self._documents.popitem(last=False)
+            evicted.close()
+            logger.info(f"📄 Evicted {evicted_name} from the document library")
+
+    def get(self, name: str = None):
+        """Look a document up by file name, exactly or by part of it"""
+        if name in self._documents:
+            return self._documents[name]
+        lowered = (name or "").strip().lower()
+        if not lowered:
+            return None
+        for document in reversed(self._documents.values()):
+            if document.name.lower() == lowered:
+                return document
+        for document in reversed(self._documents.values()):
+            if lowered in document.name.lower():
+                return document
+        return None
+
+    def close(self) -> None:
+        for document in self._documents.values():
+            document.close()
+        self._documents.clear()
+
+    def names(self):
+        return list(self._documents)
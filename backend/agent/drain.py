@@ -0,0 +1,224 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import signal
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+from .session_store import SESSION_STORE_DIR
+
+try:
+    from livekit import api as livekit_api
+except ImportError:  # livekit-api is only needed to hand rooms to the next worker
+    livekit_api = None
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Where drained rooms leave their snapshot for the next worker; must be shared by old and new workers
+ROOM_SNAPSHOT_DIR = os.getenv("ROOM_SNAPSHOT_DIR") or SESSION_STORE_DIR
+# Older snapshots are from a consultation that ended, not a migration; the room starts fresh
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "600"))
+SNAPSHOT_CHAT_ITEMS = int(os.getenv("SNAPSHOT_CHAT_ITEMS", "100"))
+# How long a room may take to finish its current turn before it is snapshotted anyway
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+# Sent to the worker process to start draining (e.g. by the deploy before SIGTERM)
+DRAIN_SIGNAL = os.getenv("DRAIN_SIGNAL", "SIGUSR1")
+DRAIN_POLL = 0.05
+# The worker's agent_name; an explicitly dispatched agent is not re-dispatched when its job ends
+AGENT_NAME = os.getenv("LIVEKIT_AGENT_NAME", "agent-HAAKEEM")
+
+
+@dataclass
+class RoomSnapshot:
+    """What a replacement worker needs to carry on a room without re-processing it"""
+    room: str
+    agent_type: str
+    chat: list = field(default_factory=list)        # [[role, text]] of the active agent's context
+    documents: dict = field(default_factory=dict)   # {document: {"owner": ..., "pages": {page: text}}}
+    saved_at: float = 0.0
+
+
+def _snapshot_path(room: str, directory: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", room)[:100]
+    return os.path.join(directory, f"{safe}.snapshot.json.gz")
+
+
+def save_snapshot(snapshot: RoomSnapshot, directory: str = None) -> bool:
+    directory = directory or ROOM_SNAPSHOT_DIR
+    if not directory:
+        logger.warning(f"⚠️ No ROOM_SNAPSHOT_DIR or SESSION_STORE_DIR; {snapshot.room} cannot move to another worker")
+        return False
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = _snapshot_path(snapshot.room, directory)
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as fh:
+            json.dump(asdict(snapshot), fh, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not snapshot {snapshot.room}: {e}")
+        return False
+
+
+def load_snapshot(room: str, directory: str = None, max_age: float = SNAPSHOT_MAX_AGE):
+    """The room's snapshot if a drained worker left a recent one; it is consumed either way"""
+    directory = directory or ROOM_SNAPSHOT_DIR
+    if not directory:
+        return None
+    path = _snapshot_path(room, directory)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            snapshot = RoomSnapshot(**json.load(fh))
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read snapshot of {room}: {e}")
+        snapshot = None
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    if snapshot is not None and time.time() - snapshot.saved_at > max_age:
+        logger.info(f"📦 Ignoring snapshot of {room} from {time.time() - snapshot.saved_at:.0f}s ago")
+        return None
+    return snapshot
+
+
+def chat_items(chat_ctx, limit: int = SNAPSHOT_CHAT_ITEMS):
+    """[[role, text]] of the user and assistant messages in a chat context"""
+    items = []
+    for item in getattr(chat_ctx, "items", []):
+        role = getattr(item, "role", None)
+        text = getattr(item, "text_content", None)
+        if role in ("user", "assistant") and text:
+            items.append([role, text])
+    return items[-limit:]
+
+
+async def restore_chat(agent, items) -> int:
+    """Seed a fresh agent with the chat context its predecessor on the old worker had"""
+    if not items or not hasattr(agent, "update_chat_ctx"):
+        return 0
+    chat_ctx = agent.chat_ctx.copy()
+    for role, text in items:
+        chat_ctx.add_message(role=role, content=text)
+    await agent.update_chat_ctx(chat_ctx)
+    return len(items)
+
+
+async def request_dispatch(room: str, agent_name: str = AGENT_NAME) -> bool:
+    """Ask LiveKit to dispatch `agent_name` to `room` again; the draining worker rejects it, another takes it"""
+    if livekit_api is None:
+        logger.warning(f"⚠️ livekit-api not installed; {room} will not be dispatched to another worker")
+        return False
+    # Reads LIVEKIT_URL, LIVEKIT_API_KEY and LIVEKIT_API_SECRET like the token service
+    lkapi = livekit_api.LiveKitAPI()
+    try:
+        await lkapi.agent_dispatch.create_dispatch(
+            livekit_api.CreateAgentDispatchRequest(agent_name=agent_name, room=room)
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not dispatch {agent_name} to {room}: {e}")
+        return False
+    finally:
+        await lkapi.aclose()
+
+
+class WorkerDrain:
+    """Worker-wide drain switch and the rooms it has to hand over.
+
+    Once `begin()` is called, `handle_request` turns new jobs away and
+    every registered room drains on its own event loop (rooms run in
+    threads with JobExecutorType.THREAD): it finishes the current turn,
+    writes its snapshot, asks LiveKit to dispatch the agent to the room
+    again through `dispatch(room)`, and ends its job. Rooms get their
+    agent from an explicit dispatch, which LiveKit does not repeat on its
+    own once the job ends.
+    """
+
+    def __init__(self, dispatch=request_dispatch) -> None:
+        self.dispatch = dispatch
+        self.draining = False
+        self.started = None
+        self._rooms = {}
+        self._lock = threading.Lock()
+        self.drained = 0
+        self.dispatched = 0
+        self.drain_seconds = []
+
+    def register(self, runtime, shutdown=None) -> None:
+        """`shutdown()` ends the room's job once it has drained"""
+        with self._lock:
+            self._rooms[id(runtime)] = (runtime, asyncio.get_running_loop(), shutdown)
+            draining = self.draining
+        if draining:
+            # Started while the drain was already under way; hand it straight over
+            asyncio.ensure_future(self._drain_room(runtime, shutdown, DRAIN_TIMEOUT))
+
+    def unregister(self, runtime) -> None:
+        with self._lock:
+            self._rooms.pop(id(runtime), None)
+
+    @property
+    def rooms(self) -> int:
+        with self._lock:
+            return len(self._rooms)
+
+    def begin(self, timeout: float = DRAIN_TIMEOUT):
+        """Stop taking jobs and drain every room; safe to call from a signal handler or any thread"""
+        with self._lock:
+            if self.draining:
+                return []
+            self.draining = True
+            self.started = time.perf_counter()
+            rooms = list(self._rooms.values())
+        logger.warning(f"🚰 Draining worker: {len(rooms)} rooms to hand over, no new jobs")
+        return [
+            asyncio.run_coroutine_threadsafe(self._drain_room(runtime, shutdown, timeout), loop)
+            for runtime, loop, shutdown in rooms
+        ]
+
+    async def _drain_room(self, runtime, shutdown, timeout: float) -> None:
+        try:
+            seconds = await runtime.drain(timeout)
+            with self._lock:
+                self.drained += 1
+                self.drain_seconds.append(seconds)
+        except Exception as e:
+            logger.error(f"❌ Failed to drain room {getattr(runtime.room, 'name', 'room')}: {e}")
+        # Before the job ends, so the caller is never left in a room no worker will join
+        if self.dispatch is not None and await self.dispatch(getattr(runtime.room, "name", "room")):
+            with self._lock:
+                self.dispatched += 1
+        if shutdown is not None:
+            result = shutdown()
+            if asyncio.iscoroutine(result):
+                await result
+
+    def install_signal_handler(self, name: str = DRAIN_SIGNAL) -> bool:
+        """Drain on `name` (SIGUSR1 by default); call from the main thread before the worker starts"""
+        signum = getattr(signal, name, None)
+        if signum is None:
+            logger.warning(f"⚠️ Unknown drain signal {name}")
+            return False
+        signal.signal(signum, lambda *_: self.begin())
+        return True
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "draining": self.draining,
+                "rooms": len(self._rooms),
+                "drained": self.drained,
+                "dispatched": self.dispatched,
+                "drain_max_s": round(max(self.drain_seconds, default=0.0), 2),
+            }
+
+
+DRAIN = WorkerDrain()
@@ -0,0 +1,181 @@
+import inspect
+import logging
+import time
+from collections import deque
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Whether this livekit-agents takes new endpointing delays on a running session; None until first checked
+_live_updates = None
+
+
+def _supports_live_updates(session) -> bool:
+    """AgentSession.update_options(min_endpointing_delay=...) exists; checked once per worker"""
+    global _live_updates
+    if _live_updates is None:
+        update = getattr(session, "update_options", None)
+        try:
+            parameters = inspect.signature(update).parameters if callable(update) else {}
+        except (TypeError, ValueError):
+            parameters = {}
+        _live_updates = "min_endpointing_delay" in parameters or any(
+            parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()
+        )
+        if not _live_updates:
+            logger.warning(
+                "⚠️ livekit-agents cannot change endpointing delays on a running session; "
+                "adaptive delays take effect when the next session starts"
+            )
+    return _live_updates
+
+
+def _quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class AdaptiveEndpointing:
+    """Learns how long a speaker pauses mid-turn and derives endpointing delays from it.
+
+    Quick talkers get a shorter wait after they stop speaking; hesitant ones
+    get a longer one. A reply the user talks over shortly after it started is
+    counted as a false cutoff and widens the delay. Pauses longer than the
+    delay in effect end the turn and are never seen as pauses, so the delay
+    only shrinks when the pauses seen clearly stop short of it.
+    """
+
+    def __init__(
+        self,
+        min_delay: float = 3.3,
+        max_delay: float = 5.0,
+        floor: float = 0.6,
+        ceiling: float = 6.0,
+        quantile: float = 0.9,
+        margin: float = 0.25,
+        window: int = 50,
+        min_samples: int = 5,
+        cutoff_window: float = 2.0,
+    ) -> None:
+        self.default_min_delay = min_delay
+        self.default_max_delay = max_delay
+        self.floor = floor
+        self.ceiling = ceiling
+        self.quantile = quantile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.cutoff_window = cutoff_window
+        self.pauses = deque(maxlen=window)
+        self.penalty = 0.0
+        self.turns = 0
+        self.false_cutoffs = 0
+        self.applied = None  # delays last pushed into a running session
+
+        self._in_effect = None  # min delay last handed out, which cuts off the pauses seen next
+        self._silence_started = None
+        self._reply_started = None
+        self._sessions = []
+
+    # ---- Statistics ----------------------------------------------------------
+
+    @property
+    def in_effect(self) -> float:
+        return self.default_min_delay if self._in_effect is None else self._in_effect
+
+    def observe_pause(self, seconds: float, limit: float = None) -> None:
+        """A pause after which the same speaker continued their turn; `limit` is the delay that would have ended it"""
+        if seconds > 0:
+            self.pauses.append((seconds, self.in_effect if limit is None else limit))
+
+    def observe_false_cutoff(self, seconds: float) -> None:
+        """The agent replied after a pause of this length but the user wasn't done"""
+        self.false_cutoffs += 1
+        # Cut off, so the real pause was at least this long
+        self.observe_pause(seconds, limit=seconds)
+        self.penalty = min(self.penalty + 0.2, 1.0)
+
+    def observe_turn_end(self) -> None:
+        """A turn ended and the reply was not talked over"""
+        self.turns += 1
+        self.penalty = max(self.penalty - 0.05, 0.0)
+
+    def delays(self):
+        """Current (min_endpointing_delay, max_endpointing_delay); the caller puts them in effect"""
+        if len(self.pauses) < self.min_samples:
+            self._in_effect = self.default_min_delay
+            return self.default_min_delay, self.default_max_delay
+        learned = _quantile([seconds for seconds, _ in self.pauses], self.quantile) + self.margin + self.penalty
+        # Pauses that reached their cut-off may have gone on longer; when more of them did than
+        # the quantile allows for, the data cannot tell that a shorter delay is safe
+        censored = sum(1 for seconds, limit in self.pauses if seconds >= limit - self.margin)
+        if learned < self.in_effect and censored > len(self.pauses) * (1 - self.quantile):
+            learned = self.in_effect
+        min_delay = min(max(learned, self.floor), self.ceiling)
+        spread = self.default_max_delay - self.default_min_delay
+        max_delay = min(min_delay + spread, max(self.ceiling, min_delay))
+        self._in_effect = round(min_delay, 3)
+        return round(min_delay, 3), round(max_delay, 3)
+
+    # ---- Session wiring ------------------------------------------------------
+
+    def on_user_state(self, new_state: str, now: float = None) -> None:
+        now = time.monotonic() if now is None else now
+        if new_state == "speaking":
+            if self._silence_started is not None:
+                gap = now - self._silence_started
+                if self._reply_started is None:
+                    self.observe_pause(gap)
+                elif now - self._reply_started <= self.cutoff_window:
+                    self.observe_false_cutoff(gap)
+                    self._apply_all()
+            self._silence_started = None
+            self._reply_started = None
+        elif new_state == "listening":
+            self._silence_started = now
+
+    def on_agent_state(self, new_state: str, now: float = None) -> None:
+        now = time.monotonic() if now is None else now
+        if new_state == "thinking" and self._silence_started is not None and self._reply_started is None:
+            self._reply_started = now
+        elif new_state == "listening" and self._reply_started is not None:
+            # Reply finished without the user cutting back in
+            self.observe_turn_end()
+            self._silence_started = None
+            self._reply_started = None
+            self._apply_all()
+
+    def attach(self, session) -> None:
+        """Follow a session's user/agent state events and keep its delays current"""
+        self._sessions = [session]
+        self._silence_started = None
+        self._reply_started = None
+        session.on("user_state_changed", lambda ev: self.on_user_state(ev.new_state))
+        session.on("agent_state_changed", lambda ev: self.on_agent_state(ev.new_state))
+
+    def detach(self, session) -> None:
+        """Stop pushing delays into a session that is closing"""
+        self._sessions = [attached for attached in self._sessions if attached is not session]
+
+    def _apply_all(self) -> None:
+        for session in self._sessions:
+            self.apply(session)
+
+    def apply(self, session) -> bool:
+        """Push the current delays into a running session; False if they were not applied"""
+        if not _supports_live_updates(session):
+            # The session keeps the delays it started with; the next one gets the learned ones
+            return False
+        min_delay, max_delay = self.delays()
+        try:
+            session.update_options(min_endpointing_delay=min_delay, max_endpointing_delay=max_delay)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not update endpointing delays: {e}")
+            return False
+        self.applied = (min_delay, max_delay)
+        logger.debug(f"⏱️ Endpointing delays now {min_delay}s/{max_delay}s")
+        return True
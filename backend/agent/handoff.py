@@ -0,0 +1,156 @@
+import json
+import re
+from collections import Counter
+
+from .documents.index import tokenize
+
+
+# Legal concepts recognised in either language, mapped to one language-neutral tag
+CONCEPTS = {
+    "lease": ("lease", "rent", "rental", "tenancy", "إيجار", "ايجار", "الإيجار", "الايجار", "أجرة", "اجرة"),
+    "deposit": ("deposit", "تأمين", "التأمين", "عربون"),
+    "termination": ("terminate", "termination", "cancel", "إنهاء", "انهاء", "فسخ", "إلغاء"),
+    "eviction": ("evict", "eviction", "إخلاء", "اخلاء", "طرد"),
+    "landlord": ("landlord", "lessor", "owner", "المالك", "مالك", "المؤجر", "مؤجر"),
+    "tenant": ("tenant", "lessee", "renter", "المستأجر", "مستأجر"),
+    "employment": ("employer", "employee", "salary", "job", "fired", "dismissal", "عمل", "راتب", "موظف", "فصل"),
+    "contract": ("contract", "agreement", "clause", "عقد", "العقد", "اتفاقية", "بند"),
+    "court": ("court", "lawsuit", "sue", "judge", "hearing", "محكمة", "المحكمة", "قضية", "دعوى", "قاضي"),
+    "payment": ("payment", "paid", "owe", "debt", "refund", "دفع", "مبلغ", "دين", "استرداد"),
+    "notice": ("notice", "notify", "warning", "إشعار", "اشعار", "إنذار", "انذار"),
+    "damages": ("damage", "damages", "compensation", "تعويض", "ضرر", "أضرار"),
+}
+# One pass over the words with a dict lookup; an alternation regex per tag was ~20ms per hand-off
+_CONCEPT_WORDS = {word.lower(): tag for tag, words in CONCEPTS.items() for word in words}
+_WORD = re.compile(r"\w+")
+
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+_AMOUNT = re.compile(
+    r"(?:(?:\$|USD|SAR|OMR|AED|ريال|دولار|درهم)\s?\d[\d,.]*|\d[\d,.]*\s?(?:\$|USD|SAR|OMR|AED|riyals?|dollars?|ريال|دولار|درهم))",
+    re.IGNORECASE,
+)
+_DURATION = re.compile(
+    r"\d+\s?(?:days?|weeks?|months?|years?|يوم|أيام|ايام|أسبوع|اسبوع|أسابيع|شهر|أشهر|اشهر|شهور|سنة|سنوات)",
+    re.IGNORECASE,
+)
+_DATE = re.compile(r"\b\d{1,4}[/-]\d{1,2}[/-]\d{1,4}\b")
+# A question is a sentence ending in ? or ؟
+_QUESTION = re.compile(r"[^.!?؟\n]*[?؟]")
+
+MAX_OPEN_QUESTIONS = 3
+MAX_QUESTION_CHARS = 160
+MAX_FACTS = 6
+# The client's own recent turns travel verbatim; the agent's are cut to their first sentence
+MAX_TURNS = 8
+MAX_TURN_CHARS = 400
+_SENTENCE_END = re.compile(r"(?<=[.!?؟])\s")
+
+# How the receiving agent is told to use the hand-off, in its own language
+HANDOFF_LABELS = {
+    "en": (
+        "Context handed over from the previous {from_language} consultation, as structured data "
+        "(concept tags are language-neutral; the digest, turns, document excerpts and questions are in their original words). "
+        "Use it as background, answer in your own language and do not read it out:\n{handoff}"
+    ),
+    "ar": (
+        "سياق منقول من الاستشارة السابقة باللغة {from_language} على شكل بيانات منظمة "
+        "(الوسوم محايدة لغويًا، والملخص والأدوار ومقتطفات المستندات والأسئلة منقولة بنصها الأصلي). "
+        "استخدمه كخلفية، وجاوب بلغتك، ولا تقرأه حرفيًا:\n{handoff}"
+    ),
+}
+LANGUAGE_NAMES = {"en": {"en": "English", "ar": "Arabic"}, "ar": {"en": "الإنجليزية", "ar": "العربية"}}
+
+
+def _unique(values, limit: int):
+    seen = []
+    for value in values:
+        value = value.strip()
+        if value and value not in seen:
+            seen.append(value)
+    return seen[-limit:]
+
+
+def _concepts(text: str) -> Counter:
+    return Counter(
+        _CONCEPT_WORDS[word] for word in _WORD.findall(text.lower()) if word in _CONCEPT_WORDS
+    )
+
+
+def _keywords(text: str) -> set:
+    """Content words of a question or reply, Arabic folded as the document index does"""
+    return {token for token in tokenize(text.translate(_DIGITS)) if len(token) >= 3}
+
+
+def open_questions(messages):
+    """The client's questions no later agent reply has addressed, oldest first.
+
+    A reply addresses a question when it shares one of the question's content
+    words; a question with none ("why?") is taken as answered by any reply.
+    """
+    pending = []
+    for message in messages:
+        if message.role == "user":
+            for question in _QUESTION.findall(message.text):
+                question = question.strip()
+                if question:
+                    pending.append((question[:MAX_QUESTION_CHARS], _keywords(question)))
+        elif message.role == "assistant" and pending:
+            reply = _keywords(message.text)
+            pending = [(question, words) for question, words in pending if words and not words & reply]
+    return [question for question, _ in pending]
+
+
+def build_handoff(messages, documents, digest: str = "", from_language: str = "en") -> dict:
+    """Language-neutral summary of a conversation: topics, figures, turns, documents, open questions.
+
+    `messages` are StoredMessage-like objects (role, text); `documents` are
+    DocumentRef-like objects. Nothing is translated: the session digest,
+    document excerpts and the client's recent turns are carried verbatim,
+    so facts outside the concept vocabulary survive the switch. Figures are
+    also pulled out as written, with Arabic-Indic digits normalised.
+    """
+    texts = [digest] + [m.text for m in messages]
+    user_texts = [m.text for m in messages if m.role == "user"]
+    joined = "\n".join(filter(None, texts)).translate(_DIGITS)
+
+    concepts = _concepts(joined)
+    turns = [
+        [m.role, m.text[:MAX_TURN_CHARS] if m.role == "user" else _SENTENCE_END.split(m.text.strip(), maxsplit=1)[0]]
+        for m in messages[-MAX_TURNS:]
+    ]
+
+    facts = {
+        "amounts": _unique(_AMOUNT.findall(joined), MAX_FACTS),
+        "durations": _unique(_DURATION.findall(joined), MAX_FACTS),
+        "dates": _unique(_DATE.findall(joined), MAX_FACTS),
+    }
+    handoff = {
+        "from_language": from_language,
+        "topics": [tag for tag, _ in concepts.most_common(6)],
+        "facts": {key: values for key, values in facts.items() if values},
+        "digest": digest or None,
+        "turns": turns,
+        "documents": [
+            {
+                "name": d.name,
+                "pages": d.pages or None,
+                "topics": [tag for tag, _ in _concepts(d.excerpt or "").most_common(4)],
+                "excerpt": d.excerpt or None,
+            }
+            for d in documents
+        ],
+        "open_questions": open_questions(messages)[-MAX_OPEN_QUESTIONS:],
+        "user_turns": len(user_texts),
+    }
+    return handoff
+
+
+def render_handoff(handoff: dict, target_language: str) -> str:
+    """Hand-off message for an agent speaking `target_language`"""
+    label = HANDOFF_LABELS.get(target_language, HANDOFF_LABELS["en"])
+    names = LANGUAGE_NAMES.get(target_language, LANGUAGE_NAMES["en"])
+    source = handoff.get("from_language", "en")
+    return label.format(
+        from_language=names.get(source, source),
+        handoff=json.dumps(handoff, ensure_ascii=False, separators=(",", ":")),
+    )
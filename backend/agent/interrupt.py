@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from .logging_setup import log_event
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Give up waiting for playout to stop after this long; the interrupt still counts, as a timeout
+INTERRUPT_TIMEOUT = float(os.getenv("INTERRUPT_TIMEOUT", "1.0"))
+TIME_TO_SILENCE_TARGET_MS = int(os.getenv("TIME_TO_SILENCE_TARGET_MS", "300"))
+INTERRUPT_WINDOW = 200
+
+
+def _quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class InterruptStats:
+    """Time from an interrupt request until the agent's audio actually stopped"""
+
+    def __init__(self) -> None:
+        self.samples = deque(maxlen=INTERRUPT_WINDOW)
+        self.interrupts = 0
+        self.timeouts = 0
+
+    def record(self, seconds: float, silent: bool) -> None:
+        self.interrupts += 1
+        self.samples.append(seconds)
+        if not silent:
+            self.timeouts += 1
+
+    def metrics(self) -> dict:
+        return {
+            "interrupts": self.interrupts,
+            "timeouts": self.timeouts,
+            "time_to_silence_p50_ms": round(_quantile(self.samples, 0.5) * 1000),
+            "time_to_silence_p95_ms": round(_quantile(self.samples, 0.95) * 1000),
+            "time_to_silence_max_ms": round(max(self.samples, default=0.0) * 1000),
+        }
+
+
+async def _wait_until_silent(session, done, deadline: float) -> bool:
+    """Wait for the interrupt future, then for the agent to leave the speaking state"""
+    if done is not None and hasattr(done, "__await__"):
+        try:
+            await asyncio.wait_for(asyncio.shield(done), max(deadline - time.perf_counter(), 0.0))
+        except asyncio.TimeoutError:
+            return False
+        except Exception:
+            pass  # The speech failed on its way out; what matters is whether it is quiet now
+
+    if getattr(session, "agent_state", None) != "speaking":
+        return True
+    stopped = asyncio.Event()
+
+    def on_agent_state(event):
+        if getattr(event, "new_state", "") != "speaking":
+            stopped.set()
+
+    session.on("agent_state_changed", on_agent_state)
+    try:
+        await asyncio.wait_for(stopped.wait(), max(deadline - time.perf_counter(), 0.0))
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        off = getattr(session, "off", None)
+        if off is not None:
+            off("agent_state_changed", on_agent_state)
+
+
+async def interrupt_and_wait(session, stats: InterruptStats = None, timeout: float = INTERRUPT_TIMEOUT) -> float:
+    """Stop the agent's speech once and return when its audio has stopped playing.
+
+    `session.interrupt()` cancels the in-flight LLM and TTS of the current
+    speech and returns a future that resolves once the interruption is
+    processed. The audio output's buffer is cleared right away so queued
+    audio is not played out first. Returns the time to silence in seconds.
+    """
+    started = time.perf_counter()
+    done = None
+    try:
+        done = session.interrupt()
+    except Exception as e:
+        # Speech created with allow_interruptions=False refuses; its queued audio is still flushed below
+        logger.warning(f"⚠️ Interrupt refused: {type(e).__name__}: {e}")
+
+    audio_output = getattr(getattr(session, "output", None), "audio", None)
+    clear_buffer = getattr(audio_output, "clear_buffer", None)
+    if clear_buffer is not None:
+        try:
+            clear_buffer()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to clear audio output: {e}")
+
+    silent = await _wait_until_silent(session, done, started + timeout)
+    elapsed = time.perf_counter() - started
+    if stats is not None:
+        stats.record(elapsed, silent)
+    if silent:
+        log_event("interrupt", "🛑 Agent silent %.0fms after interrupt", elapsed * 1000)
+    else:
+        logger.warning(f"⚠️ Agent still speaking {timeout:.1f}s after interrupt")
+    return elapsed
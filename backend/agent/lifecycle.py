@@ -0,0 +1,161 @@
+import gc
+import itertools
+import logging
+import os
+import threading
+import time
+import types
+import weakref
+from collections import Counter
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Check for sessions, RoomIOs and agents that outlive their teardown when a room closes; LIFECYCLE_AUDIT=1 turns it on
+LIFECYCLE_AUDIT_ENABLED = os.getenv("LIFECYCLE_AUDIT", "0") != "0"
+# A full collection pauses every room of the worker; audit at most once per this many seconds
+LIFECYCLE_AUDIT_INTERVAL = float(os.getenv("LIFECYCLE_AUDIT_INTERVAL", "300"))
+# Objects retired less than this long ago may still be on their way out (pending callbacks, tasks)
+LEAK_GRACE_SECONDS = float(os.getenv("LEAK_GRACE_SECONDS", "5"))
+
+
+class _Tracked:
+    __slots__ = ("room", "kind", "ref", "ref_id", "created", "retired", "reported")
+
+    def __init__(self, room: str, kind: str, ref, ref_id: int, created: float) -> None:
+        self.room = room
+        self.kind = kind
+        self.ref = ref
+        self.ref_id = ref_id
+        self.created = created
+        self.retired = None
+        self.reported = False
+
+
+class LifecycleAuditor:
+    """Weak-reference census of the per-room objects that should die with a switch or a room.
+
+    `track` registers an object without keeping it alive. `retire` marks
+    it as torn down: its session was closed, its agent replaced, its room
+    ended. Anything retired more than LEAK_GRACE_SECONDS ago that a full
+    collection does not free is a leak, reported once with the types of
+    the objects still referring to it. One auditor is shared by every room
+    of the worker, so leaks are still found after their room's runtime is
+    gone.
+    """
+
+    def __init__(self, clock=time.monotonic) -> None:
+        self.clock = clock
+        self._entries = {}
+        self._tokens = {}
+        self._ids = itertools.count()
+        self._last_audit = None
+        # Weakref callbacks can fire from a collection inside a locked section
+        self._lock = threading.RLock()
+        self.tracked = Counter()
+        self.collected = Counter()
+        self.leaked = Counter()
+
+    def track(self, room: str, kind: str, obj) -> None:
+        token = next(self._ids)
+
+        def on_collect(_ref, token=token):
+            with self._lock:
+                entry = self._entries.pop(token, None)
+                if entry is not None:
+                    self._tokens.pop(entry.ref_id, None)
+                    self.collected[entry.kind] += 1
+
+        try:
+            ref = weakref.ref(obj, on_collect)
+        except TypeError:
+            return
+        with self._lock:
+            self._entries[token] = _Tracked(room, kind, ref, id(obj), self.clock())
+            self._tokens[id(obj)] = token
+            self.tracked[kind] += 1
+
+    def retire(self, obj) -> None:
+        """`obj` has been torn down and should be freed soon"""
+        if obj is None:
+            return
+        with self._lock:
+            entry = self._entries.get(self._tokens.get(id(obj)))
+            if entry is not None and entry.ref() is obj and entry.retired is None:
+                entry.retired = self.clock()
+
+    def retire_room(self, room: str) -> None:
+        """Everything tracked for a room that has ended"""
+        now = self.clock()
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.room == room and entry.retired is None:
+                    entry.retired = now
+
+    def live(self, room: str = None) -> Counter:
+        with self._lock:
+            return Counter(e.kind for e in self._entries.values() if room is None or e.room == room)
+
+    def _survivors(self, grace: float, collect: bool):
+        if collect:
+            gc.collect()
+        cutoff = self.clock() - grace
+        with self._lock:
+            entries = [e for e in self._entries.values() if e.retired is not None and e.retired <= cutoff]
+        return [entry for entry in entries if entry.ref() is not None]
+
+    @staticmethod
+    def _describe(entry, now: float) -> dict:
+        obj = entry.ref()
+        return {
+            "room": entry.room,
+            "kind": entry.kind,
+            "type": type(obj).__name__,
+            "retired_for_s": round(now - entry.retired, 1),
+        }
+
+    def survivors(self, grace: float = LEAK_GRACE_SECONDS, collect: bool = True):
+        """Retired objects still alive `grace` seconds after their teardown"""
+        now = self.clock()
+        return [self._describe(entry, now) for entry in self._survivors(grace, collect)]
+
+    def due(self, interval: float = LIFECYCLE_AUDIT_INTERVAL) -> bool:
+        """True, once, when the last audit was at least `interval` seconds ago"""
+        with self._lock:
+            now = self.clock()
+            if self._last_audit is not None and now - self._last_audit < interval:
+                return False
+            self._last_audit = now
+            return True
+
+    def audit(self, grace: float = LEAK_GRACE_SECONDS) -> int:
+        """Log new leaks with what still refers to them; returns how many objects leaked in total"""
+        leaks = self._survivors(grace, collect=True)
+        now = self.clock()
+        for entry in leaks:
+            obj = entry.ref()
+            if entry.reported or obj is None:
+                continue
+            entry.reported = True
+            self.leaked[entry.kind] += 1
+            holders = Counter(
+                type(holder).__name__ for holder in gc.get_referrers(obj) if not isinstance(holder, types.FrameType)
+            )
+            logger.warning(
+                f"🧟 {entry.kind} of room {entry.room} outlived its teardown: "
+                f"{self._describe(entry, now)}, held by {dict(holders)}"
+            )
+            del obj
+        return len(leaks)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "tracked": dict(self.tracked),
+                "collected": dict(self.collected),
+                "live": dict(Counter(e.kind for e in self._entries.values())),
+                "leaked": dict(self.leaked),
+            }
+
+
+AUDITOR = LifecycleAuditor()
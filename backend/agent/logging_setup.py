@@ -0,0 +1,155 @@
+import atexit
+import json
+import logging
+import os
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Hand log records to a background thread so handlers never write on the event loop; LOG_QUEUE=0 logs inline
+LOG_QUEUE_ENABLED = os.getenv("LOG_QUEUE", "1") != "0"
+# "json" writes one object per line with the event name and its fields
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+# Keep 1 in N INFO records of an event, e.g. LOG_SAMPLE="data_packet=10,chat=1"; warnings are never sampled
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", "data_packet=10")
+
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _parse_rates(spec: str) -> dict:
+    rates = {}
+    for item in spec.split(","):
+        name, _, every = item.partition("=")
+        try:
+            rates[name.strip()] = max(int(every), 1)
+        except ValueError:
+            continue
+    return rates
+
+
+class EventSampler:
+    """Keeps the first and then every Nth record of each sampled event.
+
+    Counting beats random sampling here: it is cheaper and a kept record
+    stands for exactly N events. Counters are not locked; a lost increment
+    under contention only shifts which record is kept.
+    """
+
+    def __init__(self, rates: dict) -> None:
+        self.rates = rates
+        self.counts = {}
+
+    def keep(self, event: str) -> bool:
+        every = self.rates.get(event, 1)
+        if every == 1:
+            return True
+        count = self.counts.get(event, 0)
+        self.counts[event] = count + 1
+        return count % every == 0
+
+
+SAMPLER = EventSampler(_parse_rates(LOG_SAMPLE))
+
+
+def log_event(event: str, msg: str, *args, level: int = logging.INFO, **fields) -> None:
+    """Log one structured event; the message is only formatted for records that are kept"""
+    if not logger.isEnabledFor(level):
+        return
+    if level < logging.WARNING and not SAMPLER.keep(event):
+        return
+    every = SAMPLER.rates.get(event, 1)
+    if every > 1:
+        fields["sampled"] = every
+    logger.log(level, msg, *args, extra={"event": event, "fields": fields})
+
+
+class TranscriptionWarningFilter(logging.Filter):
+    """Suppresses transcription warnings LiveKit logs while a room is closing.
+
+    Runs for every livekit.agents record, so the message is rendered and
+    lowercased once and most records are let through after one substring test.
+    """
+
+    def filter(self, record):
+        text = record.getMessage().lower()
+        if "transcription" in text:
+            return not ("failed to publish" in text or "room closed" in text or "channel closed" in text)
+        return "engine is closed" not in text
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, event and its fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        event = getattr(record, "event", None)
+        if event:
+            entry["event"] = event
+            entry.update(getattr(record, "fields", None) or {})
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in ("event", "fields"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _LoopQueueHandler(QueueHandler):
+    """QueueHandler that skips formatting on the calling thread.
+
+    The stock prepare() runs a Formatter and copies the record before
+    enqueueing it. Merging the arguments into the message and rendering any
+    traceback is all the listener thread needs; the handlers behind it
+    format with their own formatters.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def install_queue_logging(target: logging.Logger = None, structured: bool = False) -> QueueListener:
+    """Move `target`'s handlers (the root logger's by default) behind a queue and a listener thread"""
+    target = target or logging.getLogger()
+    handlers = target.handlers[:] or [logging.StreamHandler()]
+    if structured:
+        for handler in handlers:
+            handler.setFormatter(StructuredFormatter())
+    queue = SimpleQueue()
+    for handler in handlers:
+        target.removeHandler(handler)
+    target.addHandler(_LoopQueueHandler(queue))
+    listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+_listener = None
+_lock = threading.Lock()
+
+
+def configure_logging() -> None:
+    """Install the worker's logging once, after LiveKit's CLI has set up its handlers"""
+    global _listener
+    if not LOG_QUEUE_ENABLED:
+        return
+    with _lock:
+        if _listener is not None:
+            return
+        _listener = install_queue_logging(structured=LOG_FORMAT == "json")
+        atexit.register(_listener.stop)
+        logger.info(f"🪵 Logging through a queue ({LOG_FORMAT}, sampling {SAMPLER.rates or 'off'})")
@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, deque
+
+from .audio_input import SpeechGate
+from .lifecycle import AUDITOR
+from .logging_setup import log_event
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Hear each participant through their own STT front-end, answered by the room's one session; MULTIPARTY=1 turns it on
+MULTIPARTY_ENABLED = os.getenv("MULTIPARTY", "0") == "1"
+# Participants past this many in one room are not transcribed
+MULTIPARTY_MAX_SPEAKERS = int(os.getenv("MULTIPARTY_MAX_SPEAKERS", "6"))
+# A speaker's final transcripts less than this far apart are one turn
+MULTIPARTY_TURN_GAP = float(os.getenv("MULTIPARTY_TURN_GAP", "0.8"))
+TURN_WAIT_WINDOW = 200
+
+
+def _event_type(event) -> str:
+    """SpeechEventType / VADEventType value as a plain string"""
+    kind = getattr(event, "type", "")
+    return getattr(kind, "value", kind)
+
+
+def _quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class ParticipantFrontEnd:
+    """Hears one participant: their audio track into a streaming STT, with no LLM, TTS or playout.
+
+    With a VAD, a per-participant VAD stream drives a SpeechGate so STT
+    only receives audio around speech, as the session's stt_node does.
+    Final transcripts go to `on_transcript(identity, text)`. While
+    `enabled` is off (click-to-talk between turns) frames are dropped
+    before VAD and STT.
+    """
+
+    def __init__(self, identity: str, frames, on_transcript) -> None:
+        self.identity = identity
+        self.frames = frames
+        self.on_transcript = on_transcript
+        self.enabled = True
+        self.accepting = True
+        self.gate = SpeechGate()
+        self.gated = False
+        self.seconds = 0.0
+        self.stt_seconds = 0.0
+        self.transcripts = 0
+        self._stt_stream = None
+        self._vad_stream = None
+        self._readers = []
+        self._pump = None
+
+    async def configure(self, stt, vad=None, manual: bool = False) -> None:
+        """(Re)open the STT and VAD streams, e.g. for the language of a new agent"""
+        await self._close_streams()
+        self.enabled = self.accepting = not manual
+        self.gate.reset()
+        self.gated = vad is not None
+        if stt is not None:
+            self._stt_stream = stt.stream()
+            self._readers.append(asyncio.ensure_future(self._read_stt(self._stt_stream)))
+        if vad is not None:
+            self._vad_stream = vad.stream()
+            self._readers.append(asyncio.ensure_future(self._read_vad(self._vad_stream)))
+        if self._pump is None:
+            self._pump = asyncio.ensure_future(self._run_pump())
+
+    async def _run_pump(self) -> None:
+        async for event in self.frames:
+            frame = getattr(event, "frame", event)
+            if not self.enabled or self._stt_stream is None:
+                continue
+            duration = frame.samples_per_channel / float(frame.sample_rate or 1)
+            self.seconds += duration
+            if not self.gated:
+                self._stt_stream.push_frame(frame)
+                self.stt_seconds += duration
+                continue
+            self._vad_stream.push_frame(frame)
+            sent = self.gate.seconds_sent
+            for forwarded in self.gate.push(frame, duration):
+                self._stt_stream.push_frame(forwarded)
+            self.stt_seconds += self.gate.seconds_sent - sent
+
+    async def _read_vad(self, stream) -> None:
+        async for event in stream:
+            kind = _event_type(event)
+            if kind == "start_of_speech":
+                self.gate.set_speaking(True)
+            elif kind == "end_of_speech":
+                self.gate.set_speaking(False)
+
+    async def _read_stt(self, stream) -> None:
+        async for event in stream:
+            if _event_type(event) != "final_transcript":
+                continue
+            alternatives = getattr(event, "alternatives", None) or []
+            text = getattr(alternatives[0], "text", "") if alternatives else ""
+            if text.strip() and self.accepting:
+                self.transcripts += 1
+                self.on_transcript(self.identity, text)
+
+    def start_turn(self) -> None:
+        self.enabled = self.accepting = True
+
+    def end_turn(self) -> None:
+        """Stop listening and have STT finalize what it has heard"""
+        self.enabled = False
+        flush = getattr(self._stt_stream, "flush", None)
+        if flush is not None:
+            flush()
+
+    def cancel_turn(self) -> None:
+        self.enabled = self.accepting = False
+
+    async def _close_streams(self) -> None:
+        readers, self._readers = self._readers, []
+        for task in readers:
+            task.cancel()
+        streams = [stream for stream in (self._stt_stream, self._vad_stream) if stream is not None]
+        self._stt_stream = self._vad_stream = None
+        for stream in streams:
+            try:
+                await stream.aclose()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to close {self.identity}'s front-end stream: {e}")
+
+    async def aclose(self) -> None:
+        pump, self._pump = self._pump, None
+        if pump is not None:
+            pump.cancel()
+        await self._close_streams()
+        close = getattr(self.frames, "aclose", None)
+        if close is not None:
+            try:
+                await close()
+            except Exception:
+                pass
+
+    def metrics(self) -> dict:
+        return {
+            "audio_seconds": round(self.seconds, 1),
+            "stt_seconds": round(self.stt_seconds, 1),
+            "transcripts": self.transcripts,
+        }
+
+
+class TurnScheduler:
+    """Puts the turns of a room's speakers through its one agent session, one reply at a time.
+
+    A speaker's final transcripts are gathered until MULTIPARTY_TURN_GAP
+    passes without another, then queued as one turn. Turns are answered
+    in the order they ended. A speaker who talks again while their turn
+    is still waiting has it extended instead of getting two replies.
+    `respond(identity, text)` must return once the reply has played out.
+    """
+
+    def __init__(self, respond, gap: float = MULTIPARTY_TURN_GAP, clock=time.perf_counter) -> None:
+        self.respond = respond
+        self.gap = gap
+        self.clock = clock
+        self._gathering = {}
+        self._queue = deque()
+        self._wake = asyncio.Event()
+        self._task = None
+        self.answering = None
+        self.turns = Counter()
+        self.merged = 0
+        self.discarded = 0
+        self.waits = deque(maxlen=TURN_WAIT_WINDOW)
+
+    def submit(self, identity: str, text: str) -> None:
+        """A final transcript from `identity`"""
+        texts, timer = self._gathering.get(identity, ([], None))
+        if timer is not None:
+            timer.cancel()
+        texts.append(text)
+        timer = asyncio.get_running_loop().call_later(self.gap, self._end_turn, identity)
+        self._gathering[identity] = (texts, timer)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def discard(self, identity: str) -> None:
+        """Drop what `identity` said that has not been answered yet"""
+        texts, timer = self._gathering.pop(identity, (None, None))
+        if timer is not None:
+            timer.cancel()
+        queued = [turn for turn in self._queue if turn[0] == identity]
+        for turn in queued:
+            self._queue.remove(turn)
+        self.discarded += len(queued) + (texts is not None)
+
+    def _end_turn(self, identity: str) -> None:
+        texts, _ = self._gathering.pop(identity, (None, None))
+        if not texts:
+            return
+        for turn in self._queue:
+            if turn[0] == identity:
+                turn[1].extend(texts)
+                self.merged += 1
+                return
+        self._queue.append((identity, texts, self.clock()))
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            identity, texts, ended = self._queue.popleft()
+            self.waits.append(self.clock() - ended)
+            self.turns[identity] += 1
+            self.answering = identity
+            try:
+                await self.respond(identity, " ".join(texts))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Failed to answer {identity}: {e}")
+            finally:
+                self.answering = None
+
+    async def aclose(self) -> None:
+        for _, timer in self._gathering.values():
+            timer.cancel()
+        self._gathering.clear()
+        self._queue.clear()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def metrics(self) -> dict:
+        return {
+            "turns": dict(self.turns),
+            "merged": self.merged,
+            "discarded": self.discarded,
+            "queue_wait_p50_ms": round(_quantile(self.waits, 0.5) * 1000),
+            "queue_wait_p95_ms": round(_quantile(self.waits, 0.95) * 1000),
+        }
+
+
+class MultipartyFrontEnds:
+    """The per-participant front-ends of one room and the scheduler in front of its session.
+
+    A full AgentSession per participant would bring its own LLM, TTS,
+    playout and published track, and talk over the others. Here each
+    participant costs one STT stream (plus a VAD stream when STT is
+    gated), and every reply comes from the room's shared session in turn.
+    """
+
+    def __init__(self, room, respond, audio_factory, max_speakers: int = MULTIPARTY_MAX_SPEAKERS, gap: float = MULTIPARTY_TURN_GAP) -> None:
+        self.room_name = getattr(room, "name", "room")
+        self.audio_factory = audio_factory
+        self.max_speakers = max_speakers
+        self.scheduler = TurnScheduler(respond, gap)
+        self.front_ends = {}
+        self.stt = None
+        self.vad = None
+        self.manual = False
+        self.refused = 0
+
+    async def use(self, stt, vad=None, manual: bool = False) -> None:
+        """Point every front-end at the active agent's STT (and VAD when gated)"""
+        self.stt, self.vad, self.manual = stt, vad, manual
+        for front_end in list(self.front_ends.values()):
+            await front_end.configure(stt, vad, manual)
+
+    async def add(self, participant) -> None:
+        identity = participant.identity
+        if identity in self.front_ends or identity.startswith("agent-"):
+            return
+        if len(self.front_ends) >= self.max_speakers:
+            self.refused += 1
+            logger.warning(f"👥 {identity} not transcribed: room already has {self.max_speakers} speakers")
+            return
+        front_end = ParticipantFrontEnd(identity, self.audio_factory(participant), self.scheduler.submit)
+        self.front_ends[identity] = front_end
+        AUDITOR.track(self.room_name, "front_end", front_end)
+        await front_end.configure(self.stt, self.vad, self.manual)
+        log_event("multiparty", "👥 Listening to %s (%d speakers)", identity, len(self.front_ends))
+
+    async def remove(self, identity: str) -> None:
+        front_end = self.front_ends.pop(identity, None)
+        if front_end is None:
+            return
+        self.scheduler.discard(identity)
+        await front_end.aclose()
+        AUDITOR.retire(front_end)
+        log_event("multiparty", "👥 Stopped listening to %s", identity)
+
+    def start_turn(self, identity: str) -> None:
+        if identity in self.front_ends:
+            self.front_ends[identity].start_turn()
+
+    def end_turn(self, identity: str) -> None:
+        if identity in self.front_ends:
+            self.front_ends[identity].end_turn()
+
+    def cancel_turn(self, identity: str) -> None:
+        if identity in self.front_ends:
+            self.front_ends[identity].cancel_turn()
+            self.scheduler.discard(identity)
+
+    async def aclose(self) -> None:
+        await self.scheduler.aclose()
+        for identity in list(self.front_ends):
+            await self.remove(identity)
+
+    def metrics(self) -> dict:
+        return {
+            "speakers": {identity: front_end.metrics() for identity, front_end in self.front_ends.items()},
+            "refused": self.refused,
+            **self.scheduler.metrics(),
+        }
@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+
+@dataclass(frozen=True)
+class Replacement:
+    """One entry of the brand/term replacement table"""
+    name: str
+    pattern: str
+    replacement: str
+
+
+# Brand and term replacements applied to transcripts and chat messages.
+# Patterns only use bounded quantifiers so the combined expression never
+# backtracks over long runs of whitespace.
+BRAND_REPLACEMENTS = {
+    "en": (
+        Replacement(
+            "haakeem",
+            r"\b(?:h\s?a\s?a\s?k\s?(?:[ie]\s?)?e\s?e\s?m|ha{1,3}\s?k(?:ee|ie|ei|i|e|y)m|akeem|akim)\b",
+            "HAAKEEM",
+        ),
+        Replacement(
+            "binfin8",
+            r"\bb(?:i|ee|e)n[\s-]?f(?:i|ee)n[\s-]?(?:8|eight|ate|ait)\b",
+            "Binfin8",
+        ),
+    ),
+    "ar": (
+        Replacement("haakeem_ar", r"\b(?:ه|ح)ا?كي{1,2}م\b", "حكيم"),
+        Replacement("haakeem_latin", r"\b(?:haakeem|hakeem|hakim)\b", "حكيم"),
+        Replacement(
+            "binfin8_ar",
+            r"\b(?:بن|بين)\s?(?:فن|فين)\s?(?:8|٨|ايت|إيت|أيت|ثمانية)\b",
+            "Binfin8",
+        ),
+        Replacement(
+            "binfin8",
+            r"\bb(?:i|ee|e)n[\s-]?f(?:i|ee)n[\s-]?(?:8|eight|ate|ait)\b",
+            "Binfin8",
+        ),
+    ),
+}
+
+
+# Upper bound on the length of any single match in the tables above. The
+# streaming normalizer holds back this many trailing characters so a variant
+# split across interim chunks is still seen whole.
+MAX_MATCH_CHARS = 32
+
+
+class TextNormalizer:
+    """Applies a replacement table in a single pass with one precompiled pattern"""
+
+    def __init__(self, replacements, max_match_chars: int = MAX_MATCH_CHARS) -> None:
+        self.replacements = tuple(replacements)
+        self.max_match_chars = max_match_chars
+        self._by_group = {}
+        alternatives = []
+        for index, entry in enumerate(self.replacements):
+            group = f"r{index}"
+            self._by_group[group] = entry.replacement
+            alternatives.append(f"(?P<{group}>{entry.pattern})")
+        self._pattern = re.compile("|".join(alternatives) or r"(?!)", re.IGNORECASE)
+
+    def _replace(self, match: re.Match) -> str:
+        return self._by_group[match.lastgroup]
+
+    def normalize(self, text: str) -> str:
+        if not text:
+            return text
+        return self._pattern.sub(self._replace, text)
+
+
+class StreamingNormalizer:
+    """Incremental normalizer for interim STT results.
+
+    Text is fed as deltas; everything except a short tail (bounded by the
+    normalizer's max match length and cut on whitespace) is normalized once
+    and frozen, so each update costs O(delta) regex work rather than
+    re-normalizing the whole transcript.
+    """
+
+    def __init__(self, normalizer: TextNormalizer) -> None:
+        self._normalizer = normalizer
+        self._holdback = normalizer.max_match_chars
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all state, e.g. after a final transcript closes the segment"""
+        self._frozen = ""       # normalized output for raw text before the cut
+        self._frozen_raw = ""   # raw text covered by _frozen
+        self._pending = ""      # raw text after the cut, still open to matches
+
+    def push(self, delta: str) -> str:
+        """Append raw text and return the normalized transcript so far"""
+        if delta:
+            self._pending += delta
+            self._advance()
+        return self._frozen + self._normalizer.normalize(self._pending)
+
+    def update(self, hypothesis: str) -> str:
+        """Accept a cumulative interim hypothesis and normalize only what changed.
+
+        Revisions inside the open tail are absorbed cheaply; if the STT revised
+        anything before the cut, even without changing its length, the state is
+        rebuilt from the full hypothesis. The prefix check is a plain string
+        compare, so the append-only path stays cheap.
+        """
+        if hypothesis.startswith(self._frozen_raw):
+            self._pending = hypothesis[len(self._frozen_raw):]
+            self._advance()
+            return self._frozen + self._normalizer.normalize(self._pending)
+        self.reset()
+        return self.push(hypothesis)
+
+    def _advance(self) -> None:
+        pending = self._pending
+        limit = len(pending) - self._holdback
+        if limit <= 0:
+            return
+        # Cut on whitespace so word boundaries at the start of the next window
+        # stay intact, and never inside a match (matches spanning the cut are
+        # fully visible because they are shorter than the holdback).
+        cut = max(pending.rfind(" ", 0, limit), pending.rfind("\n", 0, limit))
+        for match in self._normalizer._pattern.finditer(pending, 0, limit + self._holdback):
+            if match.start() >= cut:
+                break
+            if match.end() > cut:
+                cut = match.start()
+                break
+        if cut <= 0:
+            return
+        head = pending[:cut]
+        self._frozen += self._normalizer.normalize(head)
+        self._frozen_raw += head
+        self._pending = pending[cut:]
+
+
+def _load_extra_replacements(language: str):
+    """Read additional table entries from the JSON file named by NORMALIZATION_TABLE"""
+    path = os.getenv("NORMALIZATION_TABLE")
+    if not path:
+        return ()
+    try:
+        with open(path, encoding="utf-8") as fh:
+            table = json.load(fh)
+        items = table.get(language, [])
+    except Exception as e:
+        logger.warning(f"⚠️ Ignoring normalization table {path}: {e}")
+        return ()
+    # A bad entry is skipped on its own; it must not take the built-in table down with it
+    extra = []
+    for item in items:
+        try:
+            entry = Replacement(item.get("name", item["pattern"]), item["pattern"], item["replacement"])
+            re.compile(entry.pattern, re.IGNORECASE)
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring normalization entry {item!r} in {path}: {e}")
+            continue
+        extra.append(entry)
+    return tuple(extra)
+
+
+@lru_cache(maxsize=None)
+def get_normalizer(language: str = "en") -> TextNormalizer:
+    """Shared normalizer for a language, built once per process"""
+    base = BRAND_REPLACEMENTS.get(language, BRAND_REPLACEMENTS["en"])
+    return TextNormalizer(base + _load_extra_replacements(language))
+
+
+def normalize_transcript(text: str, language: str = "en") -> str:
+    """Normalize brand and term variants in a transcript or chat message"""
+    try:
+        return get_normalizer(language).normalize(text)
+    except Exception:
+        return text
@@ -0,0 +1,171 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class PluginSpec:
+    """Provider name plus constructor options for an STT/LLM/TTS plugin"""
+    provider: str
+    options: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class AgentProfile:
+    """Declarative definition of one agent type"""
+    name: str
+    language: str
+    instructions: str
+    greeting: str
+    stt: PluginSpec
+    llm: PluginSpec
+    tts: PluginSpec
+    turn_detection: str = "vad"  # "vad" for continuous conversation, "manual" for click-to-talk
+    min_endpointing_delay: float = 3.3
+    max_endpointing_delay: float = 5.0
+    adaptive_endpointing: bool = False  # learn delays from the speaker's pauses (VAD profiles only)
+    noise_cancellation: str = ""  # "nc", "bvc" or "bvc_telephony"; empty for raw room audio
+    energy_gate: bool = False  # silence low-energy frames before the VAD (VAD profiles only)
+    stt_gating: bool = False  # stream audio to STT only around VAD speech (VAD profiles only)
+    # Secondary models and voices, tried when the primary is slow (hedging) or failing
+    stt_fallbacks: tuple = ()
+    llm_fallbacks: tuple = ()
+    tts_fallbacks: tuple = ()
+    log_tag: str = ""
+
+    @property
+    def manual_turns(self) -> bool:
+        return self.turn_detection == "manual"
+
+    def session_options(self, vad=None) -> dict:
+        """Keyword arguments for the AgentSession serving this profile"""
+        if self.manual_turns:
+            return {"turn_detection": "manual", "discard_audio_if_uninterruptible": True}
+        return {
+            "vad": vad,
+            "min_endpointing_delay": self.min_endpointing_delay,
+            "max_endpointing_delay": self.max_endpointing_delay,
+            "allow_interruptions": True,
+            "discard_audio_if_uninterruptible": True,  # Prevent resume after interruption
+        }
+
+
+AGENT_PROFILES = {}
+DEFAULT_AGENT_TYPE = "attorney"
+
+
+def register_profile(profile: AgentProfile) -> AgentProfile:
+    AGENT_PROFILES[profile.name] = profile
+    return profile
+
+
+def get_profile(agent_type: str) -> AgentProfile:
+    try:
+        return AGENT_PROFILES[agent_type]
+    except KeyError:
+        raise KeyError(f"Unknown agent type: {agent_type}") from None
+
+
+ENGLISH_STT = PluginSpec(
+    "deepgram",
+    {
+        "model": "nova-2",
+        "language": "en",
+        # Deepgram expects list of (keyword, intensifier)
+        "keywords": [("HAAKEEM", 9.0), ("Haakeem", 6.0), ("Binfin8", 9.0)],
+    },
+)
+ARABIC_STT = PluginSpec("azure", {"language": "ar-SA"})
+ENGLISH_STT_FALLBACK = PluginSpec("azure", {"language": "en-US"})
+LLM_FALLBACK = PluginSpec("groq", {"model": "llama-3.3-70b-versatile"})
+
+ENGLISH_GREETING = "Hello! I'm Haakeem, your AI legal assistant. How can I assist you today?"
+
+
+register_profile(AgentProfile(
+    name="attorney",
+    language="en",
+    instructions=(
+        "Your name is Haakeem, an AI legal assistant. Your Company is Binfin8. "
+        "You should use short and concise responses, avoiding usage of unpronounceable punctuation. "
+        "Be concise and clear in your responses. Focus on legal guidance, document review, case analysis, "
+        "or whatever legal assistance they need. When users ask legal questions, provide clear, actionable advice. "
+    ),
+    greeting=ENGLISH_GREETING,
+    stt=ENGLISH_STT,
+    llm=PluginSpec("groq", {"model": "llama-3.1-8b-instant"}),
+    tts=PluginSpec("azure", {"voice": "en-US-DavisNeural", "language": "en-US"}),
+    stt_fallbacks=(ENGLISH_STT_FALLBACK,),
+    llm_fallbacks=(LLM_FALLBACK,),
+    tts_fallbacks=(PluginSpec("azure", {"voice": "en-US-GuyNeural", "language": "en-US"}),),
+    turn_detection="vad",
+    adaptive_endpointing=True,
+    noise_cancellation="bvc",
+    energy_gate=True,
+    stt_gating=True,
+    log_tag="Attorney",
+))
+
+register_profile(AgentProfile(
+    name="click_to_talk",
+    language="en",
+    instructions=(
+        "Your name is Haakeem, an AI legal assistant. Your Company is Binfin8. "
+        "Users can speak for as long as they want without interruption. "
+        "You should use short and concise responses, avoiding usage of unpronounceable punctuation. "
+        "Provide thoughtful, comprehensive responses since users may share longer, detailed questions. "
+        "Focus on legal guidance, document review, case analysis, or whatever legal assistance they need. "
+        "Be thorough in your responses since this agent allows for more in-depth discussion. "
+        "Wait for the user to finish speaking completely before responding."
+    ),
+    greeting=ENGLISH_GREETING,
+    stt=ENGLISH_STT,
+    llm=PluginSpec("groq", {"model": "llama-3.1-8b-instant"}),
+    tts=PluginSpec("azure", {"voice": "en-US-OnyxTurboMultilingualNeural", "language": "en-US"}),
+    stt_fallbacks=(ENGLISH_STT_FALLBACK,),
+    llm_fallbacks=(LLM_FALLBACK,),
+    tts_fallbacks=(PluginSpec("azure", {"voice": "en-US-DavisNeural", "language": "en-US"}),),
+    turn_detection="manual",
+    log_tag="ClickToTalk",
+))
+
+register_profile(AgentProfile(
+    name="arabic",
+    language="ar",
+    instructions=(
+        "اسمُك حَكيم، مساعد قانوني ذكي من Binfin8. "
+        "تتكلم دائمًا بلهجة المتحدث إن تعرّفت عليها من كلامه. إن لم تتعرّف على لهجته فاختر لهجة خليجية طبيعية وواضحة (سعودية/قطرية) بدل العربية الفصحى. "
+        "كن عمليًا ومباشرًا، وجّه المستخدم بخطوات واضحة ومبسطة، واطلب أي معلومات ناقصة بدقة. "
+        "عند الرد على الملفات أو الأسئلة، قدّم ملخصًا موجزًا ثم نقاطًا قانونية دقيقة وقابلة للتنفيذ. "
+        "تجنّب الجُمل الطويلة؛ اجعل الجمل قصيرة وسهلة الفهم، وابتعد عن المصطلحات المعقدة إن وُجد بديل شعبي واضح."
+    ),
+    greeting="السلام عليكم! أنا حَكيم، مساعدك القانوني. وش تبيني أساعدك فيه اليوم؟",
+    stt=ARABIC_STT,
+    llm=PluginSpec("groq", {"model": "allam-2-7b"}),
+    tts=PluginSpec("azure", {"voice": "ar-OM-AbdullahNeural", "language": "ar-OM"}),
+    llm_fallbacks=(LLM_FALLBACK,),
+    tts_fallbacks=(PluginSpec("azure", {"voice": "ar-SA-HamedNeural", "language": "ar-SA"}),),
+    turn_detection="vad",
+    adaptive_endpointing=True,
+    noise_cancellation="bvc",
+    energy_gate=True,
+    stt_gating=True,
+    log_tag="Arabic",
+))
+
+register_profile(AgentProfile(
+    name="arabic_click_to_talk",
+    language="ar",
+    instructions=(
+        "اسمُك حَكيم، مساعد قانوني ذكي من Binfin8. "
+        "تتكلم دائمًا بلهجة المتحدث إن تعرّفت عليها من كلامه. إن لم تتعرّف على لهجته فاختر لهجة خليجية طبيعية وواضحة (سعودية/قطرية) بدل العربية الفصحى. "
+        "خلّ ردّك موجز وواضح لأن هذا نمط اضغط لتتحدث؛ انتظر حتى ينتهي المستخدم ثم قدّم إجابة مركّزة بخطوات عملية. "
+        "عند تحليل الملفات أو الأسئلة، قدّم ملخصًا قصيرًا ثم نقاطًا قانونية مباشرة."
+    ),
+    greeting="هلا! أنا حَكيم. اضغط تكلّم وبعدين اضغط إرسال. وش موضوعك؟",
+    stt=ARABIC_STT,
+    llm=PluginSpec("groq", {"model": "allam-2-7b"}),
+    tts=PluginSpec("azure", {"voice": "ar-OM-AbdullahNeural", "language": "ar-OM"}),
+    llm_fallbacks=(LLM_FALLBACK,),
+    tts_fallbacks=(PluginSpec("azure", {"voice": "ar-SA-HamedNeural", "language": "ar-SA"}),),
+    turn_detection="manual",
+    log_tag="Arabic CTT",
+))
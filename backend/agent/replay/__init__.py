@@ -0,0 +1,12 @@
+from .room import FakeRoom
+from .stubs import Latency, StubAgent, StubPlugins, StubRoomIO, StubSession, StubVAD
+
+__all__ = [
+    "FakeRoom",
+    "Latency",
+    "StubAgent",
+    "StubPlugins",
+    "StubRoomIO",
+    "StubSession",
+    "StubVAD",
+]
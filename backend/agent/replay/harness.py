@@ -0,0 +1,215 @@
+"""Offline replay of recorded room traces against stub STT/LLM/TTS plugins.
+
+Drives the same RoomRuntime the worker entrypoint uses, through a local room
+stand-in, and reports turn latency, switch latency and memory per room:
+    python3 -m agent.replay.harness
+    python3 -m agent.replay.harness trace.json --speed 4 --json report.json
+
+A trace is a JSON list of events ordered by "at" (seconds from room start):
+    {"at": 0.5, "type": "speech", "duration": 2.0, "text": "..."}
+    {"at": 0.5, "type": "audio", "file": "turn1.wav", "text": "..."}
+    {"at": 4.0, "type": "data", "payload": "switch_to_click_to_talk"}
+    {"at": 5.0, "type": "rpc", "method": "start_turn", "payload": "{\"id\": \"17\"}"}
+    {"at": 9.0, "type": "upload", "fileName": "lease.txt", "mimeType": "text/plain", "text": "..."}
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+import wave
+
+from ..runtime import RoomRuntime
+from .room import FakeRoom
+from .stubs import Latency, StubAgent, StubPlugins, StubRoomIO, StubSession
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+LEASE_TEXT = "The tenant shall give sixty days written notice before terminating this lease. " * 40
+
+DEFAULT_TRACE = [
+    {"at": 1.0, "type": "speech", "duration": 2.0, "text": "hello hakim I need help with my lease"},
+    {"at": 9.0, "type": "speech", "duration": 3.0, "text": "my landlord kept the whole deposit"},
+    {"at": 17.0, "type": "data", "payload": "switch_to_click_to_talk"},
+    {"at": 22.0, "type": "rpc", "method": "start_turn"},
+    {"at": 22.2, "type": "speech", "duration": 4.0, "text": "can you explain the notice period clause"},
+    {"at": 26.5, "type": "rpc", "method": "end_turn"},
+    {"at": 33.0, "type": "upload", "fileName": "lease.txt", "mimeType": "text/plain", "text": LEASE_TEXT},
+    {"at": 41.0, "type": "data", "payload": "switch_to_arabic"},
+    {"at": 47.0, "type": "speech", "duration": 2.5, "text": "ابي استشارة عن عقد الايجار"},
+    {"at": 55.0, "type": "data", "payload": "switch_to_attorney"},
+    {"at": 62.0, "type": "end"},
+]
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round((len(ordered) - 1) * q)), len(ordered) - 1)]
+
+
+class RoomRecorder:
+    """Collects wall-clock timings for one replayed room"""
+
+    def __init__(self) -> None:
+        self.turn_latencies = []
+        self.switch_latencies = []
+        self._switch_started = None
+        self.audio_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.stt_seconds = 0.0
+        self.stt_speech_seconds = 0.0
+
+    def switch_requested(self) -> None:
+        self._switch_started = time.perf_counter()
+
+    def first_audio(self, session, turn_started) -> None:
+        now = time.perf_counter()
+        if turn_started is not None:
+            self.turn_latencies.append(now - turn_started)
+        elif self._switch_started is not None:
+            # First audio without a user turn after a switch is the new agent's greeting
+            self.switch_latencies.append(now - self._switch_started)
+            self._switch_started = None
+
+    def room_audio(self, frame) -> None:
+        self.audio_seconds += frame.seconds
+        if frame.speech:
+            self.speech_seconds += frame.seconds
+
+    def stt_audio(self, frame) -> None:
+        self.stt_seconds += frame.seconds
+        if frame.speech:
+            self.stt_speech_seconds += frame.seconds
+
+    def summary(self) -> dict:
+        return {
+            "turns": len(self.turn_latencies),
+            "turn_latency_p50": round(_percentile(self.turn_latencies, 0.5), 4),
+            "turn_latency_p95": round(_percentile(self.turn_latencies, 0.95), 4),
+            "switches": len(self.switch_latencies),
+            "switch_latency_p50": round(_percentile(self.switch_latencies, 0.5), 4),
+            "switch_latency_max": round(max(self.switch_latencies, default=0.0), 4),
+            "audio_seconds": round(self.audio_seconds, 1),
+            "stt_seconds": round(self.stt_seconds, 1),
+            # Speech that never reached STT; must stay 0 with STT gating on
+            "speech_seconds_withheld": round(self.speech_seconds - self.stt_speech_seconds, 1),
+        }
+
+
+def build_runtime(room, plugins: StubPlugins, recorder: RoomRecorder, **options) -> RoomRuntime:
+    """RoomRuntime wired to stub plugins instead of LiveKit, Deepgram, Azure and Groq; `options` go to RoomRuntime"""
+    options.setdefault("vad", None)
+    return RoomRuntime(
+        room,
+        agent_factory=lambda agent_type: StubAgent(agent_type, stt=plugins.stt),
+        session_factory=lambda **session_options: StubSession(plugins, recorder, **session_options),
+        room_io_factory=StubRoomIO,
+        **options,
+    )
+
+
+def _audio_duration(path: str) -> float:
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+
+async def replay_room(trace, plugins: StubPlugins, name: str = "replay-room", recorder: RoomRecorder = None) -> dict:
+    """Replay one trace against a fresh room and return its metrics"""
+    recorder = recorder or RoomRecorder()
+    room = FakeRoom(name)
+    clock = plugins.clock
+    baseline = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    runtime = build_runtime(room, plugins, recorder)
+    await runtime.run()
+
+    elapsed = 0.0
+    background = []
+    for event in sorted(trace, key=lambda e: e["at"]):
+        await clock.sleep(event["at"] - elapsed)
+        elapsed = event["at"]
+        kind = event["type"]
+        if kind in ("speech", "audio"):
+            duration = event.get("duration") or _audio_duration(event["file"])
+            if runtime.session is not None:
+                background.append(asyncio.create_task(runtime.session.user_speech(duration, event.get("text", ""))))
+        elif kind == "data":
+            if event["payload"].startswith("switch_to_"):
+                recorder.switch_requested()
+            room.send_data(event["payload"], event.get("identity", "user"))
+        elif kind == "rpc":
+            await room.local_participant.perform_rpc_from(event.get("identity", "user"), event["method"], event.get("payload", ""))
+        elif kind == "upload":
+            payload = event["text"].encode("utf-8") if "text" in event else open(event["file"], "rb").read()
+            room.send_file(event["fileName"], event["mimeType"], payload, event.get("identity", "user"))
+        elif kind == "end":
+            break
+
+    for task in background:
+        task.cancel()
+    memory = (tracemalloc.get_traced_memory()[0] - baseline) if tracemalloc.is_tracing() else 0
+    report_tasks = runtime.tasks.metrics()
+    await runtime.aclose()
+
+    report = recorder.summary()
+    report["room"] = name
+    report["memory_kib"] = round(memory / 1024, 1)
+    report["tasks"] = report_tasks
+    report["stt_gate"] = runtime.stt_gate.metrics()
+    report["interrupts"] = runtime.interrupt_stats.metrics()
+    report["room_io"] = runtime.media.metrics()
+    report["commands"] = runtime.commands.metrics()
+    return report
+
+
+async def run_replay(trace, plugins: StubPlugins, rooms: int = 1):
+    tracemalloc.start()
+    try:
+        return [await replay_room(trace, plugins, name=f"replay-{index}") for index in range(rooms)]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", nargs="?", help="JSON trace file (defaults to a built-in consultation)")
+    parser.add_argument("--rooms", type=int, default=1, help="rooms to replay one after another")
+    parser.add_argument("--speed", type=float, default=1.0, help="divide trace and stub delays by this")
+    parser.add_argument("--stt-latency", type=float, default=0.25)
+    parser.add_argument("--llm-first-token", type=float, default=0.35)
+    parser.add_argument("--llm-per-token", type=float, default=0.01)
+    parser.add_argument("--tts-latency", type=float, default=0.15)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    trace = DEFAULT_TRACE
+    if args.trace:
+        with open(args.trace, encoding="utf-8") as fh:
+            trace = json.load(fh)
+
+    logging.basicConfig(level=logging.WARNING)
+    plugins = StubPlugins(
+        stt_latency=Latency(args.stt_latency, args.jitter),
+        llm_first_token=Latency(args.llm_first_token, args.jitter),
+        llm_per_token=args.llm_per_token,
+        tts_latency=Latency(args.tts_latency, args.jitter),
+        speed=args.speed,
+        seed=args.seed,
+    )
+
+    reports = asyncio.run(run_replay(trace, plugins, rooms=args.rooms))
+    for report in reports:
+        print(json.dumps(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(reports, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
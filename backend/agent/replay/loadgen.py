@@ -0,0 +1,178 @@
+"""Multi-room load generator and capacity benchmark for the agent worker.
+
+Starts N simulated rooms against the local room stand-in, each running a
+randomized mix of continuous and click-to-talk turns, agent switches and file
+uploads. Rooms run one per thread with their own event loop, matching the
+worker's JobExecutorType.THREAD, and share one stub VAD the way rooms share
+VAD_MODEL. Prints a capacity curve of rooms against per-turn latency, CPU and RSS:
+    python3 -m agent.replay.loadgen --rooms 1,2,4,8,16 --speed 4 --vad-cpu-ms 40
+"""
+import argparse
+import asyncio
+import csv
+import random
+import resource
+import sys
+import threading
+import time
+
+from .harness import LEASE_TEXT, RoomRecorder, replay_room
+from .stubs import Latency, StubPlugins, StubVAD
+
+
+UTTERANCES = [
+    "hello hakim I need help with my lease",
+    "my landlord kept the whole deposit",
+    "what does the termination clause mean",
+    "can I break the contract early",
+]
+
+
+def generate_trace(rng: random.Random, duration: float = 60.0, upload_rate: float = 0.15, switch_rate: float = 0.2):
+    """A randomized room: continuous/click-to-talk turns, switches and uploads"""
+    events = []
+    t = 1.0
+    manual = False
+    while t < duration:
+        roll = rng.random()
+        if roll < switch_rate:
+            manual = not manual
+            target = rng.choice(["click_to_talk", "arabic_click_to_talk"] if manual else ["attorney", "arabic"])
+            events.append({"at": t, "type": "data", "payload": f"switch_to_{target}"})
+            t += rng.uniform(3.0, 5.0)
+        elif roll < switch_rate + upload_rate:
+            events.append({
+                "at": t, "type": "upload", "fileName": "lease.txt",
+                "mimeType": "text/plain", "text": LEASE_TEXT * rng.randint(1, 5),
+            })
+            t += rng.uniform(4.0, 8.0)
+        else:
+            speech = rng.uniform(1.5, 5.0)
+            if t + 0.4 + speech >= duration:
+                # A turn still open at "end" would never be released
+                break
+            text = rng.choice(UTTERANCES)
+            if manual:
+                events.append({"at": t, "type": "rpc", "method": "start_turn"})
+                events.append({"at": t + 0.2, "type": "speech", "duration": speech, "text": text})
+                events.append({"at": t + 0.4 + speech, "type": "rpc", "method": "end_turn"})
+            else:
+                events.append({"at": t, "type": "speech", "duration": speech, "text": text})
+            t += speech + rng.uniform(5.0, 9.0)
+    events.append({"at": duration, "type": "end"})
+    return events
+
+
+def _rss_kib() -> float:
+    """Current resident set size; falls back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * resource.getpagesize() / 1024
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 if sys.platform == "darwin" else peak
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval: float = 0.1) -> None:
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = _rss_kib()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, _rss_kib())
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round((len(ordered) - 1) * q)), len(ordered) - 1)]
+
+
+def run_level(rooms: int, args, vad: StubVAD) -> dict:
+    """Run `rooms` concurrent rooms, one thread and event loop each"""
+    recorders = [RoomRecorder() for _ in range(rooms)]
+
+    def room_thread(index: int) -> None:
+        rng = random.Random(args.seed * 1000 + index)
+        plugins = StubPlugins(
+            stt_latency=Latency(args.stt_latency, 0.05),
+            llm_first_token=Latency(args.llm_first_token, 0.1),
+            tts_latency=Latency(args.tts_latency, 0.05),
+            speed=args.speed,
+            seed=args.seed * 1000 + index,
+            vad=vad,
+        )
+        trace = generate_trace(rng, duration=args.duration)
+        asyncio.run(replay_room(trace, plugins, name=f"load-{index}", recorder=recorders[index]))
+
+    sampler = RssSampler()
+    sampler.start()
+    rss_before = _rss_kib()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+
+    threads = [threading.Thread(target=room_thread, args=(i,), daemon=True) for i in range(rooms)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wall = time.perf_counter() - wall_before
+    cpu = time.process_time() - cpu_before
+    sampler.stop()
+
+    latencies = [latency for recorder in recorders for latency in recorder.turn_latencies]
+    return {
+        "rooms": rooms,
+        "turns": len(latencies),
+        "turn_p50_s": round(_percentile(latencies, 0.5), 3),
+        "turn_p95_s": round(_percentile(latencies, 0.95), 3),
+        "turn_max_s": round(max(latencies, default=0.0), 3),
+        "cpu_cores": round(cpu / wall, 3) if wall else 0.0,
+        "rss_peak_mib": round(sampler.peak / 1024, 1),
+        "rss_growth_mib": round((sampler.peak - rss_before) / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", default="1,2,4,8", help="comma-separated room counts")
+    parser.add_argument("--duration", type=float, default=60.0, help="simulated seconds per room")
+    parser.add_argument("--speed", type=float, default=4.0)
+    parser.add_argument("--vad-cpu-ms", type=float, default=30.0, help="VAD CPU per second of speech")
+    parser.add_argument("--stt-latency", type=float, default=0.25)
+    parser.add_argument("--llm-first-token", type=float, default=0.35)
+    parser.add_argument("--tts-latency", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--csv", help="write the capacity curve to this CSV file")
+    args = parser.parse_args()
+
+    vad = StubVAD(cpu_ms_per_second=args.vad_cpu_ms)
+    curve = []
+    for rooms in (int(value) for value in args.rooms.split(",")):
+        row = run_level(rooms, args, vad)
+        curve.append(row)
+        print(
+            f"rooms={row['rooms']:<4} turns={row['turns']:<5} p50={row['turn_p50_s']:.3f}s "
+            f"p95={row['turn_p95_s']:.3f}s cpu={row['cpu_cores']:.2f} cores "
+            f"rss={row['rss_peak_mib']}MiB (+{row['rss_growth_mib']})"
+        )
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.DictWriter(fh, fieldnames=list(curve[0]))
+            writer.writeheader()
+            writer.writerows(curve)
+
+
+if __name__ == "__main__":
+    main()
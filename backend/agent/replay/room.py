@@ -0,0 +1,125 @@
+import asyncio
+
+
+class FakeDataPacket:
+    """Mirrors rtc.DataPacket as delivered to 'data_received' handlers"""
+
+    def __init__(self, data: bytes, participant) -> None:
+        self.data = data
+        self.participant = participant
+        self.topic = None
+
+
+class FakeParticipant:
+    def __init__(self, identity: str) -> None:
+        self.identity = identity
+
+
+class FakeRpcInvocation:
+    def __init__(self, caller_identity: str, payload: str = "") -> None:
+        self.caller_identity = caller_identity
+        self.payload = payload
+        self.request_id = ""
+
+
+class FakeStreamInfo:
+    def __init__(self, name: str, mime_type: str, size: int, topic: str = "files") -> None:
+        self.name = name
+        self.mime_type = mime_type
+        self.size = size
+        self.topic = topic
+
+
+class FakeByteStreamReader:
+    def __init__(self, info: FakeStreamInfo, payload: bytes, chunk_size: int = 15_000) -> None:
+        self.info = info
+        self._payload = payload
+        self._chunk_size = chunk_size
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for offset in range(0, len(self._payload), self._chunk_size):
+            yield self._payload[offset:offset + self._chunk_size]
+            await asyncio.sleep(0)
+
+
+class FakeLocalParticipant:
+    def __init__(self) -> None:
+        self.identity = "agent-replay"
+        self.rpc_methods = {}
+        self.published = []
+
+    def register_rpc_method(self, method: str, handler=None):
+        def register(fn):
+            self.rpc_methods[method] = fn
+            return fn
+        return register(handler) if handler is not None else register
+
+    async def publish_data(self, payload, **kwargs) -> None:
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        self.published.append(payload)
+
+    async def perform_rpc_from(self, caller_identity: str, method: str, payload: str = ""):
+        """Invoke a registered RPC as if a remote participant called it"""
+        handler = self.rpc_methods.get(method)
+        if handler is None:
+            raise KeyError(f"RPC method not registered: {method}")
+        return await handler(FakeRpcInvocation(caller_identity, payload))
+
+
+class FakeRoom:
+    """Local LiveKit room stand-in: events, byte streams, RPC and data packets"""
+
+    def __init__(self, name: str = "replay-room") -> None:
+        self.name = name
+        self.local_participant = FakeLocalParticipant()
+        self.remote_participants = {}
+        self._handlers = {}
+        self._byte_stream_handlers = {}
+
+    def on(self, event: str, callback=None):
+        def register(fn):
+            self._handlers.setdefault(event, []).append(fn)
+            return fn
+        return register(callback) if callback is not None else register
+
+    def off(self, event: str, callback) -> None:
+        if callback in self._handlers.get(event, []):
+            self._handlers[event].remove(callback)
+
+    def emit(self, event: str, *args) -> None:
+        for fn in list(self._handlers.get(event, [])):
+            fn(*args)
+
+    def register_byte_stream_handler(self, topic: str, handler) -> None:
+        if topic in self._byte_stream_handlers:
+            raise ValueError(f"byte stream handler for topic '{topic}' already set")
+        self._byte_stream_handlers[topic] = handler
+
+    def unregister_byte_stream_handler(self, topic: str) -> None:
+        self._byte_stream_handlers.pop(topic, None)
+
+    def connect(self, identity: str) -> FakeParticipant:
+        participant = self.remote_participants[identity] = FakeParticipant(identity)
+        self.emit("participant_connected", participant)
+        return participant
+
+    def disconnect(self, identity: str) -> None:
+        participant = self.remote_participants.pop(identity, None)
+        if participant is not None:
+            self.emit("participant_disconnected", participant)
+
+    def send_data(self, message: str, identity: str = "user") -> None:
+        self.emit("data_received", FakeDataPacket(message.encode("utf-8"), FakeParticipant(identity)))
+
+    def send_file(self, name: str, mime_type: str, payload: bytes, identity: str = "user") -> None:
+        handler = self._byte_stream_handlers.get("files")
+        if handler is None:
+            raise KeyError("No byte stream handler for topic 'files'")
+        handler(FakeByteStreamReader(FakeStreamInfo(name, mime_type, len(payload)), payload), identity)
+
+    async def sid(self) -> str:
+        return f"RM_{self.name}"
@@ -0,0 +1,585 @@
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from ..documents import SessionIndex, extract_text
+from ..registry import get_profile
+
+
+VAD_DELAY = 0.1  # seconds between speech starting/stopping and the VAD reporting it
+AUDIO_QUEUE = 0.2  # seconds of synthesized audio buffered ahead of playout, like RoomIO's audio output
+AUDIO_FRAME = 0.01  # playout granularity; clearing the buffer stops within one frame
+ROOM_IO_START = 0.15  # RoomIO.start(): subscribe the caller's audio track, publish the agent's
+SESSION_START = 0.2  # AgentSession.start(): open the STT stream and start the agent's activity
+SESSION_CLOSE = 0.25  # AgentSession.close(): drain the activity and close the plugin streams
+
+
+@dataclass
+class Latency:
+    """Configurable latency of a stub plugin, in seconds"""
+    mean: float = 0.0
+    jitter: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.jitter <= 0:
+            return max(self.mean, 0.0)
+        return max(rng.uniform(self.mean - self.jitter, self.mean + self.jitter), 0.0)
+
+
+class StubSTT:
+    """Returns the scripted transcript after a final-result latency"""
+
+    def __init__(self, latency: Latency, clock) -> None:
+        self.latency = latency
+        self.clock = clock
+
+    async def transcribe(self, text: str, rng: random.Random) -> str:
+        await self.clock.sleep(self.latency.sample(rng))
+        return text
+
+    def stream(self):
+        return StubSpeechStream(self)
+
+
+class StubSpeechData:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class StubSpeechEvent:
+    """Mirrors stt.SpeechEvent and vad.VADEvent: a type plus, for transcripts, the recognized text"""
+
+    def __init__(self, type: str, text: str = "") -> None:
+        self.type = type
+        self.alternatives = [StubSpeechData(text)] if text else []
+
+
+class _StubEventStream:
+    """Events pushed by a stub stream, iterated until aclose()"""
+
+    def __init__(self) -> None:
+        self._events = asyncio.Queue()
+        self.frames = 0
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            event = await self._events.get()
+            if event is None:
+                return
+            yield event
+
+    async def aclose(self) -> None:
+        self._events.put_nowait(None)
+
+
+class StubSpeechStream(_StubEventStream):
+    """Streaming STT: the frame that ends a scripted utterance yields its final transcript after the STT latency"""
+
+    def __init__(self, stt: StubSTT) -> None:
+        super().__init__()
+        self.stt = stt
+        self.rng = random.Random(0)
+        self._pending = set()
+
+    def push_frame(self, frame) -> None:
+        self.frames += 1
+        if getattr(frame, "text", ""):
+            task = asyncio.ensure_future(self._finalize(frame.text))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _finalize(self, text: str) -> None:
+        self._events.put_nowait(StubSpeechEvent("final_transcript", await self.stt.transcribe(text, self.rng)))
+
+    def flush(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        for task in list(self._pending):
+            task.cancel()
+        await super().aclose()
+
+
+class StubLLM:
+    """Streams a canned reply with time-to-first-token and per-token latency"""
+
+    def __init__(self, first_token: Latency, per_token: float, clock, reply_words: int = 30) -> None:
+        self.first_token = first_token
+        self.per_token = per_token
+        self.clock = clock
+        self.reply_words = reply_words
+
+    async def stream(self, prompt: str, rng: random.Random):
+        await self.clock.sleep(self.first_token.sample(rng))
+        for index in range(self.reply_words):
+            yield f"word{index} "
+            if self.per_token:
+                await self.clock.sleep(self.per_token)
+
+
+class StubTTS:
+    """Synthesizes a sentence after a first-byte latency"""
+
+    def __init__(self, latency: Latency, clock) -> None:
+        self.latency = latency
+        self.clock = clock
+
+    async def synthesize(self, text: str, rng: random.Random) -> float:
+        await self.clock.sleep(self.latency.sample(rng))
+        # Roughly 15 characters per second of speech
+        return len(text) / 15.0
+
+
+class FakeProvider:
+    """Streaming provider with injected latency, stalls and errors, for exercising agent.routing"""
+
+    def __init__(
+        self,
+        name: str,
+        first_item: Latency,
+        stall_rate: float = 0.0,
+        stall: float = 4.0,
+        error_rate: float = 0.0,
+        items: int = 5,
+        per_item: float = 0.0,
+        seed: int = 0,
+        clock=None,
+    ) -> None:
+        self.name = name
+        self.first_item = first_item
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.error_rate = error_rate
+        self.items = items
+        self.per_item = per_item
+        self.rng = random.Random(seed)
+        self.clock = clock or ScaledClock()
+        self.calls = 0
+
+    async def stream(self):
+        self.calls += 1
+        delay = self.first_item.sample(self.rng)
+        if self.rng.random() < self.stall_rate:
+            delay += self.stall
+        await self.clock.sleep(delay)
+        if self.rng.random() < self.error_rate:
+            raise ConnectionError(f"{self.name} returned 503")
+        for index in range(self.items):
+            yield f"{self.name}-{index}"
+            if self.per_item:
+                await self.clock.sleep(self.per_item)
+
+
+class StubVAD:
+    """Shared VAD model stand-in: burns CPU per audio frame under one lock, like the worker's VAD_MODEL"""
+
+    def __init__(self, cpu_ms_per_second: float = 0.0, frame: float = 0.1) -> None:
+        self.cpu_ms_per_second = cpu_ms_per_second
+        self.frame = frame
+        self._lock = threading.Lock()
+
+    def _infer(self, seconds: float = None) -> None:
+        seconds = self.frame if seconds is None else seconds
+        deadline = time.perf_counter() + self.cpu_ms_per_second * seconds / 1000.0
+        with self._lock:
+            while time.perf_counter() < deadline:
+                pass
+
+    async def process(self, seconds: float, clock) -> None:
+        """Consume `seconds` of audio frame by frame"""
+        remaining = seconds
+        while remaining > 0:
+            if self.cpu_ms_per_second:
+                self._infer()
+            step = min(self.frame, remaining)
+            await clock.sleep(step)
+            remaining -= step
+
+    def stream(self):
+        return StubVADStream(self)
+
+
+class StubVADStream(_StubEventStream):
+    """Per-participant VAD stream on the shared model: inference on every frame, events on speech edges"""
+
+    def __init__(self, vad: StubVAD) -> None:
+        super().__init__()
+        self.vad = vad
+        self.speaking = False
+
+    def push_frame(self, frame) -> None:
+        self.frames += 1
+        if self.vad.cpu_ms_per_second:
+            self.vad._infer(frame.seconds)
+        if frame.speech != self.speaking:
+            self.speaking = frame.speech
+            self._events.put_nowait(StubSpeechEvent("start_of_speech" if frame.speech else "end_of_speech"))
+
+
+class StubEvent:
+    def __init__(self, new_state: str) -> None:
+        self.new_state = new_state
+
+
+class StubChatMessage:
+    def __init__(self, role: str, text_content: str) -> None:
+        self.role = role
+        self.text_content = text_content
+
+
+class StubItemEvent:
+    """Mirrors the conversation_item_added event"""
+
+    def __init__(self, role: str, text: str) -> None:
+        self.item = StubChatMessage(role, text)
+
+
+class StubChatContext:
+    def __init__(self, items=None) -> None:
+        self.items = list(items or [])
+
+    def copy(self):
+        return StubChatContext(self.items)
+
+    def add_message(self, role: str, content: str) -> None:
+        self.items.append(StubChatMessage(role, content))
+
+
+class StubAudioFrame:
+    """Room audio frame; `speech` marks frames inside a scripted utterance, `text` the one that ends it"""
+    sample_rate = 16000
+
+    def __init__(self, seconds: float, speech: bool, text: str = "") -> None:
+        self.samples_per_channel = int(seconds * self.sample_rate)
+        self.seconds = seconds
+        self.speech = speech
+        self.text = text
+
+
+class StubAudioInput:
+    def __init__(self) -> None:
+        self.audio_enabled = False
+
+    def set_audio_enabled(self, enabled: bool) -> None:
+        self.audio_enabled = enabled
+
+
+class StubAudioOutput:
+    """Agent audio output: audio queued ahead of playout keeps playing until the buffer is cleared"""
+
+    def __init__(self, session, queue: float = AUDIO_QUEUE) -> None:
+        self.session = session
+        self.queue = queue
+        self.clears = 0
+
+    def clear_buffer(self) -> None:
+        self.clears += 1
+        self.session._flush_playout()
+
+
+class StubOutput:
+    def __init__(self, session) -> None:
+        self.audio = StubAudioOutput(session)
+
+
+class StubSession:
+    """Stands in for AgentSession: scripted STT, streamed LLM, TTS and timed playout"""
+
+    def __init__(self, plugins, recorder, **options) -> None:
+        self.options = options
+        self.stt, self.llm, self.tts = plugins.stt, plugins.llm, plugins.tts
+        self.vad = plugins.vad if options.get("turn_detection") != "manual" else None
+        self.clock = plugins.clock
+        self.rng = plugins.rng
+        self.recorder = recorder
+        self.input = StubAudioInput()
+        self.output = StubOutput(self)
+        self.agent_state = "listening"
+        self.agent = None
+        self.closed = False
+        self._room_io = None
+        self._handlers = {}
+        self._pending_transcript = []
+        self._speech = None
+        self._turn_started = None
+        self._user_audio = False
+        self._audio_task = None
+        self._silence = None
+        self._drain = None
+
+    def on(self, event: str, callback=None):
+        def register(fn):
+            self._handlers.setdefault(event, []).append(fn)
+            return fn
+        return register(callback) if callback is not None else register
+
+    def off(self, event: str, callback) -> None:
+        if callback in self._handlers.get(event, []):
+            self._handlers[event].remove(callback)
+
+    def update_options(self, *, min_endpointing_delay=None, max_endpointing_delay=None) -> None:
+        if min_endpointing_delay is not None:
+            self.options["min_endpointing_delay"] = min_endpointing_delay
+        if max_endpointing_delay is not None:
+            self.options["max_endpointing_delay"] = max_endpointing_delay
+
+    def emit(self, event: str, payload) -> None:
+        for fn in list(self._handlers.get(event, [])):
+            fn(payload)
+
+    def _set_agent_state(self, state: str) -> None:
+        self.agent_state = state
+        self.emit("agent_state_changed", StubEvent(state))
+
+    async def start(self, agent) -> None:
+        await self.clock.sleep(SESSION_START)
+        self.agent = agent
+        agent.session = self
+        self._audio_task = asyncio.create_task(self._stream_audio())
+        asyncio.create_task(agent.on_enter())
+
+    async def close(self) -> None:
+        self.closed = True
+        self.interrupt()
+        if self._audio_task is not None:
+            self._audio_task.cancel()
+        await self.clock.sleep(SESSION_CLOSE)
+
+    async def _stream_audio(self, frame: float = 0.1) -> None:
+        """Room audio through the agent's stt_node while input is enabled, like AudioRecognition"""
+        async def frames():
+            while not self.closed:
+                await self.clock.sleep(frame)
+                if self.input.audio_enabled:
+                    audio = StubAudioFrame(frame, self._user_audio)
+                    self.recorder.room_audio(audio)
+                    yield audio
+
+        async for audio in self.agent.stt_node(frames(), None):
+            self.recorder.stt_audio(audio)
+
+    def interrupt(self):
+        """Cancel the current speech; the future resolves once its queued audio has played out"""
+        if self._speech and not self._speech.done():
+            self._speech.cancel()
+        self._speech = None
+        if self.agent_state == "speaking":
+            if self._silence is None:
+                self._silence = asyncio.get_running_loop().create_future()
+                self._drain = asyncio.ensure_future(self._play_out(self.output.audio.queue))
+            return self._silence
+        if self.agent_state == "thinking":
+            self._set_agent_state("listening")
+        done = asyncio.get_running_loop().create_future()
+        done.set_result(None)
+        return done
+
+    def _flush_playout(self) -> None:
+        """Drop queued audio; playout stops at the end of the current frame"""
+        if self._drain is not None and not self._drain.done():
+            self._drain.cancel()
+            self._drain = asyncio.ensure_future(self._play_out(AUDIO_FRAME))
+
+    async def _play_out(self, seconds: float) -> None:
+        await self.clock.sleep(seconds)
+        silence, self._silence, self._drain = self._silence, None, None
+        if self._speech is None:
+            self._set_agent_state("listening")
+        if silence is not None and not silence.done():
+            silence.set_result(None)
+
+    def clear_user_turn(self) -> None:
+        self._pending_transcript = []
+
+    def commit_user_turn(self, transcript_timeout: float = 3.0) -> None:
+        text = " ".join(self._pending_transcript)
+        self._pending_transcript = []
+        if text:
+            self._turn_started = self.clock.now()
+            self.emit("conversation_item_added", StubItemEvent("user", text))
+            self.generate_reply(user_input=text)
+
+    async def user_speech(self, duration: float, text: str) -> None:
+        """Play a scripted utterance into the session"""
+        if self.closed or not self.input.audio_enabled:
+            return
+        # In continuous mode the VAD reports speech a little after the onset and silence a little after the end
+        vad_delay = VAD_DELAY if self.options.get("turn_detection") != "manual" else 0.0
+        self._user_audio = True
+        await self.clock.sleep(vad_delay)
+        self.emit("user_state_changed", StubEvent("speaking"))
+        if self.vad is not None:
+            await self.vad.process(max(duration - vad_delay, 0.0), self.clock)
+        else:
+            await self.clock.sleep(max(duration - vad_delay, 0.0))
+        self._user_audio = False
+        await self.clock.sleep(vad_delay)
+        self.emit("user_state_changed", StubEvent("listening"))
+        transcript = await self.stt.transcribe(text, self.rng)
+        if self.options.get("turn_detection") == "manual":
+            self._pending_transcript.append(transcript)
+            return
+        # Continuous mode: reply once the endpointing delay elapses
+        ended_at = self.clock.now()
+        await self.clock.sleep(self.options.get("min_endpointing_delay", 0.5))
+        if not self.closed and self.input.audio_enabled:
+            self._turn_started = ended_at
+            self.emit("conversation_item_added", StubItemEvent("user", transcript))
+            self.generate_reply(user_input=transcript)
+
+    def generate_reply(self, instructions: str = None, user_input: str = None, allow_interruptions: bool = True):
+        self.interrupt()
+        self._speech = asyncio.create_task(self._speak(user_input or instructions or ""))
+        return self._speech
+
+    async def _speak(self, prompt: str) -> None:
+        turn_started = self._turn_started
+        self._turn_started = None
+        self._set_agent_state("thinking")
+        sentence = []
+        reply = []
+        first_audio = True
+        async for token in self.llm.stream(prompt, self.rng):
+            sentence.append(token)
+            reply.append(token)
+            if len(sentence) < 10:
+                continue
+            seconds = await self.tts.synthesize("".join(sentence), self.rng)
+            if first_audio:
+                first_audio = False
+                self._set_agent_state("speaking")
+                self.recorder.first_audio(self, turn_started)
+            sentence = []
+            await self.clock.sleep(seconds)
+        self.emit("conversation_item_added", StubItemEvent("assistant", "".join(reply)))
+        self._set_agent_state("listening")
+
+
+class StubAgent:
+    """Stands in for ProfileAgent; uses the real document extraction"""
+
+    def __init__(self, agent_type: str, stt: StubSTT = None) -> None:
+        self.profile = get_profile(agent_type)
+        self.chat_ctx = StubChatContext()
+        self.session = None
+        self.stt = stt
+        self.stt_gate = None
+        # Replaced by the room runtime's, like ProfileAgent's
+        self.documents = None
+        self.search_index = SessionIndex()
+        self.session_store = None
+
+    def __repr__(self) -> str:
+        return f"StubAgent({self.profile.name})"
+
+    async def on_enter(self):
+        self.session.generate_reply(instructions=self.profile.greeting)
+
+    async def update_chat_ctx(self, chat_ctx) -> None:
+        self.chat_ctx = chat_ctx
+
+    async def stt_node(self, audio, model_settings):
+        # Yields the frames the STT provider would have been sent
+        if self.stt_gate is not None:
+            audio = self.stt_gate.gate(audio)
+        async for frame in audio:
+            yield frame
+
+    async def _file_received(self, reader, participant_identity):
+        file_bytes = bytearray()
+        async for chunk in reader:
+            file_bytes.extend(chunk)
+        await self._file_received_fallback(bytes(file_bytes), reader.info, participant_identity)
+
+    async def _file_received_fallback(self, file_bytes, stream_info, participant_identity):
+        content = await asyncio.to_thread(
+            extract_text, file_bytes, stream_info.name, stream_info.mime_type, self.profile.language
+        )
+        if content:
+            self.chat_ctx.add_message(role="user", content=content)
+            await asyncio.to_thread(self.search_index.add_pages, stream_info.name, [(1, content)], participant_identity)
+        self.session.generate_reply(instructions=f"Analyze {stream_info.name}")
+
+
+class StubRoomIO:
+    """Subscribes to the room's events like RoomIO, so one that is never closed keeps its session alive.
+
+    start() takes ROOM_IO_START, the time RoomIO needs to subscribe the
+    caller's track and publish the agent's, and follows the session's agent
+    state the way RoomIO publishes it as a participant attribute.
+    """
+
+    def __init__(self, session, room, **options) -> None:
+        self._agent_session = session
+        self.room = room
+        self.options = options
+        self.participant = None
+        self.agent_state = None
+        # StubSession plays media itself; RoomIO's streams are only moved between sessions
+        self.audio_input = self.video_input = self.audio_output = self.transcription_output = None
+
+    async def start(self) -> None:
+        self.room.on("participant_connected", self._on_participant_connected)
+        await self._agent_session.clock.sleep(ROOM_IO_START)
+        self._agent_session.on("agent_state_changed", self._on_agent_state_changed)
+        self._agent_session.on("user_input_transcribed", self._on_user_input_transcribed)
+        self._agent_session.on("close", self._on_agent_session_close)
+        self._agent_session._room_io = self
+
+    async def aclose(self) -> None:
+        self.room.off("participant_connected", self._on_participant_connected)
+
+    def _on_agent_state_changed(self, event) -> None:
+        self.agent_state = event.new_state
+
+    def _on_user_input_transcribed(self, event) -> None:
+        pass
+
+    def _on_agent_session_close(self, event) -> None:
+        pass
+
+    def _on_participant_connected(self, participant) -> None:
+        if self.participant is None:
+            self.participant = participant.identity
+
+    def set_participant(self, identity: str) -> None:
+        self.participant = identity
+
+
+class ScaledClock:
+    """Wall-clock timestamps; stub and trace delays are divided by a speed-up factor"""
+
+    def __init__(self, speed: float = 1.0) -> None:
+        self.speed = speed
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds / self.speed if seconds > 0 else 0)
+
+
+class StubPlugins:
+    """Latency settings shared by the stub STT/LLM/TTS of a replay run"""
+
+    def __init__(
+        self,
+        stt_latency: Latency = Latency(0.25, 0.05),
+        llm_first_token: Latency = Latency(0.35, 0.1),
+        llm_per_token: float = 0.01,
+        tts_latency: Latency = Latency(0.15, 0.05),
+        speed: float = 1.0,
+        seed: int = 0,
+        vad: StubVAD = None,
+    ) -> None:
+        self.clock = ScaledClock(speed)
+        self.vad = vad
+        self.rng = random.Random(seed)
+        self.stt = StubSTT(stt_latency, self.clock)
+        self.llm = StubLLM(llm_first_token, llm_per_token, self.clock)
+        self.tts = StubTTS(tts_latency, self.clock)
@@ -0,0 +1,144 @@
+import logging
+import os
+
+from .audio_input import build_noise_cancellation
+from .lifecycle import AUDITOR
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Keep one RoomIO per room and re-bind it to each new session; ROOM_IO_REUSE=0 starts one per session
+ROOM_IO_REUSE = os.getenv("ROOM_IO_REUSE", "1") != "0"
+
+# Handlers RoomIO.start() registers on its AgentSession (publishing agent state, user transcripts, closing with it)
+_SESSION_HANDLERS = (
+    ("agent_state_changed", "_on_agent_state_changed"),
+    ("user_input_transcribed", "_on_user_input_transcribed"),
+    ("close", "_on_agent_session_close"),
+)
+# RoomIO attribute -> (session side, slot)
+_STREAMS = {
+    "audio_input": ("input", "audio"),
+    "video_input": ("input", "video"),
+    "audio_output": ("output", "audio"),
+    "transcription_output": ("output", "transcription"),
+}
+
+
+# Private members re-binding reads and writes, since RoomIO has no public way to change sessions
+_ROOM_IO_INTERNALS = ("_agent_session", *(name for _, name in _SESSION_HANDLERS), *_STREAMS)
+_SESSION_INTERNALS = ("_room_io", "input", "output", "on", "off")
+# None until the first RoomIO is checked; the SDK does not change while the worker runs
+_missing_internals = None
+
+
+def missing_internals(room_io, session):
+    """The private RoomIO/AgentSession members re-binding needs that this livekit-agents lacks"""
+    global _missing_internals
+    if _missing_internals is None:
+        _missing_internals = [f"RoomIO.{name}" for name in _ROOM_IO_INTERNALS if not hasattr(room_io, name)] + [
+            f"AgentSession.{name}" for name in _SESSION_INTERNALS if not hasattr(session, name)
+        ]
+        if _missing_internals:
+            logger.warning(
+                f"⚠️ RoomIO re-binding disabled, livekit-agents lacks {', '.join(_missing_internals)}; "
+                "starting a RoomIO per switch"
+            )
+    return _missing_internals
+
+
+def _detach(room_io, session) -> None:
+    for event, name in _SESSION_HANDLERS:
+        session.off(event, getattr(room_io, name))
+    for attribute, (side, slot) in _STREAMS.items():
+        if getattr(room_io, attribute) is not None:
+            setattr(getattr(session, side), slot, None)
+    if session._room_io is room_io:
+        session._room_io = None
+
+
+def _attach(room_io, session) -> None:
+    for attribute, (side, slot) in _STREAMS.items():
+        stream = getattr(room_io, attribute)
+        if stream is not None:
+            setattr(getattr(session, side), slot, stream)
+    for event, name in _SESSION_HANDLERS:
+        session.on(event, getattr(room_io, name))
+    room_io._agent_session = session
+    session._room_io = room_io
+
+
+class PersistentRoomIO:
+    """The room's RoomIO, started once and re-bound to each new AgentSession.
+
+    Starting a RoomIO subscribes the caller's audio track and publishes the
+    agent's, so doing it per switch renegotiates media every time. Instead
+    the outgoing session is released before it closes and the same RoomIO's
+    input, output and session handlers move to the next one. That touches
+    RoomIO and AgentSession internals, so they are checked once and a
+    livekit-agents without them gets a RoomIO per session. A profile that
+    asks for a different noise-cancellation filter gets a new RoomIO, since
+    the filter is set when the track is subscribed; a profile without one
+    keeps the current filter.
+    """
+
+    def __init__(self, room, factory, reuse: bool = ROOM_IO_REUSE) -> None:
+        self.room = room
+        self.factory = factory
+        self.reuse = reuse
+        self.room_io = None
+        self.session = None
+        self.noise_cancellation = ""
+        self.starts = 0
+        self.rebinds = 0
+
+    async def bind(self, session, noise_cancellation: str = ""):
+        """Connect `session` to the room's audio and transcription; returns the RoomIO"""
+        reusable = (
+            self.reuse
+            and self.room_io is not None
+            and self.session is None
+            and (not noise_cancellation or noise_cancellation == self.noise_cancellation)
+        )
+        if reusable:
+            _attach(self.room_io, session)
+            self.session = session
+            self.rebinds += 1
+            return self.room_io
+
+        await self.aclose()
+        self.room_io = self.factory(session, self.room, noise_cancellation=build_noise_cancellation(noise_cancellation))
+        AUDITOR.track(getattr(self.room, "name", "room"), "room_io", self.room_io)
+        await self.room_io.start()
+        if self.reuse and missing_internals(self.room_io, session):
+            self.reuse = False
+        self.session = session
+        self.noise_cancellation = noise_cancellation
+        self.starts += 1
+        return self.room_io
+
+    def release(self, session) -> None:
+        """Detach a session that is about to close, so closing it leaves the room's media running"""
+        if not self.reuse or self.room_io is None or session is not self.session:
+            return
+        try:
+            _detach(self.room_io, session)
+        except Exception as e:
+            # Re-binding onto a half-detached session would double its handlers; start fresh instead
+            logger.warning(f"⚠️ Failed to detach RoomIO from the outgoing session: {e}")
+            self.reuse = False
+        self.session = None
+
+    async def aclose(self) -> None:
+        """Close the RoomIO so it stops listening to the room's events"""
+        room_io, self.room_io, self.session = self.room_io, None, None
+        if room_io is None:
+            return
+        try:
+            await room_io.aclose()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to close RoomIO: {e}")
+        AUDITOR.retire(room_io)
+
+    def metrics(self) -> dict:
+        return {"starts": self.starts, "rebinds": self.rebinds}
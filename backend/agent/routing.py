@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from .logging_setup import log_event
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Hedge after the primary's p90 time to first response, clamped to this range
+HEDGE_MIN_MS = int(os.getenv("HEDGE_MIN_MS", "400"))
+HEDGE_MAX_MS = int(os.getenv("HEDGE_MAX_MS", "2500"))
+HEDGING_ENABLED = os.getenv("HEDGING", "1") != "0"
+FIRST_RESPONSE_TIMEOUT = float(os.getenv("FIRST_RESPONSE_TIMEOUT", "8"))
+BREAKER_ERROR_RATE = 0.5
+BREAKER_MIN_REQUESTS = 4
+BREAKER_WINDOW = 20
+BREAKER_COOLDOWN = 30.0
+LATENCY_WINDOW = 50
+SLOW_FACTOR = 2.0  # a provider this many times slower than the fastest is tried after the others
+
+_EXHAUSTED = object()
+
+
+def _quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """Opens when too many recent requests failed; lets one probe through after a cooldown"""
+
+    def __init__(
+        self,
+        error_rate: float = BREAKER_ERROR_RATE,
+        min_requests: int = BREAKER_MIN_REQUESTS,
+        window: int = BREAKER_WINDOW,
+        cooldown: float = BREAKER_COOLDOWN,
+        clock=time.monotonic,
+    ) -> None:
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.clock = clock
+        self.outcomes = deque(maxlen=window)
+        self.opened_at = None
+        self.trips = 0
+        self._probing = False
+        # ROUTERS is shared by every room thread of the worker
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.clock() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """A probe was abandoned without an outcome (it lost a hedge race)"""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._record(ok)
+
+    def _record(self, ok: bool) -> None:
+        if self.opened_at is not None and self._probing:
+            # The probe decides: close and forget the errors, or stay open for another cooldown
+            self._probing = False
+            if ok:
+                self.opened_at = None
+                self.outcomes.clear()
+            else:
+                self.opened_at = self.clock()
+            return
+        self.outcomes.append(ok)
+        failures = self.outcomes.count(False)
+        if (
+            self.opened_at is None
+            and len(self.outcomes) >= self.min_requests
+            and failures / len(self.outcomes) >= self.error_rate
+        ):
+            self.opened_at = self.clock()
+            self.trips += 1
+
+
+class ProviderStats:
+    """Time-to-first-response samples and outcome counters of one provider"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.breaker = CircuitBreaker()
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, latency: float = None, won: bool = False) -> None:
+        with self._lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            if won:
+                self.wins += 1
+            self.breaker.record(ok)
+
+    def record_latency(self, latency: float) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+
+    def count_hedge(self) -> None:
+        with self._lock:
+            self.hedges += 1
+
+    def p50(self) -> float:
+        with self._lock:
+            return _quantile(self.latencies, 0.5)
+
+    def p90(self) -> float:
+        with self._lock:
+            return _quantile(self.latencies, 0.9)
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "wins": self.wins,
+            "hedges": self.hedges,
+            "p50_ms": round(self.p50() * 1000),
+            "p90_ms": round(self.p90() * 1000),
+            "breaker": self.breaker.state,
+            "trips": self.breaker.trips,
+        }
+
+
+class ProviderRouter:
+    """Routes streamed requests over equivalent providers.
+
+    Providers are tried in their declared order; one whose circuit breaker
+    is open, or whose median time to first response is SLOW_FACTOR times the
+    fastest one's, moves to the back (see ranked()). If the chosen one has not
+    produced its first item within its own p90 (clamped to HEDGE_MIN_MS ..
+    HEDGE_MAX_MS), the same request is also sent to the next provider, or
+    duplicated to the same one when there is no other; whichever answers
+    first is streamed and the other is closed. A failure before the first
+    item falls over to the next provider; the winner's outcome is recorded
+    once, when its stream ends. Stats are shared by every room of
+    the worker, since provider latency is not per room.
+    """
+
+    def __init__(self, kind: str, hedge_min: float = HEDGE_MIN_MS / 1000.0, hedge_max: float = HEDGE_MAX_MS / 1000.0) -> None:
+        self.kind = kind
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self.providers = {}
+        self._lock = threading.Lock()
+
+    def stats(self, name: str) -> ProviderStats:
+        with self._lock:
+            if name not in self.providers:
+                self.providers[name] = ProviderStats(name)
+            return self.providers[name]
+
+    def ranked(self, names):
+        """Names in the order to try them.
+
+        The declared order is kept unless a provider's breaker is open or its
+        median time to first response is SLOW_FACTOR times the fastest one's;
+        those go to the back.
+        """
+        known = [self.stats(name).p50() for name in names if self.stats(name).latencies]
+        fastest = min(known, default=0.0)
+
+        def key(item):
+            index, name = item
+            stats = self.stats(name)
+            slow = bool(stats.latencies) and fastest > 0 and stats.p50() > SLOW_FACTOR * fastest
+            return (stats.breaker.state == "open", slow, index)
+
+        return [name for _, name in sorted(enumerate(names), key=key)]
+
+    def hedge_delay(self, name: str) -> float:
+        stats = self.stats(name)
+        p90 = stats.p90() if len(stats.latencies) >= 5 else self.hedge_max
+        return min(max(p90, self.hedge_min), self.hedge_max)
+
+    async def stream(self, candidates, hedge: bool = HEDGING_ENABLED, timeout: float = FIRST_RESPONSE_TIMEOUT):
+        """Yield the items of the first candidate to respond.
+
+        `candidates` maps provider name, in order of preference, to a
+        zero-argument callable opening an async iterator (an LLMStream, a
+        ChunkedStream, ...).
+        """
+        queue = self.ranked(list(candidates))
+        attempts = {}
+        hedged = False
+        last_error = None
+
+        def next_provider():
+            while queue:
+                name = queue.pop(0)
+                if self.stats(name).breaker.allow():
+                    return name
+            return None
+
+        def launch(name):
+            iterator = candidates[name]()
+            started = time.perf_counter()
+
+            async def first_item():
+                try:
+                    return await iterator.__anext__()
+                except StopAsyncIteration:
+                    return _EXHAUSTED
+
+            attempts[asyncio.ensure_future(first_item())] = (name, iterator, started)
+
+        async def close(task):
+            name, iterator, started = attempts.pop(task)
+            if not task.done():
+                task.cancel()
+                # A loser's latency is at least this long; keep it from looking fast
+                self.stats(name).record_latency(time.perf_counter() - started)
+                self.stats(name).breaker.release()
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception:
+                    pass
+
+        # Every breaker open: trying the usual first choice beats failing the turn
+        launch(next_provider() or next(iter(candidates)))
+        deadline = time.perf_counter() + timeout
+        winner = None
+        try:
+            while winner is None:
+                if not attempts:
+                    name = next_provider()
+                    if name is None:
+                        raise last_error or RuntimeError(f"No {self.kind} provider available")
+                    launch(name)
+                primary = next(iter(attempts.values()))[0]
+                wait = deadline - time.perf_counter()
+                if hedge and not hedged:
+                    wait = min(wait, self.hedge_delay(primary))
+                done, _ = await asyncio.wait(
+                    list(attempts), timeout=max(wait, 0.0), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if time.perf_counter() >= deadline:
+                        for task in list(attempts):
+                            name = attempts[task][0]
+                            await close(task)
+                            self.stats(name).record(False)
+                        last_error = asyncio.TimeoutError(f"{self.kind} gave no response in {timeout}s")
+                        deadline = time.perf_counter() + timeout
+                        continue
+                    hedged = True
+                    target = next_provider() or primary
+                    self.stats(primary).count_hedge()
+                    log_event("hedge", "🪁 %s: %s slow, hedging to %s", self.kind, primary, target)
+                    launch(target)
+                    continue
+                for task in done:
+                    name, iterator, started = attempts[task]
+                    error = task.exception()
+                    if error is None:
+                        winner = task
+                        break
+                    last_error = error
+                    attempts.pop(task)
+                    self.stats(name).record(False)
+                    logger.warning(f"⚠️ {self.kind}: {name} failed ({type(error).__name__}: {error}), falling over")
+            name, iterator, started = attempts.pop(winner)
+            for task in list(attempts):
+                await close(task)
+        except BaseException:
+            for task in list(attempts):
+                await close(task)
+            raise
+
+        latency = time.perf_counter() - started
+        first = winner.result()
+        ok = True
+        try:
+            if first is _EXHAUSTED:
+                return
+            yield first
+            async for item in iterator:
+                yield item
+        except Exception:
+            ok = False
+            raise
+        finally:
+            # A caller closing the stream early (an interruption) is not the provider's fault
+            self.stats(name).record(ok, latency, won=True)
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            providers = dict(self.providers)
+        return {name: stats.metrics() for name, stats in providers.items()}
+
+
+ROUTERS = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(kind: str) -> ProviderRouter:
+    """The worker-wide router for "llm", "tts" or "stt" """
+    with _routers_lock:
+        if kind not in ROUTERS:
+            ROUTERS[kind] = ProviderRouter(kind)
+        return ROUTERS[kind]
@@ -0,0 +1,826 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+
+from .audio_input import (
+    STT_GATING_ENABLED,
+    EnergyGate,
+    SpeechGate,
+    gate_session_input,
+)
+from .commands import Command, CommandSequencer, rpc_command_id
+from .documents import DocumentLibrary, SessionIndex
+from .documents.index import DOCUMENT_INDEX_DIR
+from .drain import (
+    DRAIN_POLL,
+    DRAIN_TIMEOUT,
+    ROOM_SNAPSHOT_DIR,
+    RoomSnapshot,
+    chat_items,
+    load_snapshot,
+    restore_chat,
+    save_snapshot,
+)
+from .endpointing import AdaptiveEndpointing
+from .interrupt import InterruptStats, interrupt_and_wait
+from .lifecycle import AUDITOR, LIFECYCLE_AUDIT_ENABLED
+from .logging_setup import log_event
+from .multiparty import MULTIPARTY_ENABLED, MultipartyFrontEnds
+from .normalization import normalize_transcript
+from .registry import AGENT_PROFILES, DEFAULT_AGENT_TYPE, get_profile
+from .room_io import PersistentRoomIO
+from .routing import ROUTERS
+from .session_store import SessionStore, hydrate_agent
+from .supervisor import TaskSupervisor
+from .uploads import ProgressReader, UploadQueue
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Build the next agent's session while the outgoing one goes quiet and closes; SWITCH_OVERLAP=0 switches sequentially
+SWITCH_OVERLAP = os.getenv("SWITCH_OVERLAP", "1") != "0"
+
+
+class UploadStreamInfo:
+    """Stream info for files that arrive base64-encoded over the data channel"""
+
+    def __init__(self, name, mime_type, size):
+        self.name = name
+        self.mime_type = mime_type
+        self.size = size
+        self.topic = "files"
+
+
+def _decode_packet(data):
+    """(message, sender identity) of a data packet; message is None if it cannot be decoded"""
+    message = None
+    participant_identity = "unknown"
+
+    # Method 1: Direct data access
+    if hasattr(data, 'data'):
+        message = data.data.decode('utf-8')
+        if hasattr(data, 'participant') and data.participant:
+            participant_identity = data.participant.identity
+    # Method 2: Event-style access
+    elif hasattr(data, 'payload'):
+        message = data.payload.decode('utf-8')
+    # Method 3: Direct bytes
+    elif isinstance(data, bytes):
+        message = data.decode('utf-8')
+    return message, participant_identity
+
+
+def _default_agent_factory(agent_type: str):
+    from .agents import build_agent
+    return build_agent(agent_type)
+
+
+def _default_session_factory(**options):
+    from livekit.agents import AgentSession
+    return AgentSession(**options)
+
+
+def _default_room_io_factory(session, room, noise_cancellation=None):
+    from livekit.agents import RoomInputOptions, RoomIO
+    return RoomIO(session, room=room, input_options=RoomInputOptions(noise_cancellation=noise_cancellation))
+
+
+def _default_participant_audio_factory(room, participant):
+    from livekit import rtc
+    return rtc.AudioStream.from_participant(
+        participant=participant,
+        track_source=rtc.TrackSource.SOURCE_MICROPHONE,
+        sample_rate=16000,
+        num_channels=1,
+    )
+
+
+class RoomRuntime:
+    """Owns the active agent and session of one room and applies client commands.
+
+    Agent types come from the registry, so adding a profile there is enough to
+    make it reachable through `switch_to_<agent_type>`. The agent, session and
+    RoomIO factories can be replaced, which is how the offline replay harness
+    runs rooms against stub plugins.
+    """
+
+    def __init__(
+        self,
+        room,
+        vad=None,
+        agent_factory=None,
+        session_factory=None,
+        room_io_factory=None,
+        participant_audio_factory=None,
+        multiparty: bool = MULTIPARTY_ENABLED,
+    ) -> None:
+        self.room = room
+        self.vad = vad
+        self.agent_factory = agent_factory or _default_agent_factory
+        self.session_factory = session_factory or _default_session_factory
+        self.room_io_factory = room_io_factory or _default_room_io_factory
+        self.participant_audio_factory = participant_audio_factory or _default_participant_audio_factory
+        self.current_agent = None
+        self.session = None
+        self.room_io = None
+        # Tracks stay subscribed and the agent's audio stays published across switches
+        self.media = PersistentRoomIO(room, lambda *args, **options: self.room_io_factory(*args, **options))
+        self.current_agent_type = DEFAULT_AGENT_TYPE
+        self.is_switching = False
+        self.overlap_switches = SWITCH_OVERLAP
+        # Set while the worker hands this room over: no new turns or switches
+        self.draining = False
+        self.snapshot_dir = ROOM_SNAPSHOT_DIR
+        self._resume_chat = None
+        self.byte_stream_handler_registered = False
+        # Pause statistics belong to the speaker, so they survive agent switches
+        self.endpointing = AdaptiveEndpointing()
+        # So does the room's noise floor, learned by the pre-VAD energy gate
+        self.input_gate = EnergyGate()
+        # STT-seconds saved are reported per room, so one gate follows every session
+        self.stt_gate = SpeechGate()
+        # Time to silence of every interrupt in the room, across agent switches
+        self.interrupt_stats = InterruptStats()
+        # Uploaded documents, their search index and the conversation so far belong
+        # to the room, not to one agent, so switches and reconnects keep them
+        self.documents = DocumentLibrary()
+        self.search_index = SessionIndex()
+        self.session_store = SessionStore(getattr(room, "name", "room"))
+        self._save_queued = False
+        # Background work started by room events is bounded and dies with the room
+        self.tasks = TaskSupervisor(getattr(room, "name", "room"))
+        # Sessions, RoomIOs and agents are tracked weakly so ones that outlive a switch or the room show up
+        AUDITOR.track(getattr(room, "name", "room"), "runtime", self)
+        self._room_handlers = []
+        # Several people in one consultation: one STT front-end each, one session answering them in turn
+        self.multiparty = None
+        if multiparty:
+            self.multiparty = MultipartyFrontEnds(
+                room,
+                self._answer_participant,
+                lambda participant: self.participant_audio_factory(self.room, participant),
+            )
+        # Turn and switch commands are de-duplicated and applied in order, after any switch ahead of them
+        self.commands = CommandSequencer(self._apply_command)
+        # Uploads run one after another against the active agent, smallest first
+        self.uploads = UploadQueue(
+            publish=lambda payload: self.room.local_participant.publish_data(payload),
+            spawn=lambda coro: self.tasks.spawn("upload", coro),
+        )
+
+    @property
+    def profile(self):
+        return get_profile(self.current_agent_type)
+
+    def _manual_turns_active(self) -> bool:
+        return self.session is not None and self.profile.manual_turns
+
+    async def run(self) -> None:
+        """Start the default agent and subscribe to the room's RPCs and data packets"""
+        # Register the byte stream handler ONCE at the beginning
+        self.register_byte_stream_handler()
+
+        # A reconnect to the same room picks up where the previous worker left off
+        await asyncio.to_thread(self.session_store.load)
+
+        # A room drained off another worker carries on with its agent, context and documents
+        snapshot = await asyncio.to_thread(load_snapshot, getattr(self.room, "name", "room"), self.snapshot_dir)
+        agent_type = await self._resume(snapshot) if snapshot is not None else DEFAULT_AGENT_TYPE
+
+        # Start with attorney agent by default and broadcast state
+        await self.start_agent_session(agent_type)
+        logger.info(f"✅ Initial {agent_type} agent session started")
+
+        local_participant = self.room.local_participant
+
+        @local_participant.register_rpc_method("start_turn")
+        async def start_turn(data):
+            """Called when user presses the Start Recording button"""
+            log_event("turn", "🎤 start_turn called by %s", data.caller_identity)
+            self.commands.submit(Command("start_turn", data.caller_identity, id=rpc_command_id(data.payload), source="rpc"))
+
+        @local_participant.register_rpc_method("end_turn")
+        async def end_turn(data):
+            """Called when user presses the End Recording button"""
+            log_event("turn", "🛑 end_turn called by %s", data.caller_identity)
+            self.commands.submit(Command("end_turn", data.caller_identity, id=rpc_command_id(data.payload), source="rpc"))
+
+        @local_participant.register_rpc_method("cancel_turn")
+        async def cancel_turn(data):
+            """Called when user cancels their recording"""
+            log_event("turn", "❌ cancel_turn called by %s", data.caller_identity)
+            self.commands.submit(Command("cancel_turn", data.caller_identity, id=rpc_command_id(data.payload), source="rpc"))
+
+        # Create a synchronous wrapper for the async data handler
+        def sync_data_handler(data):
+            """Synchronous wrapper that schedules the async handler on the room's supervisor"""
+            # Turn and switch commands are sequenced as they arrive, so a burst cannot overflow the data tasks
+            try:
+                message, participant_identity = _decode_packet(data)
+            except Exception:
+                # handle_data_packet logs what could not be decoded
+                message, participant_identity = None, None
+            if message and self.commands.submit_message(message, participant_identity, AGENT_PROFILES):
+                log_event("data_packet", "📩 '%s' from %s", message, participant_identity, agent=self.current_agent_type)
+                return
+            self.tasks.spawn("data", self.handle_data_packet(data))
+
+        self._listen("data_received", sync_data_handler)
+        logger.info("✅ Data handler registered successfully (with async wrapper)")
+
+        # Documents a user uploaded in earlier sessions are searchable again
+        for participant in getattr(self.room, "remote_participants", {}).values():
+            self.load_user_documents(participant.identity)
+        self._listen("participant_connected", lambda participant: self.load_user_documents(participant.identity))
+        # A client that reconnects numbers its commands from the start again
+        self._listen("participant_disconnected", lambda participant: self.commands.forget(participant.identity))
+
+        if self.multiparty is not None:
+            for participant in getattr(self.room, "remote_participants", {}).values():
+                await self.multiparty.add(participant)
+            self._listen(
+                "participant_connected",
+                lambda participant: self.tasks.spawn("state", self.multiparty.add(participant)),
+            )
+            self._listen(
+                "participant_disconnected",
+                lambda participant: self.tasks.spawn("state", self.multiparty.remove(participant.identity)),
+            )
+
+    def _listen(self, event: str, callback) -> None:
+        """Subscribe to a room event; aclose() unsubscribes so the room stops referencing this runtime"""
+        self.room.on(event, callback)
+        self._room_handlers.append((event, callback))
+
+    def load_user_documents(self, identity: str) -> None:
+        """Merge a participant's persisted document index into the room's index"""
+        if DOCUMENT_INDEX_DIR:
+            self.tasks.spawn("state", asyncio.to_thread(self.search_index.load_user, identity))
+
+    async def aclose(self) -> None:
+        """Room teardown: cancel background tasks, then close the active session"""
+        await self.commands.aclose()
+        await self.tasks.aclose()
+        if sum(self.commands.received.values()):
+            logger.info(f"🔀 Commands: {self.commands.metrics()}")
+        if self.input_gate.frames:
+            logger.info(f"🔇 Energy gate: {self.input_gate.metrics()}")
+        if self.stt_gate.seconds:
+            logger.info(f"🎧 STT gating: {self.stt_gate.metrics()}")
+        if self.interrupt_stats.interrupts:
+            logger.info(f"🛑 Interrupts: {self.interrupt_stats.metrics()}")
+        for kind, router in list(ROUTERS.items()):
+            logger.info(f"🪁 {kind} providers: {router.metrics()}")
+        if self.multiparty is not None:
+            logger.info(f"👥 Multi-party: {self.multiparty.metrics()}")
+            await self.multiparty.aclose()
+        await self._cleanup_session(self.session, self.current_agent_type)
+        await self.media.aclose()
+        self.room_io = None
+        logger.info(f"🔌 RoomIO: {self.media.metrics()}")
+        await asyncio.to_thread(self.session_store.save)
+        self.documents.close()
+        self._release_room()
+        AUDITOR.retire(self.current_agent)
+        self.session = None
+        self.current_agent = None
+        AUDITOR.retire_room(getattr(self.room, "name", "room"))
+        if LIFECYCLE_AUDIT_ENABLED and AUDITOR.due():
+            # Finds what earlier switches and rooms left behind; this room's objects are checked at the next audit.
+            # gc.collect and get_referrers are slow, so they run off the loop
+            await asyncio.to_thread(AUDITOR.audit)
+            logger.info(f"🧟 Lifecycle: {AUDITOR.metrics()}")
+
+    # ---- Byte stream uploads -------------------------------------------------
+
+    def register_byte_stream_handler(self) -> None:
+        """Register the 'files' byte stream handler once per room"""
+        if self.byte_stream_handler_registered:
+            return
+        try:
+            existing_handlers = getattr(self.room, '_byte_stream_handlers', {})
+            if 'files' not in existing_handlers:
+                self.room.register_byte_stream_handler("files", self._file_received_handler)
+                logger.info("📄 Registered byte stream handler for topic 'files'")
+            else:
+                logger.info("📄 Byte stream handler for 'files' already exists")
+            self.byte_stream_handler_registered = True
+        except ValueError as e:
+            if "already set" in str(e):
+                self.byte_stream_handler_registered = True
+                logger.info("📄 Byte stream handler already exists (caught ValueError)")
+            else:
+                logger.error(f"❌ ValueError registering byte stream handler: {e}")
+        except Exception as e:
+            logger.error(f"❌ Failed to register byte stream handler: {e}")
+
+    def _release_room(self) -> None:
+        """Drop the room's references to this runtime: event handlers and the byte stream handler"""
+        off = getattr(self.room, "off", None)
+        for event, callback in self._room_handlers:
+            if off is not None:
+                off(event, callback)
+        self._room_handlers = []
+        unregister = getattr(self.room, "unregister_byte_stream_handler", None)
+        if self.byte_stream_handler_registered and unregister is not None:
+            try:
+                unregister("files")
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to unregister byte stream handler: {e}")
+            self.byte_stream_handler_registered = False
+
+    def _file_received_handler(self, reader, participant_info):
+        """Handler for incoming byte streams"""
+        logger.info("📄 Byte stream handler called: topic=%s, participant=%s",
+                    reader.info.topic, participant_info)
+
+        if self.current_agent is None:
+            logger.error("❌ No current_agent available to handle file upload")
+            return
+
+        agent = self.current_agent
+
+        async def handle_file_upload(job):
+            await agent._file_received(ProgressReader(reader, self.uploads.report_progress(job)), participant_info)
+            logger.info("✅ File processing completed successfully")
+
+        info = reader.info
+        # The upload queue bounds itself and tells the client when it rejects a file
+        self.tasks.spawn("state", self.uploads.submit(
+            info.name, getattr(info, "size", None), info.mime_type, participant_info, handle_file_upload
+        ))
+
+    async def handle_file_upload_fallback(self, file_data: dict, participant_identity: str) -> None:
+        """Queue a base64 file sent through publishData for the active agent"""
+        try:
+            file_bytes = base64.b64decode(file_data.get('data', ''))
+            file_name = file_data.get('fileName', 'unknown.txt')
+            mime_type = file_data.get('mimeType', 'application/octet-stream')
+
+            logger.info(f"📄 Processing file: {file_name} ({len(file_bytes)} bytes, {mime_type})")
+            stream_info = UploadStreamInfo(file_name, mime_type, len(file_bytes))
+
+            agent = self.current_agent
+            if agent:
+                async def handle_file_upload(job):
+                    await agent._file_received_fallback(file_bytes, stream_info, participant_identity)
+
+                await self.uploads.submit(file_name, len(file_bytes), mime_type, participant_identity, handle_file_upload)
+            else:
+                logger.warning("📄 No active agent to handle file upload")
+        except Exception as e:
+            logger.error(f"❌ Error processing file upload fallback: {e}")
+
+    # ---- Session lifecycle ---------------------------------------------------
+
+    async def start_agent_session(self, agent_type: str) -> None:
+        """Start or restart the session with the specified agent type"""
+        # CRITICAL: Ensure byte stream handler is registered only once
+        self.register_byte_stream_handler()
+
+        # Uploads waiting on the outgoing agent would answer through a closed session
+        await self.uploads.supersede()
+
+        # Comprehensive session cleanup before starting new session
+        await self._cleanup_session(self.session, self.current_agent_type)
+        self.session = None
+        AUDITOR.retire(self.current_agent)
+
+        session, agent = await self._build_session(agent_type)
+        await self._activate_session(agent_type, session, agent)
+
+    async def _build_session(self, agent_type: str):
+        """Create and hydrate the session and agent for `agent_type` without touching the room's media"""
+        profile = get_profile(agent_type)
+        session_options = profile.session_options(vad=self.vad)
+        if profile.adaptive_endpointing and not profile.manual_turns:
+            self.endpointing.default_min_delay = profile.min_endpointing_delay
+            self.endpointing.default_max_delay = profile.max_endpointing_delay
+            min_delay, max_delay = self.endpointing.delays()
+            session_options["min_endpointing_delay"] = min_delay
+            session_options["max_endpointing_delay"] = max_delay
+            logger.info(f"⏱️ Adaptive endpointing delays: {min_delay}s/{max_delay}s")
+
+        session = self.session_factory(**session_options)
+        agent = self.agent_factory(agent_type)
+        if hasattr(agent, "search_index"):
+            agent.documents = self.documents
+            agent.search_index = self.search_index
+            agent.session_store = self.session_store
+        if self._resume_chat is not None:
+            hydrated = await restore_chat(agent, self._resume_chat)
+            self._resume_chat = None
+        else:
+            hydrated = await hydrate_agent(agent, self.session_store, profile.language)
+        if hydrated:
+            logger.info(f"💾 Hydrated {agent_type} agent with {hydrated} stored context items")
+        self._record_conversation(session, agent_type, profile.language)
+        room_name = getattr(self.room, "name", "room")
+        AUDITOR.track(room_name, "session", session)
+        AUDITOR.track(room_name, "agent", agent)
+        return session, agent
+
+    async def _activate_session(self, agent_type: str, session, agent) -> None:
+        """Make a built session the room's: bind the room's media, start it and announce the agent"""
+        profile = get_profile(agent_type)
+        # The room-wide endpointing and STT gate follow one session, so they move once the old one is quiet
+        if profile.adaptive_endpointing and not profile.manual_turns:
+            self.endpointing.attach(session)
+        gate_stt = profile.stt_gating and not profile.manual_turns and STT_GATING_ENABLED
+        if gate_stt and hasattr(agent, "stt_gate"):
+            self.stt_gate.attach(session)
+            agent.stt_gate = self.stt_gate
+        self.current_agent = agent
+        self.session = session
+        logger.info(f"Starting {profile.log_tag} session (turn detection: {profile.turn_detection})")
+
+        self.room_io = await self.media.bind(session, profile.noise_cancellation)
+        if profile.energy_gate and not profile.manual_turns and gate_session_input(session, self.input_gate):
+            logger.info(f"🔇 Energy gate ahead of VAD (noise floor {self.input_gate.noise_floor:.0f} dBFS)")
+
+        await session.start(agent=agent)
+        self.current_agent_type = agent_type
+
+        logger.info(f"✅ {agent_type} agent session started successfully")
+        logger.info(f"🎯 CURRENT ACTIVE AGENT TYPE: {self.current_agent_type}")
+
+        # Broadcast active agent state to clients for synchronization
+        try:
+            await self.room.local_participant.publish_data(
+                f"active_agent:{self.current_agent_type}".encode("utf-8")
+            )
+            logger.info(f"📣 Broadcasted active agent: {self.current_agent_type}")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to broadcast active agent: {e}")
+
+        if self.multiparty is not None:
+            # Participants are heard through their own front-ends; the session only answers
+            session.input.set_audio_enabled(False)
+            gate_stt = profile.stt_gating and not profile.manual_turns and STT_GATING_ENABLED
+            await self.multiparty.use(getattr(agent, "stt", None), self.vad if gate_stt else None, profile.manual_turns)
+            logger.info(f"👥 MULTI-PARTY MODE: {len(self.multiparty.front_ends)} speakers, one {agent_type} session")
+        elif profile.manual_turns:
+            # Disable input audio at the start - key for push-to-talk functionality
+            session.input.set_audio_enabled(False)
+            logger.info("CLICK-TO-TALK MODE: Audio disabled until start_turn")
+        else:
+            session.input.set_audio_enabled(True)
+            logger.info("CONTINUOUS MODE: Audio enabled for continuous conversation")
+
+    def _record_conversation(self, session, agent_type: str, language: str) -> None:
+        """Copy committed user and agent messages into the room's session store"""
+        def on_item_added(event):
+            item = getattr(event, "item", None)
+            self.session_store.add_message(
+                getattr(item, "role", ""), getattr(item, "text_content", None), agent_type, language
+            )
+            self.persist_session()
+
+        session.on("conversation_item_added", on_item_added)
+
+    def persist_session(self) -> None:
+        """Write the session store to disk in the background when persistence is on"""
+        if self.session_store.path and not self._save_queued:
+            self._save_queued = True
+            self.tasks.spawn("state", self._save_session())
+
+    async def _save_session(self) -> None:
+        # A save that has not started yet covers every change made before it starts
+        self._save_queued = False
+        await asyncio.to_thread(self.session_store.save)
+
+    async def _cleanup_session(self, session_to_cleanup, agent_type: str) -> None:
+        """Comprehensive session cleanup to ensure clean agent switching"""
+        if not session_to_cleanup:
+            return
+        logger.info(f"🔄 Starting comprehensive cleanup for {agent_type} agent...")
+        await self._quiesce_session(session_to_cleanup, agent_type)
+        await self._close_session(session_to_cleanup, agent_type)
+
+    async def _quiesce_session(self, session, agent_type: str) -> None:
+        """Stop a session listening and speaking; returns once its audio output is silent"""
+        if not get_profile(agent_type).manual_turns:
+            try:
+                session.input.set_audio_enabled(False)
+                logger.info("🛑 DISABLED continuous agent audio input before cleanup")
+            except Exception as e:
+                logger.warning(f"Failed to disable audio input: {e}")
+
+            try:
+                if hasattr(session, "clear_user_turn"):
+                    session.clear_user_turn()
+                    logger.info("🛑 CLEARED user turn state for continuous agent")
+            except Exception as e:
+                logger.warning(f"Failed to clear user turn: {e}")
+
+        try:
+            # One interrupt that returns once playout has stopped, instead of fixed sleeps
+            await interrupt_and_wait(session, self.interrupt_stats)
+        except Exception as e:
+            logger.error(f"❌ Session cleanup error for {agent_type}: {e}")
+
+    async def _close_session(self, session, agent_type: str) -> None:
+        """Close a quiet session; the room's RoomIO is unhooked first so it keeps running"""
+        try:
+            self.media.release(session)
+            await session.close()
+            logger.info(f"✅ {agent_type} agent session successfully cleaned up and closed")
+        except Exception as e:
+            logger.error(f"❌ Session cleanup error for {agent_type}: {e}")
+        self.endpointing.detach(session)
+        AUDITOR.retire(session)
+
+    async def _switch_overlapped(self, agent_type: str) -> None:
+        """Build the next session while the current one goes quiet, then close the old one while the new one starts.
+
+        Audio output changes hands in one step once the old session is
+        silent: its RoomIO is released and the new session bound before
+        either awaits, so the two never play into the room together.
+        """
+        self.register_byte_stream_handler()
+        await self.uploads.supersede()
+
+        old_session, old_type, old_agent = self.session, self.current_agent_type, self.current_agent
+        quiesce = asyncio.ensure_future(self._quiesce_session(old_session, old_type))
+        try:
+            session, agent = await self._build_session(agent_type)
+        finally:
+            await quiesce
+
+        self.media.release(old_session)
+        self.session = None
+        activated, _ = await asyncio.gather(
+            self._activate_session(agent_type, session, agent),
+            self._close_session(old_session, old_type),
+            return_exceptions=True,
+        )
+        AUDITOR.retire(old_agent)
+        if isinstance(activated, BaseException):
+            raise activated
+
+    async def switch_agent(self, agent_type: str) -> None:
+        """Switch to another agent type, retrying once on failure"""
+        logger.info(f"🔄 Switching to {agent_type} agent... (current: {self.current_agent_type})")
+        if self.is_switching:
+            logger.info("⏳ Switch already in progress, ignoring request")
+            return
+        if self.draining:
+            logger.info("🚰 Room is moving to another worker, ignoring switch")
+            return
+        self.is_switching = True
+
+        started = asyncio.get_running_loop().time()
+        try:
+            if self.session and self.overlap_switches:
+                await self._switch_overlapped(agent_type)
+            else:
+                # Clean immediate interruption before switching
+                if self.session:
+                    continuous = not self.profile.manual_turns
+                    if continuous:
+                        try:
+                            self.session.input.set_audio_enabled(False)
+                        except Exception:
+                            pass
+                    await interrupt_and_wait(self.session, self.interrupt_stats)
+
+                await self.start_agent_session(agent_type)
+            elapsed_ms = (asyncio.get_running_loop().time() - started) * 1000
+            logger.info(
+                f"✅ Successfully switched to {agent_type} agent in {elapsed_ms:.0f}ms (now: {self.current_agent_type})"
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to switch to {agent_type} agent: {type(e).__name__}: {e}")
+            try:
+                await self.start_agent_session(agent_type)  # Retry once
+                logger.info(f"✅ Recovery successful - {agent_type} agent started (now: {self.current_agent_type})")
+            except Exception as recovery_error:
+                logger.error(f"❌ Recovery failed: {recovery_error}")
+        finally:
+            self.is_switching = False
+
+    # ---- Drain and resume ----------------------------------------------------
+
+    def _busy(self) -> bool:
+        """A turn, switch or upload is still under way"""
+        session = self.session
+        if self.is_switching or self.uploads.busy or self.commands.pending:
+            return True
+        if session is None:
+            return False
+        if getattr(session, "agent_state", "listening") in ("thinking", "speaking"):
+            return True
+        if getattr(session, "user_state", "listening") == "speaking":
+            return True
+        # A click-to-talk recording that has not been sent yet
+        return self.profile.manual_turns and getattr(session.input, "audio_enabled", False)
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> float:
+        """Let the current turn finish, take no new ones and snapshot the room for the next worker"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.draining = True
+        while self._busy() and loop.time() - started < timeout:
+            await asyncio.sleep(DRAIN_POLL)
+        if self._busy():
+            logger.warning(f"🚰 Turn still running after {timeout}s, snapshotting anyway")
+        if self.session is not None:
+            try:
+                self.session.input.set_audio_enabled(False)
+            except Exception:
+                pass
+
+        saved = await asyncio.to_thread(save_snapshot, self.snapshot(), self.snapshot_dir)
+        await asyncio.to_thread(self.session_store.save)
+        try:
+            await self.room.local_participant.publish_data(b"agent_migrating")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to announce migration: {e}")
+        elapsed = loop.time() - started
+        logger.info(f"🚰 Drained {getattr(self.room, 'name', 'room')} in {elapsed:.2f}s (snapshot saved: {saved})")
+        return elapsed
+
+    def snapshot(self) -> RoomSnapshot:
+        """The active agent type, its chat context and the indexed document pages"""
+        documents = {
+            document: {"owner": self.search_index.owner(document) or "", "pages": pages}
+            for document, pages in self.search_index.export_pages().items()
+        }
+        return RoomSnapshot(
+            room=getattr(self.room, "name", "room"),
+            agent_type=self.current_agent_type,
+            chat=chat_items(self.current_agent.chat_ctx) if self.current_agent is not None else [],
+            documents=documents,
+            saved_at=time.time(),
+        )
+
+    async def _resume(self, snapshot: RoomSnapshot) -> str:
+        """Restore a drained room's documents; returns the agent type to start with"""
+        def index():
+            return sum(
+                self.search_index.add_pages(
+                    document, [(int(page), text) for page, text in entry["pages"].items()], owner=entry.get("owner") or None
+                )
+                for document, entry in snapshot.documents.items()
+            )
+
+        passages = await asyncio.to_thread(index)
+        self._resume_chat = snapshot.chat
+        agent_type = snapshot.agent_type if snapshot.agent_type in AGENT_PROFILES else DEFAULT_AGENT_TYPE
+        logger.info(
+            f"📦 Resuming {snapshot.room}: {agent_type} agent, {len(snapshot.chat)} chat items, "
+            f"{len(snapshot.documents)} documents ({passages} passages)"
+        )
+        return agent_type
+
+    # ---- Turn control --------------------------------------------------------
+
+    async def _apply_command(self, command: Command) -> None:
+        """Run one sequenced command against the active agent"""
+        if command.kind == "switch":
+            await self.switch_agent(command.target)
+        elif command.kind == "start_turn":
+            # A single-user room records whoever is publishing; RPC callers are always known
+            identity = command.identity if command.source == "rpc" or self.multiparty is not None else None
+            self.start_turn(identity)
+        elif command.kind == "end_turn":
+            self.end_turn(command.identity)
+        elif command.kind == "cancel_turn":
+            self.cancel_turn(command.identity)
+
+    def start_turn(self, participant_identity=None) -> None:
+        """Begin a click-to-talk recording"""
+        if not self._manual_turns_active() or self.draining:
+            return
+        # CORRECT LiveKit pattern for manual turn control
+        self.session.interrupt()        # Stop any current agent speech (permanent)
+        if self.multiparty is not None:
+            # Only the caller's own front-end records; the others keep their state
+            self.multiparty.start_turn(participant_identity)
+            log_event("turn", "✅ Click-to-talk recording started for %s", participant_identity)
+            return
+        self.session.clear_user_turn()  # Clear any previous input
+        if participant_identity and self.room_io:
+            # Listen to the caller if multi-user
+            self.room_io.set_participant(participant_identity)
+        self.session.input.set_audio_enabled(True)
+        log_event("turn", "✅ Click-to-talk recording started")
+
+    def end_turn(self, participant_identity=None) -> None:
+        """Stop recording and let the agent answer"""
+        if not self._manual_turns_active():
+            return
+        if self.multiparty is not None:
+            self.multiparty.end_turn(participant_identity)
+            log_event("turn", "✅ Click-to-talk processing input from %s...", participant_identity)
+            return
+        self.session.input.set_audio_enabled(False)
+        self.session.commit_user_turn(transcript_timeout=3.0)
+        log_event("turn", "✅ Click-to-talk processing user input...")
+
+    def cancel_turn(self, participant_identity=None) -> None:
+        """Discard the current recording"""
+        if not self._manual_turns_active():
+            return
+        if self.multiparty is not None:
+            self.multiparty.cancel_turn(participant_identity)
+            log_event("turn", "✅ Click-to-talk turn of %s cancelled", participant_identity)
+            return
+        self.session.input.set_audio_enabled(False)
+        self.session.clear_user_turn()
+        log_event("turn", "✅ Click-to-talk turn cancelled")
+
+    async def interrupt_agent(self) -> None:
+        """Stop the agent's current speech"""
+        session = self.session
+        if not session:
+            logger.warning("⚠️ No active session to interrupt")
+            return
+
+        await interrupt_and_wait(session, self.interrupt_stats)
+
+    async def handle_chat(self, chat_text: str) -> None:
+        """Forward a typed chat message to the active agent"""
+        log_event("chat", "Chat message: %s", chat_text)
+        try:
+            # Normalize brand name variants before LLM using the active agent's language
+            normalized = normalize_transcript(chat_text, self.profile.language)
+            if self.current_agent and self.session:
+                chat_ctx = self.current_agent.chat_ctx.copy()
+                chat_ctx.add_message(role="user", content=normalized)
+                await self.current_agent.update_chat_ctx(chat_ctx)
+                await self.session.generate_reply(
+                    instructions="Please respond helpfully and concisely.",
+                    allow_interruptions=True,
+                )
+        except Exception as e:
+            logger.error(f"❌ Failed to process chat message: {e}")
+
+    async def _answer_participant(self, identity: str, text: str) -> None:
+        """One scheduled multi-party turn: add it to the shared context and wait until the reply has played"""
+        agent, session = self.current_agent, self.session
+        if agent is None or session is None:
+            logger.warning(f"👥 No active session to answer {identity}")
+            return
+        profile = self.profile
+        normalized = normalize_transcript(text, profile.language)
+        log_event("multiparty", "👥 Answering %s: %s", identity, normalized)
+        self.session_store.add_message("user", f"{identity}: {normalized}", self.current_agent_type, profile.language)
+        self.persist_session()
+        chat_ctx = agent.chat_ctx.copy()
+        # The shared context names the speaker so the agent can tell lawyer and client apart
+        chat_ctx.add_message(role="user", content=f"[{identity}] {normalized}")
+        await agent.update_chat_ctx(chat_ctx)
+        try:
+            await session.generate_reply(
+                instructions=f"Reply to {identity}; several participants share this consultation. Be helpful and concise.",
+                allow_interruptions=True,
+            )
+        except asyncio.CancelledError:
+            # The reply was interrupted (switch, click-to-talk); the scheduler itself was not cancelled
+            if asyncio.current_task().cancelling():
+                raise
+
+    # ---- Data packets --------------------------------------------------------
+
+    async def handle_data_packet(self, data) -> None:
+        """Handle incoming data packets from participants"""
+        try:
+            logger.debug("📩 RAW DATA RECEIVED: %s", data)
+
+            message, participant_identity = _decode_packet(data)
+
+            if not message:
+                logger.warning(f"❌ Could not decode message from data: {type(data)}")
+                return
+
+            # One sampled record per packet; the state it was handled in rides along as fields
+            log_event(
+                "data_packet", "📩 '%s' from %s", message, participant_identity,
+                agent=self.current_agent_type, session=self.session is not None, switching=self.is_switching,
+            )
+
+            # Turn and switch commands never get here: sync_data_handler sequences them on arrival
+            if message == "interrupt_agent":
+                self.tasks.spawn("interrupt", self.interrupt_agent())
+            elif message.startswith("chat:"):
+                await self.handle_chat(message[5:])
+            else:
+                # Try to parse as JSON for file upload fallback
+                try:
+                    file_data = json.loads(message)
+                    if isinstance(file_data, dict) and file_data.get('type') == 'file_upload':
+                        logger.info("📄 Received file upload via publishData fallback")
+                        await self.handle_file_upload_fallback(file_data, participant_identity)
+                    else:
+                        logger.warning(f"❓ Unknown command: '{message}'")
+                except json.JSONDecodeError:
+                    logger.warning(f"❓ Unknown command: '{message}'")
+        except Exception as e:
+            logger.error(f"❌ Error processing data: {e}")
+            logger.error(f"Data type: {type(data)}")
+            if hasattr(data, '__dict__'):
+                logger.error(f"Data attributes: {data.__dict__}")
@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+from .handoff import build_handoff, render_handoff
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Directory for per-room session files; unset keeps state in memory for the room's lifetime
+SESSION_STORE_DIR = os.getenv("SESSION_STORE_DIR")
+SESSION_HISTORY_MESSAGES = int(os.getenv("SESSION_HISTORY_MESSAGES", "30"))
+MAX_MESSAGE_CHARS = 1000
+MAX_SUMMARY_CHARS = 2000
+DOCUMENT_EXCERPT_CHARS = 800
+
+_SENTENCE_END = re.compile(r"(?<=[.!?؟])\s")
+
+# Headers of the messages that carry stored state into a new agent, per agent language
+HYDRATION_LABELS = {
+    "en": {
+        "summary": "Earlier in this session (condensed):\n{summary}",
+        "documents": "Documents the client uploaded earlier in this session, each with its opening text:\n{documents}",
+    },
+    "ar": {
+        "summary": "ملخص ما سبق في هذه الجلسة:\n{summary}",
+        "documents": "المستندات التي رفعها العميل سابقًا في هذه الجلسة، مع بداية نص كل منها:\n{documents}",
+    },
+}
+
+
+@dataclass
+class StoredMessage:
+    role: str
+    text: str
+    agent_type: str = ""
+    at: float = 0.0
+    language: str = ""
+
+
+@dataclass
+class DocumentRef:
+    """What the session knows about an upload without keeping its full text"""
+    name: str
+    doc_id: str
+    mime_type: str = ""
+    size: int = 0
+    pages: int = 0
+    excerpt: str = ""  # the document's opening text, up to DOCUMENT_EXCERPT_CHARS
+    owner: str = ""
+
+
+@dataclass
+class SessionState:
+    messages: list = field(default_factory=list)
+    documents: list = field(default_factory=list)
+    summary: str = ""
+
+
+def _first_sentence(text: str) -> str:
+    return _SENTENCE_END.split(text.strip(), maxsplit=1)[0][:200]
+
+
+def _leading_section(text: str, limit: int = DOCUMENT_EXCERPT_CHARS) -> str:
+    """The opening of a document, cut after its last full sentence within `limit`"""
+    text = " ".join((text or "").split())
+    if len(text) <= limit:
+        return text
+    head = text[:limit]
+    ends = [match.start() for match in _SENTENCE_END.finditer(head)]
+    if ends and ends[-1] >= limit // 2:
+        return head[:ends[-1]]
+    return head.rsplit(" ", 1)[0] + " …"
+
+
+def _document_ref(saved: dict) -> DocumentRef:
+    # Session files written before the field was renamed call the excerpt "summary"
+    if "summary" in saved:
+        saved = dict(saved)
+        saved.setdefault("excerpt", saved.pop("summary"))
+    return DocumentRef(**saved)
+
+
+class SessionStore:
+    """Compact per-room memory that outlives agent instances.
+
+    Keeps the recent conversation, references to uploaded documents with
+    their opening text, and an extractive digest of older turns. New agents
+    are hydrated from it on switch or reconnect instead of starting cold.
+    """
+
+    def __init__(self, room_name: str, directory: str = None) -> None:
+        self.room_name = room_name
+        self.directory = directory if directory is not None else SESSION_STORE_DIR
+        self.state = SessionState()
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    # ---- Recording -----------------------------------------------------------
+
+    def add_message(self, role: str, text: str, agent_type: str = "", language: str = "") -> None:
+        text = (text or "").strip()
+        if role not in ("user", "assistant") or not text:
+            return
+        with self._lock:
+            self.state.messages.append(StoredMessage(role, text[:MAX_MESSAGE_CHARS], agent_type, time.time(), language))
+            overflow = len(self.state.messages) - SESSION_HISTORY_MESSAGES
+            if overflow > 0:
+                # Older turns collapse into one line each in the running digest
+                dropped, self.state.messages = self.state.messages[:overflow], self.state.messages[overflow:]
+                lines = [f"{m.role}: {_first_sentence(m.text)}" for m in dropped]
+                digest = "\n".join(filter(None, [self.state.summary] + lines))
+                self.state.summary = digest[-MAX_SUMMARY_CHARS:]
+            self._dirty = True
+
+    def add_document(self, ref: DocumentRef) -> None:
+        with self._lock:
+            self.state.documents = [d for d in self.state.documents if d.name != ref.name]
+            ref.excerpt = _leading_section(ref.excerpt)
+            self.state.documents.append(ref)
+            self._dirty = True
+
+    def find_document(self, doc_id: str):
+        with self._lock:
+            for ref in self.state.documents:
+                if ref.doc_id == doc_id:
+                    return ref
+        return None
+
+    # ---- Hydration -----------------------------------------------------------
+
+    def context_messages(self, language: str = "en"):
+        """[(role, content)] that rebuild an agent's chat context from this store.
+
+        Turns held in another language are not replayed: they, the digest and the
+        document list are folded into one language-neutral hand-off instead.
+        """
+        labels = HYDRATION_LABELS.get(language, HYDRATION_LABELS["en"])
+        with self._lock:
+            messages = list(self.state.messages)
+            documents = list(self.state.documents)
+            summary = self.state.summary
+        foreign = [m for m in messages if m.language and m.language != language]
+        if foreign:
+            handoff = build_handoff(foreign, documents, summary, from_language=foreign[-1].language)
+            items = [("assistant", render_handoff(handoff, language))]
+            items.extend((m.role, m.text) for m in messages if not m.language or m.language == language)
+            return items
+
+        items = []
+        if summary:
+            items.append(("assistant", labels["summary"].format(summary=summary)))
+        if documents:
+            listing = "\n".join(
+                f"- {d.name} ({d.mime_type}, {d.pages or '?'} pages): {d.excerpt}" for d in documents
+            )
+            items.append(("assistant", labels["documents"].format(documents=listing)))
+        items.extend((m.role, m.text) for m in messages)
+        return items
+
+    # ---- Persistence ---------------------------------------------------------
+
+    @property
+    def path(self):
+        if not self.directory:
+            return None
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", self.room_name)[:100]
+        return os.path.join(self.directory, f"{safe}.session.json")
+
+    def load(self) -> bool:
+        """Restore a previous session of this room from disk, if there is one"""
+        path = self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, encoding="utf-8") as fh:
+                saved = json.load(fh)
+            with self._lock:
+                self.state = SessionState(
+                    messages=[StoredMessage(**m) for m in saved.get("messages", [])],
+                    documents=[_document_ref(d) for d in saved.get("documents", [])],
+                    summary=saved.get("summary", ""),
+                )
+            logger.info(
+                f"💾 Restored session for {self.room_name}: {len(self.state.messages)} messages, "
+                f"{len(self.state.documents)} documents"
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Could not restore session for {self.room_name}: {e}")
+            return False
+
+    def save(self) -> None:
+        """Write the session to disk if it changed since the last save"""
+        path = self.path
+        if not path or not self._dirty:
+            return
+        with self._lock:
+            payload = asdict(self.state)
+            self._dirty = False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            self._dirty = True
+            logger.warning(f"⚠️ Could not save session for {self.room_name}: {e}")
+
+
+async def hydrate_agent(agent, store: SessionStore, language: str = "en") -> int:
+    """Seed a fresh agent's chat context from the room's session store"""
+    items = store.context_messages(language)
+    if not items or not hasattr(agent, "update_chat_ctx"):
+        return 0
+    chat_ctx = agent.chat_ctx.copy()
+    for role, content in items:
+        chat_ctx.add_message(role=role, content=content)
+    await agent.update_chat_ctx(chat_ctx)
+    return len(items)
@@ -0,0 +1,177 @@
+import os
+import re
+
+
+# Shape LLM text into clean, speakable sentences before TTS; set TTS_TEXT_SHAPING=0 to send raw text
+SPEECH_SHAPING_ENABLED = os.getenv("TTS_TEXT_SHAPING", "1") != "0"
+MIN_SENTENCE_CHARS = 20  # shorter sentences are joined to the next one
+MAX_SENTENCE_CHARS = 220  # longer runs without a full stop are split at a clause boundary
+
+# Symbols the TTS voice would otherwise read out or stumble over, per agent language
+SPOKEN_SYMBOLS = {
+    "en": {
+        "&": " and ", "§": " section ", "→": ", ", "=>": ", ", "->": ", ", "/": " or ",
+        "<=": " at most ", ">=": " at least ", "≤": " at most ", "≥": " at least ",
+        "<": " less than ", ">": " greater than ",
+    },
+    "ar": {
+        "&": " و ", "§": " المادة ", "→": "، ", "=>": "، ", "->": "، ", "/": " أو ",
+        "<=": " لا يزيد على ", ">=": " لا يقل عن ", "≤": " لا يزيد على ", "≥": " لا يقل عن ",
+        "<": " أقل من ", ">": " أكبر من ",
+    },
+}
+
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "vs", "v", "art", "sec", "para",
+    "etc", "inc", "ltd", "co", "corp", "e.g", "i.e", "u.s", "u.k", "approx", "fig", "cf",
+}
+
+_BOUNDARY = re.compile(r"[.!?؟…]+[\"'”’)\]]*(?=\s)|\n")
+_WORD_BEFORE = re.compile(r"([\w.]+)[.]+$")
+_CLAUSE = re.compile(r"[,;:،؛]\s")
+
+_CITATION = r"(?:\[\^?\d+(?:[,\s-]*\d+)*\]|【[^】]*】)"
+_CITE_WORD = r"(?:see(?:\s+also)?|cf\.?|ref\.?|انظر|راجع)"
+_CITE_ITEM = rf"(?:{_CITE_WORD}\s*)?(?:{_CITATION}|\(\s*(?:{_CITE_WORD}\s*)?{_CITATION}\s*\))"
+
+_CLEANUP = (
+    (re.compile(r"```[^\n]*"), ""),
+    (re.compile(r"`([^`]*)`"), r"\1"),
+    (re.compile(r"!?\[([^\]]+)\]\([^)]*\)"), r"\1"),
+    # A run of citations goes with the words that only introduce them: "see [1] and (see [2])"
+    (re.compile(rf"\s*{_CITE_ITEM}(?:\s*(?:,|;|and|or|&|و)?\s*{_CITE_ITEM})*", re.IGNORECASE), ""),
+    (re.compile(r"</?[a-zA-Z][^<>]*>"), ""),
+    (re.compile(r"https?://\S+|www\.\S+"), ""),
+    (re.compile(r"^\s*(?:#{1,6}|>+|[-*+•▪◦]|\d{1,3}[.)])\s+", re.MULTILINE), ""),
+    (re.compile(r"^\s*(?:[-*_]\s*){3,}$|^\s*\|?(?:\s*:?-{3,}:?\s*\|)+\s*$", re.MULTILINE), ""),
+    (re.compile(r"\*{1,3}|(?<!\w)_{1,3}|_{1,3}(?!\w)|~~"), ""),
+    (re.compile(r"\s*\|\s*"), ", "),
+    (re.compile("[\U0001F300-\U0001FAFF☀-➿️#^~{}\\\\]"), ""),
+)
+# Brackets left empty, or holding only a filler word, once citations are gone: "(see [1])"
+_EMPTY_BRACKETS = re.compile(
+    r"\s*[(\[]\s*(?:(?:see|cf|e\.g|i\.e|ref|refs|source|sources|citation|citations|انظر|راجع|المصدر)\.?)?[\s,;:.،؛]*[)\]]",
+    re.IGNORECASE,
+)
+# "Section § 12" already says the word the § stands for
+_SECTION_SIGN = re.compile(r"(?<!\w)(sections?|sec\.|المادة|مادة|البند)\s*§+\s*", re.IGNORECASE)
+_SLASH_BETWEEN_WORDS = re.compile(r"(?<=[^\W\d])/(?=[^\W\d])")
+_SPACES = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCTUATION = re.compile(r"\s+(?=[.,!?؟:;،؛])")
+_COMMA_BEFORE_STOP = re.compile(r"[,;،؛]+(?=[.!?؟])")
+_WORD = re.compile(r"\w")
+_ENDS_SPOKEN = re.compile(r"[.!?؟…:,;،؛\"'”’)]$")
+
+
+def clean_for_speech(text: str, language: str = "en") -> str:
+    """Strip markdown, citations, links and symbols from one complete sentence"""
+    for pattern, replacement in _CLEANUP:
+        text = pattern.sub(replacement, text)
+    text = _EMPTY_BRACKETS.sub("", text)
+    text = _SECTION_SIGN.sub(r"\1 ", text)
+    symbols = SPOKEN_SYMBOLS.get(language, SPOKEN_SYMBOLS["en"])
+    text = _SLASH_BETWEEN_WORDS.sub(symbols["/"], text)
+    for symbol, spoken in symbols.items():
+        if symbol != "/":
+            text = text.replace(symbol, spoken)
+    text = _SPACE_BEFORE_PUNCTUATION.sub("", _SPACES.sub(" ", text))
+    text = _COMMA_BEFORE_STOP.sub("", text).strip(" ,،")
+    if not _WORD.search(text):
+        # Nothing left to say once the citations are gone
+        return ""
+    if text and not _ENDS_SPOKEN.search(text):
+        # Headings and list items end without punctuation; give the voice a full stop
+        text += "."
+    return text
+
+
+class SpeechTextShaper:
+    """Turns a stream of LLM tokens into clean sentences, each ready for TTS on its own.
+
+    A sentence is released as soon as its terminator is followed by
+    whitespace, so decimals, URLs and "e.g." do not split it. Line breaks end
+    headings and list items. Long runs with no full stop are split at a
+    clause boundary so the first audio is not held back.
+    """
+
+    def __init__(
+        self,
+        language: str = "en",
+        min_chars: int = MIN_SENTENCE_CHARS,
+        max_chars: int = MAX_SENTENCE_CHARS,
+    ) -> None:
+        self.language = language
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._short = ""
+
+    def _boundary(self):
+        """End offset of the first complete sentence in the buffer, or None"""
+        for match in _BOUNDARY.finditer(self._buffer):
+            if match.group() == "\n":
+                return match.end()
+            head = self._buffer[: match.start() + 1]
+            word = _WORD_BEFORE.search(head)
+            if word:
+                token = word.group(1).lower().rstrip(".")
+                line = head[head.rfind("\n") + 1:].strip()
+                # "Dr." and "e.g." abbreviate, "1." numbers a list item, "A." is an initial
+                if token in ABBREVIATIONS or line[:-1].isdigit() or (len(token) == 1 and token.isalpha()):
+                    continue
+                if token == "no":
+                    # "No. 5" numbers something, "no. You" ends a sentence
+                    rest = self._buffer[match.end():].lstrip()
+                    if not rest:
+                        break
+                    if rest[0].isdigit():
+                        continue
+            return match.end()
+        if len(self._buffer) > self.max_chars:
+            clauses = list(_CLAUSE.finditer(self._buffer, 0, self.max_chars))
+            if clauses:
+                return clauses[-1].end()
+            space = self._buffer.rfind(" ", 0, self.max_chars)
+            return space + 1 if space > 0 else self.max_chars
+        return None
+
+    def _emit(self, raw: str, final: bool = False):
+        sentence = clean_for_speech(raw, self.language)
+        if not sentence:
+            return None
+        sentence = f"{self._short} {sentence}".strip() if self._short else sentence
+        if len(sentence) < self.min_chars and not final:
+            self._short = sentence
+            return None
+        self._short = ""
+        return sentence
+
+    def push(self, token: str):
+        """Add LLM output; returns the sentences it completed"""
+        self._buffer += token
+        sentences = []
+        end = self._boundary()
+        while end is not None:
+            raw, self._buffer = self._buffer[:end], self._buffer[end:].lstrip(" ")
+            sentence = self._emit(raw)
+            if sentence:
+                sentences.append(sentence)
+            end = self._boundary()
+        return sentences
+
+    def flush(self) -> str:
+        """Whatever is left when the LLM finishes"""
+        raw, self._buffer = self._buffer, ""
+        sentence = self._emit(raw, final=True) if raw.strip() else None
+        if sentence is None and self._short:
+            sentence, self._short = self._short, ""
+        return sentence or ""
+
+    async def shape(self, text):
+        """Wrap a tts_node text stream"""
+        async for token in text:
+            for sentence in self.push(token):
+                yield sentence + " "
+        rest = self.flush()
+        if rest:
+            yield rest
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+
+@dataclass
+class TaskLimit:
+    """How many tasks of one kind may run at once, and how many may wait behind them"""
+    concurrency: int
+    max_pending: int = None  # None: never dropped
+
+
+DEFAULT_TASK_LIMITS = {
+    # Data packets are small commands; keep arrival order and a short backlog
+    "data": TaskLimit(concurrency=4, max_pending=32),
+    # UploadQueue workers; the queue itself orders and bounds the uploads
+    "upload": TaskLimit(concurrency=2, max_pending=4),
+    # Repeated interrupt commands collapse into the one already queued
+    "interrupt": TaskLimit(concurrency=1, max_pending=1),
+    # Joins, leaves, session saves and upload hand-offs: few, small and lost for good if dropped.
+    # One at a time keeps a participant's join ahead of their leave
+    "state": TaskLimit(concurrency=1, max_pending=None),
+}
+
+FALLBACK_LIMIT = TaskLimit(concurrency=4, max_pending=16)
+
+
+@dataclass
+class TaskStats:
+    started: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    dropped: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    active: set = field(default_factory=set)
+
+
+class TaskSupervisor:
+    """Runs a room's background tasks with per-kind limits and cancels them on teardown.
+
+    `spawn` never blocks the caller: when a kind already has `max_pending`
+    tasks running or waiting, the new coroutine is dropped and counted,
+    so a bursty client cannot grow the task set without bound. Kinds
+    without `max_pending` queue everything until the room closes.
+    """
+
+    def __init__(self, name: str = "room", limits: dict = None) -> None:
+        self.name = name
+        self.limits = dict(DEFAULT_TASK_LIMITS)
+        self.limits.update(limits or {})
+        self.closed = False
+        self._semaphores = {}
+        self._stats = {}
+
+    def _stats_for(self, kind: str) -> TaskStats:
+        if kind not in self._stats:
+            self._stats[kind] = TaskStats()
+        return self._stats[kind]
+
+    def _semaphore_for(self, kind: str) -> asyncio.Semaphore:
+        if kind not in self._semaphores:
+            self._semaphores[kind] = asyncio.Semaphore(self.limits.get(kind, FALLBACK_LIMIT).concurrency)
+        return self._semaphores[kind]
+
+    def spawn(self, kind: str, coro):
+        """Schedule `coro` under the limits of `kind`; returns the task, or None if dropped"""
+        stats = self._stats_for(kind)
+        limit = self.limits.get(kind, FALLBACK_LIMIT)
+        if self.closed or (limit.max_pending is not None and len(stats.active) >= limit.max_pending):
+            coro.close()
+            stats.dropped += 1
+            # Log the first drop of a burst and then every 50th, not every packet
+            if stats.dropped % 50 == 1:
+                reason = "room closed" if self.closed else f"{len(stats.active)} already pending"
+                logger.warning(f"⚠️ Dropped {kind} task in {self.name}: {reason} ({stats.dropped} dropped so far)")
+            return None
+
+        task = asyncio.get_event_loop().create_task(self._run(kind, coro))
+        stats.active.add(task)
+        task.add_done_callback(lambda t: self._finished(kind, t))
+        return task
+
+    async def _run(self, kind: str, coro):
+        try:
+            await self._semaphore_for(kind).acquire()
+        except asyncio.CancelledError:
+            # Cancelled while still queued: the coroutine never started
+            coro.close()
+            raise
+        try:
+            stats = self._stats_for(kind)
+            stats.started += 1
+            started = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                duration = time.perf_counter() - started
+                stats.total_duration += duration
+                stats.max_duration = max(stats.max_duration, duration)
+        finally:
+            self._semaphore_for(kind).release()
+
+    def _finished(self, kind: str, task) -> None:
+        stats = self._stats_for(kind)
+        stats.active.discard(task)
+        if task.cancelled():
+            stats.cancelled += 1
+        elif task.exception() is not None:
+            stats.failed += 1
+            logger.error(f"❌ {kind} task failed in {self.name}: {task.exception()}")
+        else:
+            stats.completed += 1
+
+    @property
+    def pending(self) -> int:
+        return sum(len(stats.active) for stats in self._stats.values())
+
+    def metrics(self) -> dict:
+        """Per-kind task counts and durations"""
+        report = {}
+        for kind, stats in self._stats.items():
+            finished = stats.completed + stats.failed
+            report[kind] = {
+                "pending": len(stats.active),
+                "started": stats.started,
+                "completed": stats.completed,
+                "failed": stats.failed,
+                "cancelled": stats.cancelled,
+                "dropped": stats.dropped,
+                "avg_duration": round(stats.total_duration / finished, 4) if finished else 0.0,
+                "max_duration": round(stats.max_duration, 4),
+            }
+        return report
+
+    async def aclose(self, timeout: float = 2.0) -> None:
+        """Refuse new tasks, cancel the running ones and wait for them to unwind"""
+        self.closed = True
+        tasks = [task for stats in self._stats.values() for task in stats.active]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        logger.info(f"🧹 Task supervisor for {self.name} closed ({len(tasks)} cancelled): {self.metrics()}")
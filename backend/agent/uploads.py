@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+
+logger = logging.getLogger("multi-agent-ptt")
+
+# Uploads processed at once per room; each one ends in a reply on the shared session
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "1"))
+# Uploads allowed to wait behind the running ones before new ones are rejected
+UPLOAD_MAX_QUEUED = int(os.getenv("UPLOAD_MAX_QUEUED", "8"))
+# A job that later, smaller uploads have jumped this many times goes next, so a big file is not starved
+UPLOAD_MAX_PASSED_OVER = int(os.getenv("UPLOAD_MAX_PASSED_OVER", "3"))
+
+
+@dataclass
+class UploadJob:
+    """One queued upload; smaller files sort first, ties keep arrival order, overdue jobs go ahead"""
+    size: int
+    seq: int
+    name: str
+    mime_type: str
+    identity: str
+    run: object = field(repr=False)  # async callable(job)
+    passed_over: int = 0
+
+    @property
+    def overdue(self) -> bool:
+        return self.passed_over >= UPLOAD_MAX_PASSED_OVER
+
+    def __lt__(self, other: "UploadJob") -> bool:
+        # Overdue jobs in arrival order, then the rest smallest first
+        mine = (0, 0, self.seq) if self.overdue else (1, self.size, self.seq)
+        theirs = (0, 0, other.seq) if other.overdue else (1, other.size, other.seq)
+        return mine < theirs
+
+    @property
+    def upload_id(self) -> str:
+        return f"upload-{self.seq}"
+
+
+class ProgressReader:
+    """Wraps a byte stream reader and reports received bytes in 10% steps"""
+
+    def __init__(self, reader, report) -> None:
+        self._reader = reader
+        self._report = report
+        self.info = reader.info
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        total = getattr(self.info, "size", None) or 0
+        received = 0
+        last_step = -1
+        async for chunk in self._reader:
+            received += len(chunk)
+            if total:
+                step = min(received * 10 // total, 10)
+                if step != last_step:
+                    last_step = step
+                    await self._report(received, total)
+            yield chunk
+
+
+class UploadQueue:
+    """Per-room upload queue: bounded concurrency, small files first, dropped on agent switch.
+
+    Clients get JSON `upload_status` data messages as a job moves through
+    queued (with its position), receiving, processing and done/failed, or
+    rejected/superseded/cancelled when it is cut short.
+    """
+
+    def __init__(self, publish, spawn, concurrency: int = None, max_queued: int = None) -> None:
+        self.publish = publish      # async callable(bytes)
+        self.spawn = spawn          # callable(coro) -> task or None
+        self.concurrency = max(1, concurrency or UPLOAD_CONCURRENCY)
+        self.max_queued = max_queued or UPLOAD_MAX_QUEUED
+        self._heap = []
+        self._running = {}          # seq -> (job, task)
+        self._superseded = set()    # seqs of running jobs cancelled by supersede()
+        self._generation = 0        # bumped by supersede()
+        self._seq = itertools.count(1)
+        self._workers = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._heap)
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._heap or self._running)
+
+    async def _notify(self, job: UploadJob, status: str, **extra) -> None:
+        message = {"type": "upload_status", "id": job.upload_id, "fileName": job.name, "status": status}
+        message.update(extra)
+        try:
+            await self.publish(json.dumps(message).encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to publish upload status for {job.name}: {e}")
+
+    async def _notify_positions(self) -> None:
+        for position, job in enumerate(sorted(self._heap), start=1):
+            await self._notify(job, "queued", position=position, queued=len(self._heap))
+
+    async def submit(self, name: str, size: int, mime_type: str, identity: str, run) -> bool:
+        """Queue an upload for the active agent; returns False if the queue is full"""
+        job = UploadJob(size or 0, next(self._seq), name, mime_type, identity, run)
+        if len(self._heap) >= self.max_queued:
+            logger.warning(f"⚠️ Upload queue full ({len(self._heap)} waiting), rejecting {name}")
+            await self._notify(job, "rejected", reason="queue_full")
+            return False
+
+        heapq.heappush(self._heap, job)
+        logger.info(f"📥 Queued upload {name} ({job.size} bytes), {len(self._heap)} waiting")
+        await self._notify_positions()
+        self._start_workers()
+        return True
+
+    def _start_workers(self) -> None:
+        while self._workers < self.concurrency and self._heap:
+            self._workers += 1
+            if self.spawn(self._worker()) is None:
+                self._workers -= 1
+                break
+
+    async def _worker(self) -> None:
+        try:
+            while self._heap:
+                job = self._next_job()
+                generation = self._generation
+                await self._notify_positions()
+                if generation != self._generation:
+                    # Superseded while the positions went out, when it was neither queued nor running
+                    await self._notify(job, "superseded")
+                    continue
+                task = asyncio.ensure_future(self._process(job))
+                self._running[job.seq] = (job, task)
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    # A superseded job ends quietly; anything else is room teardown
+                    if job.seq not in self._superseded:
+                        raise
+                finally:
+                    self._running.pop(job.seq, None)
+                    self._superseded.discard(job.seq)
+        finally:
+            self._workers -= 1
+
+    def _next_job(self) -> UploadJob:
+        job = heapq.heappop(self._heap)
+        for waiting in self._heap:
+            if waiting.seq < job.seq:
+                waiting.passed_over += 1
+        # Passed-over counts change the order
+        heapq.heapify(self._heap)
+        return job
+
+    async def _process(self, job: UploadJob) -> None:
+        await self._notify(job, "processing")
+        try:
+            await job.run(job)
+            await self._notify(job, "done")
+        except asyncio.CancelledError:
+            await self._notify(job, "superseded" if job.seq in self._superseded else "cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Upload {job.name} failed: {e}", exc_info=True)
+            await self._notify(job, "failed")
+
+    def report_progress(self, job: UploadJob):
+        """Progress callback for a ProgressReader feeding `job`"""
+        async def report(received: int, total: int) -> None:
+            await self._notify(job, "receiving", received=received, total=total,
+                               percent=round(100 * received / total))
+        return report
+
+    async def supersede(self) -> int:
+        """Drop every queued and running upload; called when the active agent changes"""
+        self._generation += 1
+        dropped, self._heap = self._heap, []
+        for job in dropped:
+            await self._notify(job, "superseded")
+
+        running = list(self._running.values())
+        for job, task in running:
+            self._superseded.add(job.seq)
+            task.cancel()
+        if dropped or running:
+            logger.info(f"🗑️ Superseded {len(dropped)} queued and {len(running)} running uploads")
+        return len(dropped) + len(running)
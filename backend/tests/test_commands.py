@@ -0,0 +1,141 @@
+import asyncio
+
+from agent.commands import Command, CommandSequencer, parse_command, rpc_command_id
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_sequencer(scenario, **options):
+    """Run `scenario(sequencer, applied, gate)`; apply() waits on `gate` before recording a command"""
+    async def main():
+        applied = []
+        gate = asyncio.Event()
+        gate.set()
+
+        async def apply(command):
+            await gate.wait()
+            applied.append((command.kind, command.identity, command.target))
+
+        sequencer = CommandSequencer(apply, **options)
+        await scenario(sequencer, applied, gate)
+        while sequencer.pending:
+            await asyncio.sleep(0)
+        await sequencer.aclose()
+        return sequencer, applied
+
+    return asyncio.run(main())
+
+
+def test_same_id_from_two_callers_is_not_a_duplicate():
+    async def scenario(sequencer, applied, gate):
+        assert sequencer.submit(Command("start_turn", "alice", id="1"))
+        assert sequencer.submit(Command("start_turn", "bob", id="1"))
+
+    sequencer, applied = run_sequencer(scenario)
+    assert applied == [("start_turn", "alice", None), ("start_turn", "bob", None)]
+    assert sequencer.dropped == {}
+
+
+def test_repeated_id_from_one_caller_is_dropped():
+    async def scenario(sequencer, applied, gate):
+        assert sequencer.submit(Command("start_turn", "alice", id="1", source="rpc"))
+        assert not sequencer.submit(Command("start_turn", "alice", id="1", source="data"))
+
+    sequencer, applied = run_sequencer(scenario)
+    assert applied == [("start_turn", "alice", None)]
+    assert sequencer.dropped == {"duplicate": 1}
+
+
+def test_reconnected_caller_can_reuse_its_ids():
+    async def scenario(sequencer, applied, gate):
+        assert sequencer.submit(Command("start_turn", "alice", id="1"))
+        assert sequencer.submit(Command("end_turn", "alice", id="2"))
+        sequencer.forget("alice")
+        assert sequencer.submit(Command("start_turn", "alice", id="1"))
+
+    sequencer, applied = run_sequencer(scenario)
+    assert [kind for kind, _, _ in applied] == ["start_turn", "end_turn", "start_turn"]
+
+
+def test_repeat_without_id_is_dropped_only_within_the_window():
+    clock = FakeClock()
+
+    async def scenario(sequencer, applied, gate):
+        assert sequencer.submit(Command("start_turn", "alice"))
+        clock.now = 0.2
+        assert not sequencer.submit(Command("start_turn", "alice"))
+        clock.now = 1.0
+        assert sequencer.submit(Command("start_turn", "alice"))
+
+    sequencer, applied = run_sequencer(scenario, window=0.5, clock=clock)
+    assert len(applied) == 2
+    assert sequencer.dropped == {"duplicate": 1}
+
+
+def test_switch_burst_keeps_only_the_latest_target():
+    async def scenario(sequencer, applied, gate):
+        gate.clear()
+        sequencer.submit(Command("switch", "alice", target="arabic", id="1"))
+        await asyncio.sleep(0)
+        assert sequencer.applying.target == "arabic"
+        sequencer.submit(Command("switch", "alice", target="attorney", id="2"))
+        sequencer.submit(Command("switch", "alice", target="click_to_talk", id="3"))
+        # Already on its way there
+        sequencer.submit(Command("switch", "alice", target="arabic", id="4"))
+        gate.set()
+
+    sequencer, applied = run_sequencer(scenario)
+    assert [target for _, _, target in applied] == ["arabic"]
+    assert sequencer.coalesced == {"switch": 3}
+
+
+def test_cancel_replaces_the_callers_waiting_presses():
+    async def scenario(sequencer, applied, gate):
+        gate.clear()
+        sequencer.submit(Command("switch", "alice", target="arabic"))
+        await asyncio.sleep(0)
+        sequencer.submit(Command("start_turn", "alice", id="1"))
+        sequencer.submit(Command("start_turn", "bob", id="1"))
+        sequencer.submit(Command("cancel_turn", "alice", id="2"))
+        gate.set()
+
+    sequencer, applied = run_sequencer(scenario)
+    assert applied == [("switch", "alice", "arabic"), ("start_turn", "bob", None), ("cancel_turn", "alice", None)]
+
+
+def test_overflow_is_dropped():
+    async def scenario(sequencer, applied, gate):
+        gate.clear()
+        sequencer.submit(Command("switch", "alice", target="arabic"))
+        await asyncio.sleep(0)
+        assert sequencer.submit(Command("start_turn", "alice", id="1"))
+        assert sequencer.submit(Command("end_turn", "alice", id="2"))
+        assert not sequencer.submit(Command("start_turn", "bob", id="1"))
+        gate.set()
+
+    sequencer, applied = run_sequencer(scenario, max_pending=2)
+    assert sequencer.dropped == {"overflow": 1}
+    assert len(applied) == 3
+
+
+def test_parse_command():
+    assert parse_command("start_turn#17", "alice") == Command("start_turn", "alice", id="17")
+    assert parse_command("switch_to_arabic", "alice", ("arabic",)) == Command("switch", "alice", target="arabic")
+    assert parse_command("switch_to_unknown", "alice", ("arabic",)) is None
+    assert parse_command("chat:hello", "alice") is None
+
+
+def test_rpc_id_only_from_an_explicit_field():
+    assert rpc_command_id('{"id": "17"}') == "17"
+    assert rpc_command_id('{"id": 17}') == "17"
+    assert rpc_command_id("17") is None
+    assert rpc_command_id("hello") is None
+    assert rpc_command_id('{"other": 1}') is None
+    assert rpc_command_id('{"id": ""}') is None
+    assert rpc_command_id("") is None
@@ -0,0 +1,71 @@
+import logging
+
+import pytest
+
+from agent import endpointing
+from agent.endpointing import AdaptiveEndpointing
+
+
+@pytest.fixture(autouse=True)
+def unchecked_sdk(monkeypatch):
+    monkeypatch.setattr(endpointing, "_live_updates", None)
+
+
+class Session:
+    def __init__(self) -> None:
+        self.updates = []
+
+    def update_options(self, *, min_endpointing_delay=None, max_endpointing_delay=None) -> None:
+        self.updates.append((min_endpointing_delay, max_endpointing_delay))
+
+
+class OldSession:
+    """A livekit-agents session that cannot change its delays once running"""
+
+
+def test_short_pauses_shrink_the_delay():
+    controller = AdaptiveEndpointing(min_delay=3.3, max_delay=5.0)
+    controller.delays()
+    for _ in range(20):
+        controller.observe_pause(0.4)
+    min_delay, max_delay = controller.delays()
+    assert min_delay < 1.0
+    assert max_delay == pytest.approx(min_delay + 1.7)
+
+
+def test_pauses_at_the_cutoff_do_not_ratchet_the_delay_down():
+    controller = AdaptiveEndpointing(min_delay=3.3, max_delay=5.0)
+    for _ in range(10):
+        controller.observe_pause(0.4)
+    shrunk, _ = controller.delays()
+    # From now on every pause runs into the shorter cut-off
+    for _ in range(40):
+        controller.observe_pause(shrunk - 0.05)
+        assert controller.delays()[0] >= shrunk
+
+
+def test_false_cutoff_widens_the_delay():
+    controller = AdaptiveEndpointing(min_delay=3.3, max_delay=5.0)
+    for _ in range(10):
+        controller.observe_pause(0.4)
+    before, _ = controller.delays()
+    controller.observe_false_cutoff(before)
+    assert controller.false_cutoffs == 1
+    assert controller.delays()[0] > before
+
+
+def test_apply_records_only_delays_that_reached_the_session():
+    controller = AdaptiveEndpointing(min_delay=3.3, max_delay=5.0)
+    session = Session()
+    assert controller.apply(session)
+    assert session.updates == [(3.3, 5.0)]
+    assert controller.applied == (3.3, 5.0)
+
+
+def test_missing_live_updates_warn_once_and_apply_nothing(caplog):
+    controller = AdaptiveEndpointing(min_delay=3.3, max_delay=5.0)
+    with caplog.at_level(logging.DEBUG, logger="multi-agent-ptt"):
+        assert not controller.apply(OldSession())
+        assert not controller.apply(OldSession())
+    assert controller.applied is None
+    assert [r.levelno for r in caplog.records] == [logging.WARNING]
@@ -0,0 +1,44 @@
+import argparse
+import random
+
+from agent.replay.loadgen import generate_trace, run_level
+from agent.replay.stubs import StubVAD
+
+
+def test_trace_is_reproducible_per_seed():
+    assert generate_trace(random.Random(3)) == generate_trace(random.Random(3))
+    assert generate_trace(random.Random(3)) != generate_trace(random.Random(4))
+
+
+def test_trace_is_ordered_and_ends_the_room():
+    for seed in range(20):
+        trace = generate_trace(random.Random(seed), duration=120.0)
+        times = [event["at"] for event in trace]
+        assert times == sorted(times)
+        assert trace[-1] == {"at": 120.0, "type": "end"}
+
+
+def test_click_to_talk_turns_are_bracketed_by_rpcs():
+    for seed in range(20):
+        manual = False
+        pressed = False
+        for event in generate_trace(random.Random(seed), duration=120.0, switch_rate=0.4):
+            if event["type"] == "data":
+                manual = "click_to_talk" in event["payload"]
+            elif event["type"] == "rpc":
+                assert manual
+                assert pressed == (event["method"] == "end_turn")
+                pressed = event["method"] == "start_turn"
+            elif event["type"] == "speech":
+                assert pressed == manual
+        assert not pressed
+
+
+def test_capacity_level_reports_every_room():
+    args = argparse.Namespace(
+        duration=20.0, speed=40.0, stt_latency=0.25, llm_first_token=0.35, tts_latency=0.15, seed=1
+    )
+    row = run_level(2, args, StubVAD())
+    assert row["rooms"] == 2
+    assert row["turns"] > 0
+    assert 0 < row["turn_p50_s"] <= row["turn_p95_s"] <= row["turn_max_s"]
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from agent.normalization import BRAND_REPLACEMENTS, StreamingNormalizer, TextNormalizer
+
+WORDS = {
+    "en": "the contract says my landlord must return the deposit within thirty days please".split(),
+    "ar": "العقد ينص على أن المالك يجب أن يعيد التأمين خلال ثلاثين يوم".split(),
+}
+VARIANTS = {
+    "en": ["hakim", "h a a k e e m", "Haakeem", "hakem", "akim", "bin fin eight", "binfinate", "been-fin-8"],
+    "ar": ["هاكيم", "حاكيم", "بن فن ايت", "بينفين ٨", "hakeem"],
+}
+
+
+def transcript(rng: random.Random, language: str, words: int = 60) -> str:
+    pool = WORDS[language] + VARIANTS[language]
+    return " ".join(rng.choice(pool) for _ in range(words))
+
+
+def chunks(rng: random.Random, text: str):
+    index = 0
+    while index < len(text):
+        size = rng.randint(1, 12)
+        yield text[index:index + size]
+        index += size
+
+
+def test_replaces_every_variant():
+    normalizer = TextNormalizer(BRAND_REPLACEMENTS["en"])
+    assert normalizer.normalize("ask h a a k e e m about bin fin eight") == "ask HAAKEEM about Binfin8"
+    assert normalizer.normalize("Hakim, akim and hakem") == "HAAKEEM, HAAKEEM and HAAKEEM"
+    assert normalizer.normalize("hakimsson binfinity") == "hakimsson binfinity"
+    assert normalizer.normalize("") == ""
+
+
+@pytest.mark.parametrize("language", ["en", "ar"])
+def test_streamed_deltas_equal_full_normalization(language):
+    normalizer = TextNormalizer(BRAND_REPLACEMENTS[language])
+    rng = random.Random(11)
+    for _ in range(200):
+        text = transcript(rng, language)
+        streaming = StreamingNormalizer(normalizer)
+        received = ""
+        for delta in chunks(rng, text):
+            received += delta
+            assert streaming.push(delta) == normalizer.normalize(received)
+
+
+@pytest.mark.parametrize("language", ["en", "ar"])
+def test_revised_hypotheses_equal_full_normalization(language):
+    normalizer = TextNormalizer(BRAND_REPLACEMENTS[language])
+    pool = WORDS[language] + VARIANTS[language]
+    rng = random.Random(23)
+    for _ in range(200):
+        streaming = StreamingNormalizer(normalizer)
+        words = []
+        for _ in range(40):
+            if words and rng.random() < 0.3:
+                # The STT revises an earlier word, near the tail or well before it
+                words[rng.randrange(len(words))] = rng.choice(pool)
+            else:
+                words.append(rng.choice(pool))
+            hypothesis = " ".join(words)
+            assert streaming.update(hypothesis) == normalizer.normalize(hypothesis)
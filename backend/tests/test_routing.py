@@ -0,0 +1,133 @@
+import asyncio
+
+from agent.replay.stubs import FakeProvider, Latency
+from agent.routing import CircuitBreaker, ProviderRouter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def collect(router, candidates, **options):
+    async def main():
+        return [item async for item in router.stream(candidates, **options)]
+
+    return asyncio.run(main())
+
+
+def failing_midway(items: int = 2):
+    async def stream():
+        for index in range(items):
+            yield f"partial-{index}"
+        raise ConnectionError("stream reset")
+
+    return stream
+
+
+def test_failure_before_the_first_item_falls_over():
+    router = ProviderRouter("llm")
+    broken = FakeProvider("broken", Latency(0.0), error_rate=1.0, items=2)
+    backup = FakeProvider("backup", Latency(0.0), items=2)
+    assert collect(router, {"broken": broken.stream, "backup": backup.stream}, hedge=False) == ["backup-0", "backup-1"]
+    assert router.stats("broken").errors == 1
+    assert router.stats("backup").wins == 1
+
+
+def test_slow_primary_is_hedged_to_the_next_provider():
+    router = ProviderRouter("llm", hedge_min=0.01, hedge_max=0.01)
+    slow = FakeProvider("slow", Latency(1.0), items=1)
+    fast = FakeProvider("fast", Latency(0.0), items=1)
+    assert collect(router, {"slow": slow.stream, "fast": fast.stream}) == ["fast-0"]
+    assert router.stats("slow").hedges == 1
+    assert router.stats("slow").requests == 0
+
+
+def test_failure_after_the_first_item_is_recorded_once():
+    router = ProviderRouter("llm")
+    items = []
+
+    async def main():
+        async for item in router.stream({"flaky": failing_midway()}, hedge=False):
+            items.append(item)
+
+    try:
+        asyncio.run(main())
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("the stream error should reach the caller")
+    stats = router.stats("flaky")
+    assert items == ["partial-0", "partial-1"]
+    assert (stats.requests, stats.errors, stats.wins) == (1, 1, 1)
+    assert list(stats.breaker.outcomes) == [False]
+
+
+def test_caller_closing_early_counts_as_success():
+    router = ProviderRouter("llm")
+    provider = FakeProvider("primary", Latency(0.0), items=5)
+
+    async def main():
+        stream = router.stream({"primary": provider.stream}, hedge=False)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(main()) == "primary-0"
+    stats = router.stats("primary")
+    assert (stats.requests, stats.errors) == (1, 0)
+
+
+def test_open_breaker_moves_a_provider_to_the_back():
+    router = ProviderRouter("llm")
+    for _ in range(4):
+        router.stats("primary").record(False)
+    assert router.stats("primary").breaker.state == "open"
+    assert router.ranked(["primary", "secondary"]) == ["secondary", "primary"]
+
+
+def test_slow_provider_moves_to_the_back_otherwise_declared_order_holds():
+    router = ProviderRouter("llm")
+    router.stats("primary").record(True, 0.2)
+    router.stats("secondary").record(True, 0.3)
+    assert router.ranked(["primary", "secondary"]) == ["primary", "secondary"]
+    router.stats("primary").record(True, 1.0)
+    router.stats("primary").record(True, 1.0)
+    assert router.ranked(["primary", "secondary"]) == ["secondary", "primary"]
+
+
+def test_breaker_opens_then_lets_one_probe_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_requests=4, cooldown=30.0, clock=clock)
+    for ok in (True, False, True, False):
+        breaker.record(ok)
+    assert breaker.state == "open"
+    assert breaker.trips == 1
+    assert not breaker.allow()
+
+    clock.now = 30.0
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    # A failed probe keeps it open for another cooldown
+    breaker.record(False)
+    assert breaker.state == "open"
+
+    clock.now = 60.0
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert list(breaker.outcomes) == []
+
+
+def test_abandoned_probe_frees_the_half_open_slot():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_requests=1, cooldown=1.0, clock=clock)
+    breaker.record(False)
+    clock.now = 1.0
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
@@ -0,0 +1,29 @@
+import json
+
+from agent.session_store import DOCUMENT_EXCERPT_CHARS, DocumentRef, SessionStore
+
+
+def test_document_keeps_its_opening_up_to_a_full_sentence():
+    store = SessionStore("room", directory="")
+    store.add_document(DocumentRef("lease.pdf", "doc1", excerpt="The tenant pays  monthly.\n" * 100))
+    excerpt = store.find_document("doc1").excerpt
+    assert len(excerpt) <= DOCUMENT_EXCERPT_CHARS
+    assert excerpt.startswith("The tenant pays monthly. The tenant")
+    assert excerpt.endswith("monthly.")
+
+
+def test_documents_are_listed_with_their_opening_text():
+    store = SessionStore("room", directory="")
+    store.add_document(DocumentRef("lease.pdf", "doc1", "application/pdf", pages=3, excerpt="Lease between A and B."))
+    (role, content), = store.context_messages("en")
+    assert role == "assistant"
+    assert "opening text" in content
+    assert "- lease.pdf (application/pdf, 3 pages): Lease between A and B." in content
+
+
+def test_restores_a_session_file_from_before_the_excerpt_rename(tmp_path):
+    saved = {"messages": [], "documents": [{"name": "lease.pdf", "doc_id": "doc1", "summary": "Lease between A and B."}]}
+    (tmp_path / "room.session.json").write_text(json.dumps(saved), encoding="utf-8")
+    store = SessionStore("room", directory=str(tmp_path))
+    assert store.load()
+    assert store.find_document("doc1").excerpt == "Lease between A and B."
@@ -0,0 +1,51 @@
+from agent.speech_text import SpeechTextShaper, clean_for_speech
+
+
+def shape(text: str, language: str = "en", **options):
+    """Feed `text` word by word, like LLM tokens, and collect what the shaper releases"""
+    shaper = SpeechTextShaper(language, **options)
+    sentences = []
+    for token in text.split(" "):
+        sentences += shaper.push(token + " ")
+    rest = shaper.flush()
+    return sentences + ([rest] if rest else [])
+
+
+def test_no_ends_a_sentence_unless_a_number_follows():
+    assert shape("The answer is no. You must file today. See case No. 5 for that.", min_chars=0) == [
+        "The answer is no.",
+        "You must file today.",
+        "See case No. 5 for that.",
+    ]
+
+
+def test_abbreviations_and_decimals_do_not_split():
+    assert shape("Dr. Smith paid 2.5 million, e.g. in cash. Then he left.", min_chars=0) == [
+        "Dr. Smith paid 2.5 million, e.g. in cash.",
+        "Then he left.",
+    ]
+
+
+def test_short_sentences_are_joined():
+    assert shape("Yes. That is quite right. The deadline is Friday.") == ["Yes. That is quite right.", "The deadline is Friday."]
+
+
+def test_comparison_signs_are_spoken():
+    assert clean_for_speech("Is 2 > 1? Only if x <= 3.") == "Is 2 greater than 1? Only if x at most 3."
+    assert clean_for_speech("هل 2 > 1؟", "ar") == "هل 2 أكبر من 1؟"
+
+
+def test_html_tags_are_dropped():
+    assert clean_for_speech("Use <b>bold</b> here.") == "Use bold here."
+
+
+def test_citations_go_with_the_words_that_introduce_them():
+    assert clean_for_speech("The court held so, see [1] and (see [2]).") == "The court held so."
+    assert clean_for_speech("Claims [1][2] hold (see [3, 4]).") == "Claims hold."
+    assert clean_for_speech("Per art. 5 [3], cf. [4], it applies.") == "Per art. 5, it applies."
+    assert clean_for_speech("see [1] and (see [2]).") == ""
+
+
+def test_markdown_is_stripped():
+    assert clean_for_speech("## **Next steps**") == "Next steps."
+    assert clean_for_speech("- Read [the contract](https://example.com) & sign") == "Read the contract and sign."
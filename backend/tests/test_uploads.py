@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+from agent.uploads import UPLOAD_MAX_PASSED_OVER, UploadQueue
+
+
+class Client:
+    """Collects the upload_status messages a room publishes"""
+
+    def __init__(self) -> None:
+        self.messages = []
+        self.hold = None  # (file name, position) whose "queued" message blocks until released
+        self.held = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def publish(self, payload: bytes) -> None:
+        message = json.loads(payload)
+        self.messages.append(message)
+        if self.hold == (message["fileName"], message.get("position")) and message["status"] == "queued":
+            self.held.set()
+            await self.release.wait()
+        await asyncio.sleep(0)
+
+    def statuses(self, name: str):
+        return [m["status"] for m in self.messages if m["fileName"] == name]
+
+
+def make_queue(client: Client, **options) -> UploadQueue:
+    return UploadQueue(client.publish, asyncio.ensure_future, **options)
+
+
+async def settle(queue: UploadQueue) -> None:
+    while queue.busy or queue._workers:
+        await asyncio.sleep(0)
+
+
+def recording(ran, seconds: float = 0.0):
+    async def run(job):
+        ran.append(job.name)
+        await asyncio.sleep(seconds)
+    return run
+
+
+def test_small_files_first_then_arrival_order():
+    async def main():
+        client, ran = Client(), []
+        queue = make_queue(client, concurrency=1)
+        # The first upload starts at once; the rest wait and are ordered by size
+        await queue.submit("first.pdf", 500, "application/pdf", "alice", recording(ran, 0.01))
+        await queue.submit("big.pdf", 900, "application/pdf", "alice", recording(ran))
+        await queue.submit("small.txt", 10, "text/plain", "alice", recording(ran))
+        await queue.submit("small2.txt", 10, "text/plain", "alice", recording(ran))
+        await settle(queue)
+        return ran
+
+    assert asyncio.run(main()) == ["first.pdf", "small.txt", "small2.txt", "big.pdf"]
+
+
+def test_full_queue_rejects():
+    async def main():
+        client, ran = Client(), []
+        queue = make_queue(client, concurrency=1, max_queued=1)
+        await queue.submit("a.txt", 1, "text/plain", "alice", recording(ran, 0.01))
+        while "a.txt" not in ran:
+            await asyncio.sleep(0)
+        await queue.submit("b.txt", 1, "text/plain", "alice", recording(ran))
+        accepted = await queue.submit("c.txt", 1, "text/plain", "alice", recording(ran))
+        await settle(queue)
+        return accepted, client.statuses("c.txt"), ran
+
+    accepted, statuses, ran = asyncio.run(main())
+    assert not accepted
+    assert statuses == ["rejected"]
+    assert "c.txt" not in ran
+
+
+def test_supersede_cancels_queued_and_running_uploads():
+    async def main():
+        client, ran = Client(), []
+        queue = make_queue(client, concurrency=1)
+        await queue.submit("running.pdf", 10, "application/pdf", "alice", recording(ran, 10.0))
+        await queue.submit("queued.pdf", 20, "application/pdf", "alice", recording(ran))
+        while "running.pdf" not in ran:
+            await asyncio.sleep(0)
+        superseded = await queue.supersede()
+        await settle(queue)
+        return superseded, client, ran
+
+    superseded, client, ran = asyncio.run(main())
+    assert superseded == 2
+    assert ran == ["running.pdf"]
+    assert client.statuses("running.pdf")[-1] == "superseded"
+    assert client.statuses("queued.pdf")[-1] == "superseded"
+
+
+def test_supersede_while_positions_are_published_stops_the_popped_job():
+    async def main():
+        client, ran = Client(), []
+        queue = make_queue(client, concurrency=1)
+        # The worker pops first.pdf, then blocks publishing second.pdf's new position
+        client.hold = ("second.pdf", 1)
+        await queue.submit("first.pdf", 10, "application/pdf", "alice", recording(ran))
+        await queue.submit("second.pdf", 20, "application/pdf", "alice", recording(ran))
+        await client.held.wait()
+        await queue.supersede()
+        client.release.set()
+        await settle(queue)
+        return client, ran
+
+    client, ran = asyncio.run(main())
+    assert ran == []
+    assert client.statuses("first.pdf")[-1] == "superseded"
+    assert client.statuses("second.pdf")[-1] == "superseded"
+
+
+def test_large_upload_is_not_starved_by_a_stream_of_small_ones():
+    async def main():
+        client, ran = Client(), []
+        queue = make_queue(client, concurrency=1, max_queued=8)
+        await queue.submit("first.txt", 1, "text/plain", "alice", recording(ran, 0.001))
+        await queue.submit("big.pdf", 10_000, "application/pdf", "alice", recording(ran, 0.001))
+        for index in range(10):
+            await queue.submit(f"small{index}.txt", 1, "text/plain", "alice", recording(ran, 0.001))
+            # A new small file arrives after each one is taken
+            while len(ran) < index + 1:
+                await asyncio.sleep(0)
+        await settle(queue)
+        return ran
+
+    ran = asyncio.run(main())
+    assert ran.index("big.pdf") <= 1 + UPLOAD_MAX_PASSED_OVER
+    assert sorted(ran) == sorted(["first.txt", "big.pdf"] + [f"small{index}.txt" for index in range(10)])